@@ -8,14 +8,23 @@ PROJECT_ROOT = BASE_DIR.parent                 # DADOS/
 
 # ===============================
 # DIRETÓRIOS
+# (criados sob demanda, por quem grava neles)
 # ===============================
 DATA_DIR = PROJECT_ROOT / "data"
 RAW_DATA_DIR = DATA_DIR / "raw"
 PROCESSED_DATA_DIR = DATA_DIR / "processed"
+CACHE_DIR = PROCESSED_DATA_DIR / "cache"
+ESTADO_DIR = PROCESSED_DATA_DIR / "estado"
+ARQUIVO_IMPRESSOES = PROCESSED_DATA_DIR / "impressoes_linhas.npy"
+PIPELINE_DIR = PROCESSED_DATA_DIR / "pipeline"
+ARQUIVO_ARMAZEM = PROCESSED_DATA_DIR / "armazem"  # extensão .sqlite ou .duckdb, conforme o motor
+ARQUIVO_ARROW = PROCESSED_DATA_DIR / "dados.arrow"  # dados limpos em Arrow IPC, lidos por memory-map
+ARROW_DIR = PROCESSED_DATA_DIR / "arrow"  # snapshots Arrow da camada de dados, um por versão
 
 OUTPUTS_DIR = PROJECT_ROOT / "outputs"
 GRAFICOS_DIR = OUTPUTS_DIR / "graficos"
 RELATORIOS_DIR = OUTPUTS_DIR / "relatorios"
+PERFIS_DIR = OUTPUTS_DIR / "perfis"
 
 # ===============================
 # ARQUIVOS
@@ -28,15 +37,28 @@ ARQUIVO_ESTATISTICAS = RAW_DATA_DIR / "estatistiscas_upp.xlsx"
 ENCODING = "utf-8"
 SHEET_NAME = 0
 NA_VALUES = ["NA", "N/A", "Missing", ""]
+TAMANHO_BLOCO = 50_000  # linhas por bloco na leitura em streaming
+FORMATOS_SAIDA = ["csv", "xlsx"]  # formatos padrão de salvar_dados_processados
+AMOSTRA_MEMORIA = 10_000  # linhas amostradas na estimativa rápida de memória
+INTERVALO_VERIFICACAO = 5  # segundos entre verificações de alteração nos dashboards
+MAX_PONTOS_GRAFICO = 2_000  # pontos por traço enviados aos gráficos dos dashboards
+MAX_CATEGORIAS = 12  # fatias/barras antes de agrupar o restante em "OUTROS"
+TAMANHO_PAGINA = 50  # linhas por página nas tabelas dos dashboards
+MOTORES_ARMAZEM = ["sqlite", "duckdb"]  # duckdb só se o pacote estiver instalado
 
 # ===============================
-# GARANTIR CRIAÇÃO DE PASTAS
+# SCHEMA DA PLANILHA
 # ===============================
-for path in [
-    RAW_DATA_DIR,
-    PROCESSED_DATA_DIR,
-    OUTPUTS_DIR,
-    GRAFICOS_DIR,
-    RELATORIOS_DIR,
-]:
-    path.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+ORDEM_MESES = [
+    "JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL",
+    "MAIO", "JUNHO", "JULHO", "AGOSTO",
+    "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"
+]
+COLUNA_MES = "MÊS"
+COLUNA_ANO = "ANO"
+COLUNA_DATA = "DATA"
+COLUNA_PERIODO = "PERÍODO"  # ano-mês (Period[M]) criado na carga a partir de DATA ou de MÊS + ANO
+COLUNA_ORIGEM = "ORIGEM"  # "arquivo.xlsx:aba" de cada linha, criada por carregar_multiplos
+COLUNAS_DERIVADAS = [COLUNA_ORIGEM, COLUNA_PERIODO]  # criadas na carga: fora da chave padrão das impressões
+DIMENSOES = [COLUNA_MES, "TIPO DE SERVIÇO"]
+MEDIDAS = ["PRESOS/APREENDIDOS", "VEÍCULOS RECUPERADOS"]
@@ -4,44 +4,172 @@ Script principal para processamento de dados estatísticos
 """
 
 import argparse
+import glob
 import logging
+from datetime import datetime
 from pathlib import Path
 
 from app.processador import ProcessadorDados
-from app.config import ARQUIVO_ESTATISTICAS
-
-from app.services.graficos import GraficoService
+from app.config import ARQUIVO_ESTATISTICAS, FORMATOS_SAIDA, MOTORES_ARMAZEM, PERFIS_DIR
+from app.services.exportacao import FORMATOS
+from app.services.perfil import Perfilador
+from app.services.relatorio import carregar_spec, executar_relatorio
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_sheet(valor: str):
+    """Converte o argumento --sheet: índice numérico, nome, ou 'todas' para todas as abas"""
+    if valor.lower() in ("todas", "*"):
+        return None
+    return int(valor) if valor.isdigit() else valor
+
+
 def main():
     """Função principal do programa"""
 
     # Configurar argumentos de linha de comando
     parser = argparse.ArgumentParser(description='Processa dados do arquivo Excel')
-    parser.add_argument('--arquivo', type=str, help='Caminho alternativo para o arquivo Excel')
-    parser.add_argument('--sheet', type=str, default=0, help='Nome ou índice da planilha')
-    parser.add_argument('--salvar', action='store_true', help='Salvar dados processados')
+    parser.add_argument('--arquivo', type=str,
+                        help='Caminho alternativo para o arquivo Excel, diretório ou padrão glob')
+    parser.add_argument('--sheet', type=_parse_sheet, default=0,
+                        help="Nome ou índice da planilha ('todas' para ler todas as abas)")
+    parser.add_argument('--processos', type=int, help='Número de processos para leitura de várias planilhas')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Incorpora apenas linhas novas ao histórico agregado persistido')
+    parser.add_argument('--salvar', nargs='*', choices=list(FORMATOS), metavar='FORMATO',
+                        help=f"Salvar dados processados nos formatos indicados ({', '.join(FORMATOS)}); "
+                             f"sem formatos usa {', '.join(FORMATOS_SAIDA)}")
+    parser.add_argument('--relatorio', type=Path, metavar='SPEC',
+                        help='Gera o relatório descrito em um arquivo JSON/YAML (agregações e gráficos) '
+                             'em outputs/relatorios')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Executa carregar → limpar → agregar → gráficos como pipeline em etapas, '
+                             'refazendo só as etapas desatualizadas')
+    parser.add_argument('--armazem', choices=MOTORES_ARMAZEM, metavar='MOTOR',
+                        help=f"Importa os dados em um banco local ({', '.join(MOTORES_ARMAZEM)}) e faz as "
+                             f"agregações com GROUP BY no banco")
+    parser.add_argument('--limpar-graficos', action='store_true',
+                        help='Remove PNGs de versões antigas dos gráficos e encerra')
+    parser.add_argument('--profile', nargs='?', const='', metavar='ARQUIVO',
+                        help='Mede cada etapa (tempo, CPU, linhas, memória) e grava a linha do tempo em JSONL '
+                             '(padrão: outputs/perfis/perfil_<data>.jsonl)')
+    parser.add_argument('--profile-cprofile', action='store_true',
+                        help='Com --profile, grava também o cProfile da etapa mais lenta (.prof)')
     parser.add_argument('--verbose', '-v', action='store_true', help='Modo verboso')
 
     args = parser.parse_args()
 
     # Configurar logging
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    if args.profile is None:
+        return executar(args)
+
+    with Perfilador(cprofile=args.profile_cprofile) as perfilador:
+        codigo = executar(args)
+
+    destino = Path(args.profile) if args.profile else PERFIS_DIR / f"perfil_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+    print(perfilador.resumo().to_string(index=False))
+    print(f"⏱️ Linha do tempo: {perfilador.salvar_jsonl(destino)}")
+
+    if args.profile_cprofile:
+        dump = perfilador.salvar_cprofile(destino.with_suffix(".prof"))
+        if dump is not None:
+            print(f"⏱️ cProfile de {perfilador.mais_lenta.etapa} ({perfilador.mais_lenta.wall_s:.2f}s): {dump}")
+
+    return codigo
+
+
+def executar(args: argparse.Namespace) -> int:
+    """Executa o processamento com os argumentos de linha de comando"""
+
+    if args.limpar_graficos:
+        from app.services.graficos import GraficoService
+        removidos = GraficoService().limpar_obsoletos()
+        print(f"🧹 {len(removidos)} gráfico(s) obsoleto(s) removido(s)")
+        return 0
+
+    # Validar a especificação antes de carregar os dados
+    spec = None
+    if args.relatorio:
+        try:
+            spec = carregar_spec(args.relatorio)
+        except (OSError, ValueError) as e:
+            logger.error(f"Especificação de relatório inválida: {e}")
+            return 1
 
     # Definir arquivo a ser processado
     arquivo = Path(args.arquivo) if args.arquivo else ARQUIVO_ESTATISTICAS
 
+    if args.pipeline:
+        from app.services.pipeline import pipeline_padrao
+
+        # O pipeline lê uma aba de um único arquivo (sem glob, diretório ou "todas")
+        if args.sheet is None or not arquivo.is_file():
+            logger.error(f"--pipeline exige um arquivo existente e uma única aba: {arquivo}")
+            return 1
+
+        try:
+            pipeline = pipeline_padrao(arquivo, sheet_name=args.sheet)
+            resultados = pipeline.executar(max_workers=args.processos)
+        except (OSError, ValueError) as e:
+            logger.error(f"Falha no pipeline: {e}")
+            return 1
+        print(f"🔁 Etapas executadas: {', '.join(pipeline.executadas) or 'nenhuma'}")
+        print(f"♻️ Etapas reutilizadas: {', '.join(pipeline.reutilizadas) or 'nenhuma'}")
+        for nome in ("grafico_presos", "grafico_veiculos"):
+            print(f"📊 {resultados[nome]}")
+        return 0
+
     # Inicializar processador
     processador = ProcessadorDados(arquivo)
 
+    # Vários arquivos (glob/diretório) ou todas as abas: leitura paralela
+    multiplos = args.sheet is None or (
+        args.arquivo is not None and (glob.has_magic(args.arquivo) or arquivo.is_dir())
+    )
+
     # Carregar dados
-    if not processador.carregar_dados(sheet_name=args.sheet):
+    if multiplos:
+        carregado = processador.carregar_multiplos(
+            str(arquivo), sheet_name=args.sheet, max_workers=args.processos
+        )
+    else:
+        carregado = processador.carregar_dados(sheet_name=args.sheet)
+
+    if not carregado:
         logger.error("Falha ao carregar dados. Encerrando.")
         return 1
 
+    # Agregações passam a responder pelo histórico persistido + linhas novas
+    if args.incremental:
+        try:
+            processador.atualizar_incremental()
+        except ValueError as e:
+            logger.error(f"Falha na atualização incremental: {e}")
+            return 1
+
+    # O armazém guarda só os dados carregados; com --incremental o histórico fica no cubo
+    if args.armazem:
+        if args.incremental:
+            logger.warning("--armazem ignorado com --incremental")
+        elif not processador.conectar_armazem(motor=args.armazem):
+            logger.warning("Armazém indisponível; agregações feitas em memória")
+
+    if spec is not None:
+        try:
+            manifesto = executar_relatorio(processador, spec, max_workers=args.processos)
+        except ValueError as e:
+            logger.error(f"Falha no relatório: {e}")
+            return 1
+        print(f"📑 Relatório '{manifesto['nome']}': {len(manifesto['tabelas'])} tabela(s), "
+              f"{len(manifesto['graficos'])} gráfico(s) em {sum(manifesto['tempos_s'].values()):.2f}s")
+        return 0
+
     '''
     # Limpar dados
     processador.limpar_dados()
@@ -52,36 +180,14 @@ def main():
     # Mostrar resumo
     print(processador.resumo_dados())
 
-    # Salvar se solicitado
-    if args.salvar:
-        caminho_salvo = processador.salvar_dados_processados()
-        print(f"\n✅ Dados salvos em: {caminho_salvo}")
-    
     '''
 
     ##
 
     print(processador.total_presos_por_guarnicao())
 
-    df = processador.agregar_por_coluna(
-        coluna_valor="PRESOS/APREENDIDOS",
-        colunas_grupo=["TIPO DE SERVIÇO", "MÊS"],
-        operacao="sum"
-    )
-
-    df = processador.agregar_por_coluna(
-        coluna_valor="VEÍCULOS RECUPERADOS",
-        colunas_grupo=["MÊS"],
-        operacao="mean"
-    )
-
-    df = processador.agregar_por_coluna(
-        coluna_valor="PRESOS/APREENDIDOS",
-        colunas_grupo=["TIPO DE SERVIÇO"],
-        operacao="count",
-        remover_zeros=False
-    )
-
+    # Importado só quando há gráficos a gerar
+    from app.services.graficos import GraficoService
     grafico_service = GraficoService()
 
     categorias, data_series, series_labels = \
@@ -100,38 +206,39 @@ def main():
 
 
 
-    '''
-           # VEÍCULOS RECUPERADOS
-    '''
-    df_agrupado_presos = processador.agregar_por_coluna(
-        coluna_valor="PRESOS/APREENDIDOS",
-        colunas_grupo=["TIPO DE SERVIÇO", 'MÊS'],
-        operacao="sum"
-    )
-
-    grafico_service.gerar(
-        df=df_agrupado_presos,
-        coluna_x="TIPO DE SERVIÇO",
-        coluna_y="PRESOS/APREENDIDOS",
-        titulo="Total de Presos por Tipo de Serviço"
+    # Uma única passada para as duas medidas agrupadas por serviço e mês
+    df_agrupado = processador.agregar_multiplas(
+        medidas={"PRESOS/APREENDIDOS": ["sum"], "VEÍCULOS RECUPERADOS": ["sum"]},
+        colunas_grupo=["TIPO DE SERVIÇO", 'MÊS']
     )
 
-    '''
-        # VEÍCULOS RECUPERADOS
-    '''
-    df_agrupado_veiculos = processador.agregar_por_coluna(
-        coluna_valor="VEÍCULOS RECUPERADOS",
-        colunas_grupo=["TIPO DE SERVIÇO", 'MÊS'],
-        operacao="sum"
+    # Os dois gráficos são renderizados em paralelo, sem janela (backend Agg)
+    grafico_service.gerar_lote([
+        {
+            "df": ProcessadorDados.extrair_medida(df_agrupado, "PRESOS/APREENDIDOS"),
+            "coluna_x": "TIPO DE SERVIÇO",
+            "coluna_y": "PRESOS/APREENDIDOS",
+            "titulo": "Total de Presos por Tipo de Serviço",
+        },
+        {
+            "df": ProcessadorDados.extrair_medida(df_agrupado, "VEÍCULOS RECUPERADOS"),
+            "coluna_x": "TIPO DE SERVIÇO",
+            "coluna_y": "VEÍCULOS RECUPERADOS",
+            "titulo": "Total de veículos recuperados por Tipo de Serviço",
+        },
+    ])
+    logger.info(
+        f"Gráficos: {grafico_service.renderizados} renderizado(s), {grafico_service.reutilizados} reutilizado(s)"
     )
 
-    grafico_service.gerar(
-        df=df_agrupado_veiculos,
-        coluna_x="TIPO DE SERVIÇO",
-        coluna_y="VEÍCULOS RECUPERADOS",
-        titulo="Total de veículos recuperados por Tipo de Serviço"
-    )
-    
+    # Salvar se solicitado
+    if args.salvar is not None:
+        salvos = processador.salvar_dados_processados(formatos=args.salvar or None)
+        for formato, info in salvos.items():
+            if 'erro' in info:
+                print(f"❌ {formato}: {info['erro']}")
+            else:
+                print(f"✅ {formato}: {info['caminho']} ({info['bytes'] / 1024:.1f} KB em {info['segundos']:.2f}s)")
 
     ##
 
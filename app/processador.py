@@ -1,31 +1,229 @@
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_integer_dtype
 import logging
 from pathlib import Path
-from typing import Optional, Dict, Any
-
-from app.config import ARQUIVO_ESTATISTICAS, PROCESSED_DATA_DIR, NA_VALUES
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Mapping, Union
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import (
+    ARQUIVO_ESTATISTICAS, RAW_DATA_DIR, PROCESSED_DATA_DIR, NA_VALUES, CACHE_DIR, TAMANHO_BLOCO,
+    ORDEM_MESES, ESTADO_DIR, AMOSTRA_MEMORIA, ARQUIVO_IMPRESSOES, FORMATOS_SAIDA, ARQUIVO_ARROW,
+    COLUNA_ANO, COLUNA_DATA, COLUNA_MES, COLUNA_ORIGEM, COLUNA_PERIODO, DIMENSOES
 )
+from app.services.agregacao_numpy import CodigosGrupo, agregar_codigos, suporta
+from app.services.armazem import ArmazemSQL
+from app.services.arquivo_arrow import ArquivoArrow, gravar_arrow
+from app.services.cache import CacheColunar
+from app.services.estatisticas import AcumuladorEstatisticas, EstatisticasLazy, estimar_memoria_mb
+from app.services.impressoes import (
+    calcular_impressoes, carregar_impressoes, incorporar_impressoes, ja_vistas, salvar_impressoes
+)
+from app.services.cubo import construir_cubo, consultar_cubo, pode_responder
+from app.services.exportacao import salvar_formatos
+from app.services.incremental import EstadoIncremental
+from app.services.memo import CacheLRU
+from app.services.perfil import instrumentar
+from app.services.leitura import ler_excel, ler_excel_em_blocos, ler_aba, listar_abas
+from app.services.schema import aplicar_schema, normalizar_meses, tipo_resultado_agregacao, unir_categorias
+
 logger = logging.getLogger(__name__)
 
+OPERACOES = ["sum", "mean", "count", "max", "min"]
+MOTORES_AGREGACAO = ["pandas", "numpy"]
+# Em agregar_multiplas, df.attrs[ATRIBUTO_TIPOS][medida][operacao] guarda o tipo de cada par
+ATRIBUTO_TIPOS = "tipos_valor"
 
+
+@instrumentar
 class ProcessadorDados:
     """Classe para processar dados do arquivo Excel"""
 
-    def __init__(self, path_file: Path = ARQUIVO_ESTATISTICAS):
+    def __init__(
+            self,
+            path_file: Path = ARQUIVO_ESTATISTICAS,
+            dir_cache: Optional[Path] = None,
+            tamanho_cache_agregacoes: int = 128
+    ):
+        """
+        Args:
+            path_file (Path): Arquivo Excel de origem
+            dir_cache (Path): Diretório dos snapshots colunares (padrão: CACHE_DIR)
+            tamanho_cache_agregacoes (int): Máximo de resultados de agregar_por_coluna
+                mantidos em memória; 0 desativa o cache
+        """
         self.path_file = path_file
         self.df = None
         self.estatisticas = {}
+        self.cache = CacheColunar(dir_cache or CACHE_DIR)
+        self.memoria_original = None
+        self.versao_dados = 0
+        self.cache_agregacoes = CacheLRU(tamanho_cache_agregacoes)
+        self.cubo = None
+        self.resumo_incremental = None
+        self.duplicatas_removidas = 0
+        self.armazem = None
+        self._versao_armazem = None
+        self.arrow = None
+        self.codigos_grupo = CacheLRU(8)
+
+    def registrar_alteracao(self) -> None:
+        """
+        Registra uma alteração em self.df, invalidando resultados em cache
+
+        Quem alterar self.df diretamente, fora dos métodos da classe, deve chamar este método.
+        """
+        self.versao_dados += 1
+        self.cache_agregacoes.limpar()
+        self.codigos_grupo.limpar()
+        self.cubo = None
+        self.resumo_incremental = None
+
+    def conectar_armazem(self, caminho: Optional[Path] = None, motor: str = "sqlite", importar: bool = True) -> bool:
+        """
+        Liga o armazém SQL local: agregar_por_coluna e preparar_dados_barras_por_mes
+        passam a ser respondidos com GROUP BY no banco
+
+        Args:
+            caminho (Path): Arquivo do banco (padrão: ARQUIVO_ARMAZEM.<motor>)
+            motor (str): 'sqlite' ou 'duckdb' (se instalado)
+            importar (bool): Grava self.df no armazém, substituindo o conteúdo;
+                False apenas abre um armazém já importado (self.df pode ficar None)
+
+        Returns:
+            bool: True se o armazém ficou disponível
+        """
+        # Fecha a conexão anterior antes de abrir outra (o DuckDB não abre o
+        # mesmo arquivo duas vezes no processo); se a nova falhar, fica sem armazém
+        if self.armazem is not None:
+            self.armazem.fechar()
+            self.armazem = None
+            self._versao_armazem = None
+            self.cache_agregacoes.limpar()
+
+        try:
+            armazem = ArmazemSQL(caminho, motor)
+
+            if importar:
+                if self.df is None:
+                    raise ValueError("Dados não carregados. Execute carregar_dados() primeiro.")
+                armazem.importar(self.df)
+            elif not armazem.colunas:
+                raise ValueError(f"Armazém vazio: {armazem.caminho}")
+
+            self.armazem = armazem
+            self._versao_armazem = self.versao_dados
+            self.cache_agregacoes.limpar()
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao conectar o armazém: {e}")
+            return False
+
+    def _armazem_atual(self) -> Optional[ArmazemSQL]:
+        """Armazém com o mesmo conteúdo de self.df (depois de alterar self.df, é preciso reimportar)"""
+        if self.armazem is not None and self._versao_armazem == self.versao_dados:
+            return self.armazem
+        return None
+
+    def salvar_arrow(self, caminho: Optional[Path] = None) -> Path:
+        """
+        Grava self.df em Arrow IPC sem compressão, para ser aberto por carregar_arrow
+
+        Args:
+            caminho (Path): Arquivo de destino (padrão: ARQUIVO_ARROW)
+
+        Returns:
+            Path: Caminho gravado
+        """
+        if self.df is None:
+            raise ValueError("Dados não carregados")
+        return gravar_arrow(self.df, caminho or ARQUIVO_ARROW)
 
-    def carregar_dados(self, **kwargs) -> bool:
+    def carregar_arrow(self, caminho: Optional[Path] = None, materializar_cubo: bool = True) -> bool:
+        """
+        Passa a ler os dados de um arquivo Arrow mapeado em memória (modo Arrow)
+
+        self.df fica None: agregar_por_coluna, agregar_multiplas,
+        preparar_dados_barras_por_mes e serie_temporal leem do arquivo só as
+        colunas de cada consulta. Processos que abrem o mesmo arquivo
+        compartilham o page cache em vez de manter cada um o seu DataFrame.
+
+        Args:
+            caminho (Path): Arquivo gravado por salvar_arrow (padrão: ARQUIVO_ARROW)
+            materializar_cubo (bool): Constrói o cubo MÊS × TIPO DE SERVIÇO a
+                partir das dimensões e medidas numéricas do arquivo, como limpar_dados
+
+        Returns:
+            bool: True se o arquivo foi aberto
+        """
+        try:
+            self.arrow = ArquivoArrow(caminho or ARQUIVO_ARROW)
+            self.df = None
+            self.registrar_alteracao()
+            logger.info(f"Modo Arrow: {self.arrow.linhas} linhas em {self.arrow.caminho}")
+
+            if materializar_cubo:
+                # Só as colunas do cubo são lidas, uma vez; o DataFrame lido é descartado
+                dimensoes = [c for c in DIMENSOES if c in self.arrow.colunas]
+                medidas = [c for c in self.arrow.colunas_numericas if c not in dimensoes]
+                self.cubo = construir_cubo(self.arrow.ler([*dimensoes, *medidas]))
+                if self.cubo is not None:
+                    logger.info(f"Cubo materializado: {len(self.cubo)} células")
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao abrir o arquivo Arrow: {e}")
+            return False
+
+    def _colunas_disponiveis(self) -> List[str]:
+        if self.df is not None:
+            return list(self.df.columns)
+        if self.arrow is not None:
+            return self.arrow.colunas
+        armazem = self._armazem_atual()
+        return armazem.colunas if armazem is not None else []
+
+    def contar_linhas(self) -> int:
+        """Linhas da fonte ativa: o histórico incremental, self.df, o arquivo Arrow ou o armazém (0 sem dados)"""
+        if self.resumo_incremental is not None:
+            return self.resumo_incremental['total_linhas']
+        if self.df is not None:
+            return len(self.df)
+        if self.arrow is not None:
+            return self.arrow.linhas
+        armazem = self._armazem_atual()
+        return armazem.linhas if armazem is not None else 0
+
+    def _ler_colunas(self, colunas: List[str]) -> pd.DataFrame:
+        """Colunas de self.df ou, no modo Arrow, lidas do arquivo mapeado"""
+        colunas = list(dict.fromkeys(colunas))
+        if self.df is not None:
+            return self.df[colunas]
+        if self.arrow is not None:
+            return self.arrow.ler(colunas)
+        raise ValueError("Dados não carregados")
+
+    def _aplicar_schema(self) -> None:
+        """Aplica o schema compacto a self.df, registrando a memória antes e depois"""
+        self.memoria_original = estimar_memoria_mb(self.df, AMOSTRA_MEMORIA)  # MB
+        aplicar_schema(self.df)
+        memoria_final = estimar_memoria_mb(self.df, AMOSTRA_MEMORIA)
+        logger.info(f"Schema aplicado: memória {self.memoria_original:.2f} MB -> {memoria_final:.2f} MB")
+
+    def carregar_dados(self, usar_cache: bool = True, aplicar_tipos: bool = True, **kwargs) -> bool:
         """
         Carrega dados do arquivo Excel
 
+        Na primeira leitura grava um snapshot Parquet em CACHE_DIR; as leituras
+        seguintes usam o snapshot enquanto arquivo, aba e NA_VALUES não mudarem.
+
         Args:
+            usar_cache (bool): Usa o snapshot colunar quando disponível
+            aplicar_tipos (bool): Converte dimensões em categóricas e medidas em inteiros compactos
             **kwargs: Parâmetros adicionais para pd.read_excel
 
         Returns:
@@ -44,7 +242,12 @@ class ProcessadorDados:
                 **kwargs
             }
 
-            self.df = pd.read_excel(self.path_file, **params)
+            self.df = ler_excel(self.path_file, params, self.cache if usar_cache else None)
+
+            if aplicar_tipos:
+                self._aplicar_schema()
+
+            self.registrar_alteracao()
 
             logger.info(f"Dados carregados: {self.df.shape[0]} linhas, {self.df.shape[1]} colunas")
             #logger.info(f"Colunas: {list(self.df.columns)}")
@@ -55,8 +258,201 @@ class ProcessadorDados:
             logger.error(f"Erro ao carregar dados: {e}")
             return False
 
-    def limpar_dados(self) -> None:
-        """Limpa e prepara os dados"""
+    @staticmethod
+    def _resolver_arquivos(padrao: Optional[str]) -> List[Path]:
+        """Resolve um caminho ou padrão glob (relativo ao diretório atual ou a RAW_DATA_DIR)"""
+        if padrao is None:
+            return sorted(RAW_DATA_DIR.glob("*.xlsx"))
+
+        caminho = Path(padrao)
+        if caminho.is_file():
+            return [caminho]
+        if caminho.is_dir():
+            return sorted(caminho.glob("*.xlsx"))
+
+        arquivos = sorted(Path(p) for p in glob.glob(padrao, recursive=True))
+        if not arquivos and not caminho.is_absolute():
+            arquivos = sorted(RAW_DATA_DIR.glob(padrao))
+
+        # Ignora arquivos temporários de bloqueio do Excel (~$arquivo.xlsx)
+        return [a for a in arquivos if a.is_file() and not a.name.startswith("~$")]
+
+    def carregar_multiplos(
+            self,
+            padrao: Optional[str] = None,
+            sheet_name: Union[int, str, None] = 0,
+            max_workers: Optional[int] = None,
+            coluna_origem: str = COLUNA_ORIGEM,
+            usar_cache: bool = True,
+            aplicar_tipos: bool = True
+    ) -> bool:
+        """
+        Carrega várias planilhas e/ou abas em paralelo em um único DataFrame
+
+        Cada aba é lida em um processo separado; os nomes de colunas são
+        normalizados, as colunas ausentes em alguma aba ficam nulas e cada
+        linha recebe a origem ("arquivo.xlsx:aba") em `coluna_origem`.
+
+        Args:
+            padrao (str): Arquivo, diretório ou padrão glob (padrão: RAW_DATA_DIR/*.xlsx)
+            sheet_name (int | str | None): Aba a ler em cada arquivo; None lê todas
+            max_workers (int): Número de processos (padrão: núcleos disponíveis)
+            coluna_origem (str): Nome da coluna com a origem de cada linha
+            usar_cache (bool): Usa o snapshot colunar de cada aba
+            aplicar_tipos (bool): Converte dimensões em categóricas e medidas em inteiros compactos
+
+        Returns:
+            bool: True se carregou com sucesso
+        """
+        try:
+            arquivos = self._resolver_arquivos(padrao)
+            if not arquivos:
+                raise FileNotFoundError(f"Nenhum arquivo encontrado para: {padrao or RAW_DATA_DIR}")
+
+            dir_cache = self.cache.diretorio if usar_cache else None
+            tarefas = [
+                (arquivo, aba, NA_VALUES, dir_cache)
+                for arquivo in arquivos
+                for aba in (listar_abas(arquivo) if sheet_name is None else [sheet_name])
+            ]
+
+            logger.info(f"Carregando {len(tarefas)} aba(s) de {len(arquivos)} arquivo(s)")
+
+            inicio = time.perf_counter()
+            processos = min(len(tarefas), max_workers or os.cpu_count() or 1)
+            if processos > 1:
+                with ProcessPoolExecutor(max_workers=processos) as executor:
+                    resultados = list(executor.map(ler_aba, tarefas))
+            else:
+                resultados = [ler_aba(tarefa) for tarefa in tarefas]
+            tempo_total = time.perf_counter() - inicio
+
+            frames = [df for df, _ in resultados]
+            tamanhos = [len(df) for df in frames]
+            origens = pd.Index([f"{arquivo.name}:{aba}" for arquivo, aba, _, _ in tarefas])
+            categorias = origens.unique()
+
+            # Concatena uma única vez e monta a origem como categórica, sem copiar cada aba
+            self.df = pd.concat(frames, ignore_index=True, sort=False)
+            self.df[coluna_origem] = pd.Categorical.from_codes(
+                np.repeat(categorias.get_indexer(origens), tamanhos),
+                categories=categorias
+            )
+
+            if aplicar_tipos:
+                self._aplicar_schema()
+
+            self.registrar_alteracao()
+
+            tempo_sequencial = sum(tempo for _, tempo in resultados)
+            logger.info(
+                f"Dados carregados: {self.df.shape[0]} linhas, {self.df.shape[1]} colunas "
+                f"em {tempo_total:.2f}s com {processos} processo(s) "
+                f"(soma das leituras: {tempo_sequencial:.2f}s, speed-up: {tempo_sequencial / tempo_total:.2f}x)"
+            )
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Erro ao carregar dados: {e}")
+            return False
+
+    def carregar_em_blocos(
+            self,
+            tamanho_bloco: int = TAMANHO_BLOCO,
+            sheet_name: Union[int, str] = 0,
+            aplicar_tipos: bool = True
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Lê o arquivo Excel em blocos, sem carregar a planilha inteira em memória
+
+        Os blocos podem ser passados para limpar_dados, calcular_estatisticas e
+        agregar_por_coluna pelo argumento `blocos`. O gerador só pode ser
+        consumido uma vez.
+
+        Args:
+            tamanho_bloco (int): Número máximo de linhas por bloco
+            sheet_name (int | str): Índice ou nome da aba
+            aplicar_tipos (bool): Aplica o schema compacto a cada bloco
+
+        Yields:
+            pd.DataFrame: Bloco de linhas
+        """
+        if not self.path_file.exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {self.path_file}")
+
+        logger.info(f"Lendo arquivo em blocos de {tamanho_bloco} linhas: {self.path_file}")
+
+        blocos = ler_excel_em_blocos(
+            self.path_file,
+            sheet_name=sheet_name,
+            tamanho_bloco=tamanho_bloco,
+            na_values=NA_VALUES
+        )
+
+        if aplicar_tipos:
+            return map(aplicar_schema, blocos)
+
+        return blocos
+
+    @staticmethod
+    def _limpar_blocos(
+            blocos: Iterable[pd.DataFrame],
+            colunas_chave: Optional[List[str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Versão em streaming de limpar_dados (duplicatas detectadas por hash entre blocos)
+
+        As impressões já vistas ficam em um array uint64 ordenado (8 bytes por
+        linha mantida), consultado por busca binária.
+        """
+        vistos = np.empty(0, dtype=np.uint64)
+        total = 0
+
+        for bloco in blocos:
+            bloco = bloco.dropna(how='all')
+
+            impressoes = calcular_impressoes(bloco, colunas_chave)
+            manter = ~pd.Series(impressoes).duplicated().to_numpy()
+            manter &= ~ja_vistas(impressoes, vistos)
+            vistos = incorporar_impressoes(vistos, impressoes[manter])
+
+            bloco = bloco[manter]
+            total += len(bloco)
+            yield bloco
+
+        logger.info(f"Limpeza concluída: {total} linhas restantes")
+
+    def limpar_dados(
+            self,
+            blocos: Optional[Iterable[pd.DataFrame]] = None,
+            materializar_cubo: bool = True,
+            colunas_chave: Optional[List[str]] = None,
+            persistir_impressoes: bool = False,
+            arquivo_impressoes: Optional[Path] = None
+    ) -> Optional[Iterator[pd.DataFrame]]:
+        """
+        Limpa e prepara os dados
+
+        Duplicatas são detectadas por hash de 64 bits de cada linha (ou das
+        colunas_chave); o total removido fica em self.duplicatas_removidas.
+
+        Args:
+            blocos (Iterable): Blocos de carregar_em_blocos; se informado, retorna
+                um gerador de blocos limpos em vez de alterar self.df.
+                Colunas totalmente vazias não são removidas nesse modo.
+            materializar_cubo (bool): Constrói o cubo MÊS × TIPO DE SERVIÇO usado
+                por agregar_por_coluna para responder sem varrer as linhas
+            colunas_chave (list): Colunas que identificam uma linha (padrão: todas,
+                exceto as criadas na carga: ORIGEM e PERÍODO)
+            persistir_impressoes (bool): Remove também as linhas já vistas em
+                limpezas anteriores (re-importações e a mesma linha em outra
+                planilha) e grava as impressões das linhas mantidas
+            arquivo_impressoes (Path): Arquivo das impressões (padrão: ARQUIVO_IMPRESSOES)
+        """
+        if blocos is not None:
+            return self._limpar_blocos(blocos, colunas_chave)
+
         if self.df is None:
             raise ValueError("Dados não carregados. Execute carregar_dados() primeiro.")
 
@@ -73,11 +469,78 @@ class ProcessadorDados:
         # #self.df.columns = [self._padronizar_nome_coluna(col) for col in self.df.columns]
         self.df.columns = [col for col in self.df.columns]
 
-        # Remover duplicatas
-        self.df.drop_duplicates(inplace=True)
+        # Remover duplicatas por hash das linhas
+        impressoes = calcular_impressoes(self.df, colunas_chave)
+        duplicadas = pd.Series(impressoes).duplicated().to_numpy(copy=True)
+
+        if persistir_impressoes:
+            arquivo_impressoes = arquivo_impressoes or ARQUIVO_IMPRESSOES
+            conhecidas = carregar_impressoes(arquivo_impressoes)
+            duplicadas |= ja_vistas(impressoes, conhecidas)
+
+        self.duplicatas_removidas = int(duplicadas.sum())
+        if self.duplicatas_removidas:
+            self.df = self.df.loc[~duplicadas]
+
+        if persistir_impressoes:
+            salvar_impressoes(arquivo_impressoes, incorporar_impressoes(conhecidas, impressoes[~duplicadas]))
+
+        logger.info(f"Duplicatas removidas: {self.duplicatas_removidas}")
+
+        self.registrar_alteracao()
 
         logger.info(f"Limpeza concluída: {self.df.shape[0]} linhas restantes")
 
+        if materializar_cubo:
+            self.cubo = construir_cubo(self.df)
+            if self.cubo is not None:
+                logger.info(f"Cubo materializado: {len(self.cubo)} células")
+
+    def atualizar_incremental(
+            self,
+            diretorio_estado: Optional[Path] = None,
+            colunas_chave: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """
+        Incorpora ao estado persistido apenas as linhas ainda não vistas
+
+        O estado (cubo de somas/contagens/mínimos/máximos e impressões das
+        linhas) fica em `diretorio_estado`. Depois da atualização, self.cubo
+        passa a ser o cubo de todo o histórico e o processador fica em modo
+        incremental (self.resumo_incremental) até a próxima alteração de
+        self.df: agregar_por_coluna, agregar_multiplas e
+        preparar_dados_barras_por_mes respondem pelo cubo (MÊS × TIPO DE
+        SERVIÇO), e consultas fora dele levantam ValueError em vez de
+        responder só com as linhas carregadas.
+
+        Uso típico: carregar_dados() da planilha do mês e atualizar_incremental().
+
+        Args:
+            diretorio_estado (Path): Diretório do estado (padrão: ESTADO_DIR)
+            colunas_chave (list): Colunas que identificam uma linha (padrão: todas,
+                exceto ORIGEM e PERÍODO); devem ser as mesmas em todas as atualizações
+
+        Returns:
+            dict: linhas_novas, linhas_ignoradas e total_linhas do histórico
+        """
+        if self.df is None:
+            raise ValueError("Dados não carregados. Execute carregar_dados() primeiro.")
+
+        estado = EstadoIncremental(diretorio_estado or ESTADO_DIR).carregar()
+        resumo = estado.incorporar(self.df.dropna(how='all'), colunas_chave)
+        estado.salvar()
+
+        self.registrar_alteracao()
+        self.cubo = estado.cubo
+        self.resumo_incremental = resumo
+
+        logger.info(
+            f"Atualização incremental: {resumo['linhas_novas']} linhas novas, "
+            f"{resumo['linhas_ignoradas']} já vistas, {resumo['total_linhas']} no histórico"
+        )
+
+        return resumo
+
     '''
     
     def _padronizar_nome_coluna(self, nome: str) -> str:
@@ -98,49 +561,78 @@ class ProcessadorDados:
                 .replace('ú', 'u'))
     '''
 
-    def calcular_estatisticas(self) -> Dict[str, Any]:
-        """Calcula estatísticas básicas dos dados"""
+    def calcular_estatisticas(
+            self,
+            blocos: Optional[Iterable[pd.DataFrame]] = None,
+            rapido: bool = False
+    ) -> Mapping[str, Any]:
+        """
+        Calcula estatísticas básicas dos dados
+
+        Sobre self.df, as estatísticas são calculadas sob demanda: cada chave
+        é calculada no primeiro acesso (veja EstatisticasLazy).
+
+        Args:
+            blocos (Iterable): Blocos de carregar_em_blocos; se informado, as
+                estatísticas são acumuladas bloco a bloco em vez de usar self.df
+            rapido (bool): Estima a memória de colunas de texto por amostragem
+                (AMOSTRA_MEMORIA linhas) em vez de percorrer todos os valores
+        """
+        if blocos is not None:
+            logger.info("Calculando estatísticas em blocos...")
+            acumulador = AcumuladorEstatisticas()
+            for bloco in blocos:
+                acumulador.adicionar(bloco)
+            self.estatisticas = acumulador.resultado()
+            return self.estatisticas
+
         if self.df is None:
             raise ValueError("Dados não carregados")
 
         logger.info("Calculando estatísticas...")
 
-        self.estatisticas = {
-            'total_linhas': len(self.df),
-            'total_colunas': len(self.df.columns),
-            'colunas': list(self.df.columns),
-            'tipos_dados': self.df.dtypes.to_dict(),
-            'valores_ausentes': self.df.isnull().sum().to_dict(),
-            'percentual_ausentes': (self.df.isnull().sum() / len(self.df) * 100).to_dict(),
-            'memoria_uso': self.df.memory_usage(deep=True).sum() / 1024 ** 2  # MB
-        }
-
-        # Estatísticas para colunas numéricas
-        colunas_numericas = self.df.select_dtypes(include=['number']).columns
-        if len(colunas_numericas) > 0:
-            self.estatisticas['estatisticas_numericas'] = self.df[colunas_numericas].describe().to_dict()
+        self.estatisticas = EstatisticasLazy(
+            self.df,
+            memoria_original=self.memoria_original,
+            amostra_memoria=AMOSTRA_MEMORIA if rapido else None
+        )
 
         return self.estatisticas
 
-    def salvar_dados_processados(self, nome_arquivo: Optional[str] = None) -> Path:
-        """Salva dados processados em diferentes formatos"""
+    def salvar_dados_processados(
+            self,
+            nome_arquivo: Optional[str] = None,
+            formatos: Optional[List[str]] = None,
+            max_workers: Optional[int] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Salva dados processados em diferentes formatos
+
+        Os formatos são gravados ao mesmo tempo em um pool de threads.
+
+        Args:
+            nome_arquivo (str): Nome base dos arquivos (padrão: com data e hora)
+            formatos (list): 'csv', 'csv.gz', 'csv.zst' (com zstandard), 'parquet',
+                'feather' e/ou 'xlsx' (padrão: FORMATOS_SAIDA)
+            max_workers (int): Número de threads (padrão: um por formato)
+
+        Returns:
+            dict: Formato → {'caminho', 'segundos', 'bytes'}, ou {'caminho', 'erro'}
+                para o formato que falhou
+        """
         if self.df is None:
             raise ValueError("Dados não carregados")
 
         if nome_arquivo is None:
             nome_arquivo = f"dados_processados_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}"
 
-        # Salvar como CSV
-        csv_path = PROCESSED_DATA_DIR / f"{nome_arquivo}.csv"
-        self.df.to_csv(csv_path, index=False, encoding='utf-8-sig')
-        logger.info(f"Dados salvos em: {csv_path}")
-
-        # Salvar como Excel
-        excel_path = PROCESSED_DATA_DIR / f"{nome_arquivo}.xlsx"
-        self.df.to_excel(excel_path, index=False)
-        logger.info(f"Dados salvos em: {excel_path}")
-
-        return csv_path
+        return salvar_formatos(
+            self.df,
+            PROCESSED_DATA_DIR,
+            nome_arquivo,
+            formatos or FORMATOS_SAIDA,
+            max_workers=max_workers
+        )
 
     def resumo_dados(self) -> str:
         """Gera um resumo dos dados"""
@@ -161,10 +653,13 @@ class ProcessadorDados:
 
 💾 MEMÓRIA:
   • Uso: {self.estatisticas['memoria_uso']:.2f} MB
-
-🔍 VALORES AUSENTES:
 """
 
+        if self.estatisticas.get('memoria_uso_original') is not None:
+            resumo += f"  • Antes do schema compacto: {self.estatisticas['memoria_uso_original']:.2f} MB\n"
+
+        resumo += "\n🔍 VALORES AUSENTES:\n"
+
         for col, total in self.estatisticas['valores_ausentes'].items():
             if total > 0:
                 percentual = self.estatisticas['percentual_ausentes'][col]
@@ -181,29 +676,14 @@ class ProcessadorDados:
 
     def total_presos_por_guarnicao(self):
 
-        if self.df is None:
+        if self.df is None and self.arrow is None:
             raise ValueError("Execute carregar_dados() antes de processar.")
 
-        df = self.df.copy()
-
-        df['PRESOS/APREENDIDOS'] = pd.to_numeric(
-            df['PRESOS/APREENDIDOS'],
-            errors='coerce'
+        return self.agregar_por_coluna(
+            coluna_valor='PRESOS/APREENDIDOS',
+            colunas_grupo=['TIPO DE SERVIÇO', 'MÊS'],
+            operacao='sum'
         )
-
-        df_filtrado = df[
-            (df['PRESOS/APREENDIDOS'].notna()) &
-            (df['PRESOS/APREENDIDOS'] != 0)
-            ]
-
-        resultado = (
-            df_filtrado
-            .groupby(['TIPO DE SERVIÇO', 'MÊS'])['PRESOS/APREENDIDOS']
-            .sum()
-            .reset_index()
-        )
-
-        return resultado
     #####################
 
     def agregar_por_coluna(
@@ -212,7 +692,9 @@ class ProcessadorDados:
             colunas_grupo: list,
             operacao: str = "sum",
             remover_zeros: bool = True,
-            remover_nulos: bool = True
+            remover_nulos: bool = True,
+            blocos: Optional[Iterable[pd.DataFrame]] = None,
+            engine: str = "pandas"
     ) -> pd.DataFrame:
         """
         Agrega uma coluna numérica por grupos definidos.
@@ -223,84 +705,430 @@ class ProcessadorDados:
             operacao (str): Operação de agregação ('sum', 'mean', 'count', 'max', 'min')
             remover_zeros (bool): Remove valores zerados antes da agregação
             remover_nulos (bool): Remove valores nulos antes da agregação
+            blocos (Iterable): Blocos de carregar_em_blocos; se informado, agrega
+                parcialmente cada bloco e combina os parciais no final
+            engine (str): Motor da varredura das linhas, quando a consulta não é
+                respondida pelo armazém nem pelo cubo: 'pandas' (groupby) ou
+                'numpy' (códigos de grupo em cache + bincount; medidas fracionárias
+                seguem pelo pandas). Os dois produzem o mesmo resultado.
 
         Returns:
-            pd.DataFrame: DataFrame agregado
+            pd.DataFrame: DataFrame agregado. Resultados repetidos vêm do cache de
+                agregações como cópias Copy-on-Write: alterá-los não afeta o cache.
         """
 
-        if self.df is None:
+        if blocos is not None:
+            return self._agregar_blocos(
+                blocos, coluna_valor, colunas_grupo, operacao, remover_zeros, remover_nulos
+            )
+
+        if self.df is None and self.arrow is None and self._armazem_atual() is None:
             raise ValueError("Dados não carregados")
 
-        if coluna_valor not in self.df.columns:
+        if coluna_valor not in self._colunas_disponiveis():
             raise ValueError(f"Coluna '{coluna_valor}' não encontrada")
 
-        # Garantir tipo numérico
-        df_filtrado = self.df.copy()
+        if operacao not in OPERACOES:
+            raise ValueError("Operação inválida")
+
+        if engine not in MOTORES_AGREGACAO:
+            raise ValueError(f"Motor de agregação inválido: {engine}")
+
+        if isinstance(colunas_grupo, str):
+            colunas_grupo = [colunas_grupo]
+
+        chave = (coluna_valor, tuple(colunas_grupo), operacao, remover_zeros, remover_nulos, self.versao_dados)
+        resultado = self.cache_agregacoes.obter(chave)
+        if resultado is not None:
+            return resultado.copy(deep=False)
+
+        armazem = self._armazem_atual()
+        if armazem is not None and armazem.pode_responder(coluna_valor, colunas_grupo):
+            # GROUP BY no banco: só o resultado agregado volta para o Python
+            resultado = armazem.agregar(
+                coluna_valor, colunas_grupo, operacao, remover_zeros, remover_nulos
+            )
+        elif self.df is None and self.arrow is None:
+            raise ValueError(f"Agregação de '{coluna_valor}' não disponível no armazém")
+        elif pode_responder(self.cubo, coluna_valor, colunas_grupo):
+            # Roll-up do cubo materializado: custo proporcional ao número de células
+            resultado = consultar_cubo(
+                self.cubo, coluna_valor, colunas_grupo, operacao, remover_zeros, remover_nulos
+            )
+        elif self.resumo_incremental is not None:
+            # self.df tem só as linhas carregadas agora; o histórico existe apenas no cubo
+            raise ValueError(
+                f"Modo incremental: '{coluna_valor}' por {', '.join(colunas_grupo)} "
+                f"não pode ser respondida pelo cubo do histórico"
+            )
+        else:
+            # Garantir tipo numérico e filtrar por máscara, sem copiar o DataFrame inteiro;
+            # no modo Arrow, só as colunas da consulta são lidas do arquivo
+            valores = pd.to_numeric(self._ler_colunas([coluna_valor])[coluna_valor], errors="coerce")
+            mascara = self._mascara_valores(valores, remover_zeros, remover_nulos)
+
+            if engine == "numpy" and suporta(valores):
+                resultado = agregar_codigos(
+                    self._codigos(colunas_grupo), valores, mascara, coluna_valor, operacao
+                )
+            else:
+                grupos = self._ler_colunas(colunas_grupo)
+                resultado = (
+                    valores[mascara]
+                    .groupby([grupos.loc[mascara, coluna] for coluna in colunas_grupo])
+                    .agg(operacao)
+                    .rename(coluna_valor)
+                    .reset_index()
+                )
+
+        self.cache_agregacoes.guardar(chave, resultado)
+
+        return resultado.copy(deep=False)
+
+    def _codigos(self, colunas_grupo: List[str]) -> CodigosGrupo:
+        """Códigos de grupo das colunas, reaproveitados enquanto self.df não mudar"""
+        chave = (tuple(colunas_grupo), self.versao_dados)
+        codigos = self.codigos_grupo.obter(chave)
+        if codigos is None:
+            codigos = CodigosGrupo(self._ler_colunas(colunas_grupo), colunas_grupo)
+            self.codigos_grupo.guardar(chave, codigos)
+        return codigos
+
+    def agregar_multiplas(
+            self,
+            medidas: Dict[str, List[str]],
+            colunas_grupo: list,
+            remover_zeros: bool = True,
+            remover_nulos: bool = True
+    ) -> pd.DataFrame:
+        """
+        Agrega várias medidas e operações com um único groupby
+
+        Cada medida é convertida para número uma vez e filtrada por máscara;
+        o resultado equivale a chamar agregar_por_coluna para cada par
+        (medida, operação), mas percorre os dados uma única vez.
 
-        df_filtrado[coluna_valor] = pd.to_numeric(
-            df_filtrado[coluna_valor],
-            errors="coerce"
+        Args:
+            medidas (dict): Medida → lista de operações ('sum', 'mean', 'count', 'max', 'min')
+            colunas_grupo (list): Lista de colunas para agrupamento
+            remover_zeros (bool): Remove valores zerados antes da agregação
+            remover_nulos (bool): Remove valores nulos antes da agregação
+
+        Returns:
+            pd.DataFrame: Formato longo com as colunas de grupo, 'medida', 'operacao' e 'valor'
+        """
+        if self.df is None and self.arrow is None and self._armazem_atual() is None:
+            raise ValueError("Dados não carregados")
+
+        if isinstance(colunas_grupo, str):
+            colunas_grupo = [colunas_grupo]
+
+        for medida, operacoes in medidas.items():
+            if medida not in self._colunas_disponiveis():
+                raise ValueError(f"Coluna '{medida}' não encontrada")
+            if not operacoes or any(op not in OPERACOES for op in operacoes):
+                raise ValueError(f"Operação inválida para '{medida}'")
+
+        # Só o armazém (sem linhas para percorrer) ou modo incremental (o histórico
+        # está no cubo): cada par é respondido por agregar_por_coluna
+        if (self.df is None and self.arrow is None) or self.resumo_incremental is not None:
+            return self._agregar_pares(medidas, colunas_grupo, remover_zeros, remover_nulos)
+
+        dados = self._ler_colunas([*medidas, *colunas_grupo])
+        colunas = {}
+        especificacao = {}
+        for medida, operacoes in medidas.items():
+            valores = pd.to_numeric(dados[medida], errors="coerce")
+            mascara = self._mascara_valores(valores, remover_zeros, remover_nulos)
+
+            # Valores fora da máscara viram nulos e são ignorados pelas operações;
+            # a coluna de presença indica se o grupo tem alguma linha válida
+            colunas[medida] = valores.where(mascara)
+            colunas[f"__presente__{medida}"] = mascara
+            especificacao[medida] = list(operacoes)
+            especificacao[f"__presente__{medida}"] = ["any"]
+
+        agregado = (
+            pd.DataFrame(colunas, index=dados.index)
+            .groupby([dados[coluna] for coluna in colunas_grupo])
+            .agg(especificacao)
         )
 
-        df_filtrado = self.df.copy()
+        partes = []
+        tipos = {}
+        for medida, operacoes in medidas.items():
+            presentes = agregado[(f"__presente__{medida}", "any")].to_numpy(dtype=bool)
+            tipos[medida] = {op: agregado[(medida, op)].dtype for op in operacoes}
+            parte = (
+                agregado.loc[presentes, medida]
+                .melt(var_name="operacao", value_name="valor", ignore_index=False)
+            )
+            parte.insert(0, "medida", medida)
+            partes.append(parte)
+
+        resultado = pd.concat(partes).reset_index()
+        resultado.attrs[ATRIBUTO_TIPOS] = tipos
+        return resultado
 
-        if remover_nulos:
-            df_filtrado = df_filtrado[df_filtrado[coluna_valor].notna()]
+    def _agregar_pares(
+            self,
+            medidas: Dict[str, List[str]],
+            colunas_grupo: list,
+            remover_zeros: bool,
+            remover_nulos: bool
+    ) -> pd.DataFrame:
+        """agregar_multiplas com uma chamada a agregar_por_coluna por (medida, operação)"""
+        partes = []
+        tipos = {}
+        for medida, operacoes in medidas.items():
+            for operacao in operacoes:
+                parte = self.agregar_por_coluna(
+                    medida, colunas_grupo, operacao,
+                    remover_zeros=remover_zeros, remover_nulos=remover_nulos
+                ).rename(columns={medida: "valor"})
+                parte.insert(len(colunas_grupo), "medida", medida)
+                parte.insert(len(colunas_grupo) + 1, "operacao", operacao)
+                tipos.setdefault(medida, {})[operacao] = parte["valor"].dtype
+                partes.append(parte)
+
+        resultado = pd.concat(partes, ignore_index=True)
+        resultado.attrs[ATRIBUTO_TIPOS] = tipos
+        return resultado
+
+    @staticmethod
+    def extrair_medida(df_longo: pd.DataFrame, medida: str, operacao: str = "sum") -> pd.DataFrame:
+        """
+        Extrai uma medida do resultado de agregar_multiplas no formato de agregar_por_coluna
+
+        A coluna 'valor' do formato longo tem um tipo comum a todas as operações
+        (max/min de inteiros ao lado de mean viram Float64); a medida extraída
+        volta ao tipo que agregar_por_coluna daria para a operação.
 
+        Args:
+            df_longo (pd.DataFrame): Resultado de agregar_multiplas
+            medida (str): Medida extraída
+            operacao (str): Operação extraída
+
+        Returns:
+            pd.DataFrame: Colunas de grupo e a medida
+        """
+        resultado = (
+            df_longo[(df_longo["medida"] == medida) & (df_longo["operacao"] == operacao)]
+            .drop(columns=["medida", "operacao"])
+            .rename(columns={"valor": medida})
+            .reset_index(drop=True)
+        )
+        tipo = df_longo.attrs.get(ATRIBUTO_TIPOS, {}).get(medida, {}).get(operacao)
+        if tipo is not None:
+            resultado = resultado.astype({medida: tipo})
+        resultado.attrs.pop(ATRIBUTO_TIPOS, None)
+        return resultado
+
+    @staticmethod
+    def _mascara_valores(valores: pd.Series, remover_zeros: bool, remover_nulos: bool) -> np.ndarray:
+        """Máscara das linhas válidas para agregação (nulos não contam como zero)"""
+        mascara = np.ones(len(valores), dtype=bool)
+        if remover_nulos:
+            mascara &= valores.notna().to_numpy()
         if remover_zeros:
-            df_filtrado = df_filtrado[df_filtrado[coluna_valor] != 0]
+            mascara &= (valores != 0).fillna(True).to_numpy(dtype=bool)
+        return mascara
+
+    @staticmethod
+    def _agregar_blocos(
+            blocos: Iterable[pd.DataFrame],
+            coluna_valor: str,
+            colunas_grupo: list,
+            operacao: str,
+            remover_zeros: bool,
+            remover_nulos: bool
+    ) -> pd.DataFrame:
+        """
+        Agrega bloco a bloco com parciais combináveis (soma, contagem, mínimo, máximo)
 
-        if operacao not in ["sum", "mean", "count", "max", "min"]:
+        Cada bloco tem as suas categorias e o seu menor inteiro: os parciais são
+        agrupados pelos valores e, no final, as chaves voltam a ser categóricas
+        com a união das categorias (unir_categorias) e a medida volta ao tipo
+        que o groupby daria sobre a coluna inteira, como no modo em memória.
+        """
+        if operacao not in OPERACOES:
             raise ValueError("Operação inválida")
 
-        resultado = (
-            df_filtrado
-            .groupby(colunas_grupo)[coluna_valor]
-            .agg(operacao)
-            .reset_index()
+        if isinstance(colunas_grupo, str):
+            colunas_grupo = [colunas_grupo]
+
+        parciais = []
+        tipos_valor = []
+        tipos_grupo: Dict[str, list] = {coluna: [] for coluna in colunas_grupo}
+        for bloco in blocos:
+            if coluna_valor not in bloco.columns:
+                raise ValueError(f"Coluna '{coluna_valor}' não encontrada")
+
+            valores = pd.to_numeric(bloco[coluna_valor], errors="coerce")
+            mascara = ProcessadorDados._mascara_valores(valores, remover_zeros, remover_nulos)
+            tipos_valor.append(valores.dtype)
+
+            grupos = []
+            for coluna in colunas_grupo:
+                chave = bloco.loc[mascara, coluna]
+                tipos_grupo[coluna].append(chave.dtype)
+                if isinstance(chave.dtype, pd.CategoricalDtype):
+                    chave = chave.astype(object)
+                grupos.append(chave)
+
+            parciais.append(valores[mascara].groupby(grupos).agg(['sum', 'count', 'min', 'max']))
+
+        if not parciais:
+            return pd.DataFrame(columns=[*colunas_grupo, coluna_valor])
+
+        combinado = (
+            pd.concat(parciais)
+            .groupby(level=list(range(len(colunas_grupo))))
+            .agg({'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'})
         )
 
-        return resultado
+        if operacao == "mean":
+            serie = combinado['sum'] / combinado['count']
+        else:
+            serie = combinado[operacao]
+
+        resultado = serie.rename(coluna_valor).reset_index()
 
+        # Tipo comum dos blocos (ex.: Int8 e Int16 → Int16) e o tipo da operação sobre ele
+        tipo_valor = pd.concat([pd.Series([], dtype=tipo) for tipo in tipos_valor]).dtype
+        tipos = {coluna_valor: tipo_resultado_agregacao(tipo_valor, operacao, resultado[coluna_valor])}
+        for coluna, tipos_coluna in tipos_grupo.items():
+            if all(isinstance(tipo, pd.CategoricalDtype) for tipo in tipos_coluna):
+                tipos[coluna] = unir_categorias(tipos_coluna)
+
+        # Ordem das chaves do groupby: a das categorias, não a alfabética
+        return (
+            resultado.astype(tipos)
+            .sort_values(colunas_grupo, kind="stable")
+            .reset_index(drop=True)
+        )
 
     ###  ###########################
     def preparar_dados_barras_por_mes(self, coluna_valor: str):
+        """
+        Séries do gráfico de barras por mês e tipo de serviço
 
-        if self.df is None:
+        Com a dimensão PERÍODO (criada na carga a partir de DATA ou de MÊS e
+        ANO), cada mês de cada ano é uma barra, rotulada "JANEIRO/2024"; sem
+        ano, os meses de todos os anos são somados, em ordem de calendário.
+        No modo incremental o cubo do histórico não guarda o ano: os meses
+        são somados, mesmo com PERÍODO nas linhas carregadas.
+
+        Returns:
+            tuple: (rótulos dos meses, tipos de serviço, lista de valores por tipo)
+        """
+
+        if self.df is None and self.arrow is None and self._armazem_atual() is None:
             raise ValueError("Dados não carregados")
 
-        ORDEM_MESES = [
-            "JANEIRO", "FEVEREIRO", "MARÇO", "ABRIL",
-            "MAIO", "JUNHO", "JULHO", "AGOSTO",
-            "SETEMBRO", "OUTUBRO", "NOVEMBRO", "DEZEMBRO"
-        ]
+        if COLUNA_PERIODO in self._colunas_disponiveis() and self.resumo_incremental is None:
+            coluna_tempo = COLUNA_PERIODO
+        else:
+            coluna_tempo = COLUNA_MES
 
         agregado = self.agregar_por_coluna(
             coluna_valor=coluna_valor,
-            colunas_grupo=["MÊS", "TIPO DE SERVIÇO"],
+            colunas_grupo=[coluna_tempo, "TIPO DE SERVIÇO"],
             operacao="sum",
             remover_zeros=False
         )
 
-        agregado["MÊS"] = agregado["MÊS"].str.strip().str.upper()
+        # A carga já normaliza MÊS (categórica em ordem de calendário); sem o
+        # schema (aplicar_tipos=False), normaliza só o resultado agregado
+        if coluna_tempo == COLUNA_MES and not isinstance(agregado[COLUNA_MES].dtype, pd.CategoricalDtype):
+            agregado[COLUNA_MES] = normalizar_meses(agregado[COLUNA_MES])
 
-        pivot = (
-            agregado
-            .pivot(index="MÊS", columns="TIPO DE SERVIÇO", values=coluna_valor)
-            .fillna(0)
+        pivot = agregado.pivot_table(
+            index=coluna_tempo, columns="TIPO DE SERVIÇO", values=coluna_valor,
+            aggfunc="sum", fill_value=0, observed=True
         )
 
-        pivot = pivot.reindex(
-            [m for m in ORDEM_MESES if m in pivot.index]
-        )
+        if coluna_tempo == COLUNA_PERIODO:
+            rotulos = [f"{ORDEM_MESES[p.month - 1]}/{p.year}" for p in pivot.index]
+        else:
+            rotulos = [m for m in pivot.index if m in ORDEM_MESES]
+            pivot = pivot.loc[rotulos]
 
         return (
-            list(pivot.index),
+            list(rotulos),
             list(pivot.columns),
             [pivot[col].tolist() for col in pivot.columns]
         )
 
+    def serie_temporal(
+            self,
+            coluna_valor: str,
+            janela: int = 3,
+            coluna_grupo: str = "TIPO DE SERVIÇO"
+    ) -> pd.DataFrame:
+        """
+        Indicadores mensais por grupo sobre a dimensão PERÍODO
+
+        A medida é somada por período e grupo e disposta em uma matriz
+        períodos × grupos com todos os meses do intervalo (mês sem registro
+        vale 0). Sobre a matriz, de uma vez para todos os grupos, são
+        calculados: média móvel de `janela` meses, variação em relação ao mês
+        anterior e ao mesmo mês do ano anterior e total acumulado.
+
+        Args:
+            coluna_valor (str): Medida somada
+            janela (int): Meses da média móvel (os primeiros janela - 1 meses ficam nulos)
+            coluna_grupo (str): Coluna das séries (padrão: TIPO DE SERVIÇO)
 
+        Returns:
+            pd.DataFrame: PERÍODO, grupo, medida, 'media_movel', 'variacao_mes',
+                'variacao_ano' e 'acumulado', uma linha por período e grupo
+        """
+        if janela < 1:
+            raise ValueError("A janela deve ter ao menos 1 mês")
 
+        if COLUNA_PERIODO not in self._colunas_disponiveis():
+            raise ValueError(
+                f"Coluna '{COLUNA_PERIODO}' indisponível: a planilha precisa de {COLUNA_DATA} ou de {COLUNA_MES} e {COLUNA_ANO}"
+            )
 
+        agregado = self.agregar_por_coluna(coluna_valor, [COLUNA_PERIODO, coluna_grupo], "sum", remover_zeros=False)
+        if agregado.empty:
+            raise ValueError("Nenhum período válido para a série temporal")
 
+        matriz = agregado.pivot_table(
+            index=COLUNA_PERIODO, columns=coluna_grupo, values=coluna_valor,
+            aggfunc="sum", fill_value=0, observed=True
+        )
+        periodos = pd.period_range(matriz.index.min(), matriz.index.max(), freq="M", name=COLUNA_PERIODO)
+        matriz = matriz.reindex(periodos, fill_value=0)
+
+        valores = matriz.to_numpy(dtype="float64")
+        meses = len(valores)
+
+        def defasar(a: np.ndarray, meses_atras: int) -> np.ndarray:
+            defasado = np.full_like(a, np.nan)
+            if meses_atras < meses:
+                defasado[meses_atras:] = a[:meses - meses_atras]
+            return defasado
+
+        acumulado = np.cumsum(valores, axis=0)
+        anterior = np.vstack([np.zeros((1, valores.shape[1])), acumulado])
+        media_movel = (acumulado - defasar(anterior[:-1], janela - 1)) / janela
+        media_movel[:janela - 1] = np.nan
+
+        indicadores = {
+            coluna_valor: valores,
+            'media_movel': media_movel,
+            'variacao_mes': valores - defasar(valores, 1),
+            'variacao_ano': valores - defasar(valores, 12),
+            'acumulado': acumulado,
+        }
+
+        resultado = pd.MultiIndex.from_product([periodos, matriz.columns]).to_frame(index=False)
+        for nome, matriz_indicador in indicadores.items():
+            resultado[nome] = matriz_indicador.ravel()
+
+        if is_integer_dtype(agregado[coluna_valor].dtype):
+            resultado = resultado.astype({coluna_valor: "int64", 'acumulado': "int64"})
+        return resultado
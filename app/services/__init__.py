@@ -2,7 +2,23 @@
 Módulo de Serviços
 """
 
-from app.services.estatisticas import *
-from app.services.graficos import GraficoService
+from importlib import import_module
 
 __all__ = ["GraficoService"]
+
+# Importados no primeiro acesso: carregar app.services.cache (ou qualquer outro
+# submódulo) não deve trazer o matplotlib junto
+_LAZY = {
+    "GraficoService": "app.services.graficos",
+    "AcumuladorEstatisticas": "app.services.estatisticas",
+    "EstatisticasLazy": "app.services.estatisticas",
+    "estimar_memoria_mb": "app.services.estatisticas",
+}
+
+
+def __getattr__(nome):
+    if nome in _LAZY:
+        valor = getattr(import_module(_LAZY[nome]), nome)
+        globals()[nome] = valor
+        return valor
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -0,0 +1,148 @@
+"""
+Motor de agregação em numpy: códigos de grupo inteiros e reduções com bincount/ufunc.at
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_integer_dtype
+
+from app.services.schema import tipo_resultado_agregacao
+
+
+class CodigosGrupo:
+    """
+    Códigos de grupo de um conjunto de colunas, calculados uma vez.
+
+    Cada coluna vira códigos inteiros em ordem de classificação (as
+    categóricas usam os próprios códigos, na ordem das categorias); a
+    combinação das colunas vira um código de grupo por linha, com os grupos
+    em ordem lexicográfica, como no groupby(sort=True). Linhas com alguma
+    chave nula ficam no grupo extra n_grupos, descartado nas reduções.
+    """
+
+    def __init__(self, df: pd.DataFrame, colunas: Sequence[str]):
+        """
+        Args:
+            df (pd.DataFrame): Dados (não devem ser alterados depois)
+            colunas (list): Colunas de agrupamento
+        """
+        self.colunas = list(colunas)
+        codigos: List[np.ndarray] = []
+        niveis = []
+        tamanhos = []
+        for coluna in self.colunas:
+            serie = df[coluna]
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                codigos.append(serie.cat.codes.to_numpy(dtype="int64"))
+                niveis.append(serie.dtype)
+                tamanhos.append(len(serie.cat.categories))
+            else:
+                cod, valores = pd.factorize(serie, sort=True)
+                codigos.append(cod.astype("int64", copy=False))
+                niveis.append(valores)
+                tamanhos.append(len(valores))
+
+        validas = np.logical_and.reduce([c >= 0 for c in codigos])
+        formato = tuple(max(t, 1) for t in tamanhos)
+        celulas = np.ravel_multi_index([c[validas] for c in codigos], formato)
+
+        # A ordem de ravel_multi_index é a lexicográfica dos códigos. Com poucas
+        # combinações possíveis, um bincount das células numera os grupos em
+        # O(linhas); senão, np.unique (ordenação)
+        total_celulas = int(np.prod(formato, dtype="float64"))
+        if total_celulas <= max(len(celulas), 1 << 16):
+            ocupadas = np.bincount(celulas, minlength=total_celulas) > 0
+            unicas = np.flatnonzero(ocupadas)
+            inverso = (np.cumsum(ocupadas) - 1)[celulas]
+        else:
+            unicas, inverso = np.unique(celulas, return_inverse=True)
+        self.n_grupos = len(unicas)
+        self.grupo = np.full(len(df), self.n_grupos, dtype="intp")
+        self.grupo[validas] = inverso
+
+        self._chaves = {}
+        for coluna, nivel, cod in zip(self.colunas, niveis, np.unravel_index(unicas, formato)):
+            if isinstance(nivel, pd.CategoricalDtype):
+                self._chaves[coluna] = pd.Categorical.from_codes(cod, dtype=nivel)
+            else:
+                self._chaves[coluna] = nivel.take(cod)
+
+    def chaves(self, grupos: np.ndarray) -> dict:
+        """Valores das colunas de agrupamento para os grupos indicados"""
+        return {coluna: valores[grupos] for coluna, valores in self._chaves.items()}
+
+
+def suporta(valores: pd.Series) -> bool:
+    """
+    Indica se a medida pode ser agregada pelo motor numpy
+
+    Só medidas inteiras: para medidas fracionárias o groupby do pandas soma
+    com compensação de Kahan e o resultado poderia diferir no último dígito.
+    """
+    return is_integer_dtype(valores.dtype) and not is_bool_dtype(valores.dtype)
+
+
+def agregar_codigos(
+        codigos: CodigosGrupo,
+        valores: pd.Series,
+        mascara: np.ndarray,
+        coluna_valor: str,
+        operacao: str
+) -> pd.DataFrame:
+    """
+    Agrega uma medida inteira pelos códigos de grupo, no formato de agregar_por_coluna
+
+    Args:
+        codigos (CodigosGrupo): Códigos das colunas de agrupamento
+        valores (pd.Series): Medida (ver suporta)
+        mascara (np.ndarray): Linhas consideradas (filtros de zeros e nulos)
+        coluna_valor (str): Nome da medida no resultado
+        operacao (str): 'sum', 'mean', 'count', 'max' ou 'min'
+
+    Returns:
+        pd.DataFrame: Um grupo por linha, só os grupos com alguma linha na máscara
+    """
+    # Máscaras entram como pesos do bincount: os códigos nunca são copiados ou
+    # compactados, e o grupo extra n (chave nula) é descartado no fim
+    n = codigos.n_grupos
+    grupo = codigos.grupo
+    nulos = valores.isna().to_numpy()
+    validas = mascara & ~nulos if nulos.any() else mascara
+
+    def contar(pesos: np.ndarray) -> np.ndarray:
+        return np.bincount(grupo, weights=pesos, minlength=n + 1)[:n]
+
+    presentes = contar(mascara) > 0
+    contagem = contar(validas).astype("int64")
+
+    if operacao == "count":
+        resultado = contagem
+    elif operacao in ("sum", "mean"):
+        # Somas em float64 são exatas para inteiros até 2**53
+        soma = contar(valores.to_numpy(dtype="float64", na_value=0.0) * validas)
+        if operacao == "sum":
+            resultado = soma.astype("int64")
+        else:
+            resultado = np.where(contagem > 0, soma / np.maximum(contagem, 1), np.nan)
+    elif operacao in ("min", "max"):
+        funcao, neutro = (
+            (np.minimum, np.iinfo("int64").max) if operacao == "min" else (np.maximum, np.iinfo("int64").min)
+        )
+        numeros = np.where(validas, valores.to_numpy(dtype="int64", na_value=0), neutro)
+        resultado = np.full(n + 1, neutro, dtype="int64")
+        funcao.at(resultado, grupo, numeros)
+        resultado = resultado[:n]
+    else:
+        raise ValueError("Operação inválida")
+
+    serie = pd.Series(resultado[presentes])
+    if operacao in ("min", "max"):
+        # Grupo só com nulos: o pandas devolve <NA>
+        serie = serie.astype("Int64").mask(contagem[presentes] == 0)
+
+    tipo = tipo_resultado_agregacao(valores.dtype, operacao, serie)
+    df = pd.DataFrame(codigos.chaves(np.flatnonzero(presentes)))
+    df[coluna_valor] = serie.astype(tipo).array
+    return df
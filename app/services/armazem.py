@@ -0,0 +1,236 @@
+"""
+Armazém SQL local (SQLite ou DuckDB) com agregações executadas no banco
+"""
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.config import ARQUIVO_ARMAZEM, DIMENSOES, MOTORES_ARMAZEM
+from app.services.schema import tipo_resultado_agregacao
+
+logger = logging.getLogger(__name__)
+
+TABELA = "dados"
+
+# Expressão SQL de cada operação de agregar_por_coluna; SUM de um grupo só com
+# nulos é 0 no pandas (min_count=0), daí o COALESCE
+_OPERACOES_SQL = {
+    "sum": "COALESCE(SUM({v}), 0)",
+    "mean": "AVG({v})",
+    "count": "COUNT({v})",
+    "max": "MAX({v})",
+    "min": "MIN({v})",
+}
+
+
+def _q(nome: str) -> str:
+    """Identificador entre aspas (as colunas da planilha têm espaços, acentos e barras)"""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+class ArmazemSQL:
+    """
+    Cópia dos dados limpos em um banco local, indexada pelas dimensões.
+
+    importar grava o DataFrame uma vez (com índices em MÊS e TIPO DE SERVIÇO)
+    e guarda os tipos das colunas e a ordem das categorias; agregar monta um
+    GROUP BY com os filtros de zeros e nulos no WHERE, de modo que só o
+    resultado agregado volta para o Python, com os mesmos tipos e a mesma
+    ordem de agregar_por_coluna.
+    """
+
+    def __init__(self, caminho: Optional[Path] = None, motor: str = "sqlite"):
+        """
+        Args:
+            caminho (Path): Arquivo do banco (padrão: ARQUIVO_ARMAZEM.<motor>)
+            motor (str): 'sqlite' (biblioteca padrão) ou 'duckdb' (se instalado)
+        """
+        if motor not in MOTORES_ARMAZEM:
+            raise ValueError(f"Motor de armazém inválido: {motor}")
+
+        self.motor = motor
+        self.caminho = Path(caminho or ARQUIVO_ARMAZEM.with_suffix(f".{motor}"))
+        self._trava = threading.Lock()
+        self._tipos: Dict[str, str] = {}
+        self._categorias: Dict[str, pd.CategoricalDtype] = {}
+
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        if motor == "duckdb":
+            try:
+                import duckdb
+            except ImportError as e:
+                raise ValueError("O motor duckdb exige o pacote duckdb; use 'sqlite' ou instale duckdb") from e
+            self._conexao = duckdb.connect(str(self.caminho))
+        else:
+            # Os dashboards consultam de várias threads; o acesso é serializado pela trava
+            self._conexao = sqlite3.connect(self.caminho, check_same_thread=False)
+
+        self._ler_metadados()
+
+    def _executar(self, sql: str, parametros: Sequence[Any] = ()) -> List[tuple]:
+        with self._trava:
+            return self._conexao.execute(sql, list(parametros)).fetchall()
+
+    def _tabelas(self) -> List[str]:
+        if self.motor == "duckdb":
+            return [t for (t,) in self._executar("SELECT table_name FROM information_schema.tables")]
+        return [t for (t,) in self._executar("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    def _ler_metadados(self) -> None:
+        """Tipos das colunas e ordem das categorias gravados por importar"""
+        if "_colunas" not in self._tabelas():
+            return
+
+        self._tipos = dict(self._executar("SELECT nome, tipo FROM _colunas ORDER BY posicao"))
+        categorias: Dict[str, list] = {}
+        ordenadas = {}
+        for coluna, valor, ordenada in self._executar(
+                "SELECT coluna, valor, ordenada FROM _categorias ORDER BY coluna, posicao"
+        ):
+            categorias.setdefault(coluna, []).append(valor)
+            ordenadas[coluna] = bool(ordenada)
+        self._categorias = {
+            coluna: pd.CategoricalDtype(valores, ordered=ordenadas[coluna])
+            for coluna, valores in categorias.items()
+        }
+
+    @property
+    def colunas(self) -> List[str]:
+        """Colunas da tabela importada (vazio se nada foi importado)"""
+        return list(self._tipos)
+
+    @property
+    def linhas(self) -> int:
+        """Linhas da tabela importada (0 se nada foi importado)"""
+        if not self._tipos:
+            return 0
+        return self._executar(f"SELECT COUNT(*) FROM {TABELA}")[0][0]
+
+    def importar(self, df: pd.DataFrame, indices: Sequence[str] = DIMENSOES) -> int:
+        """
+        Substitui o conteúdo do armazém pelo DataFrame
+
+        Categóricas são gravadas pelos valores e períodos como "AAAA-MM"; os
+        tipos originais e a ordem das categorias ficam nas tabelas _colunas e
+        _categorias.
+
+        Args:
+            df (pd.DataFrame): Dados limpos
+            indices (list): Colunas indexadas (as presentes no DataFrame)
+
+        Returns:
+            int: Linhas gravadas
+        """
+        tipos = {coluna: str(df[coluna].dtype) for coluna in df.columns}
+        categorias = {
+            coluna: df[coluna].dtype for coluna in df.columns
+            if isinstance(df[coluna].dtype, pd.CategoricalDtype)
+        }
+        dados = df.astype({coluna: object for coluna in categorias}).reset_index(drop=True)
+
+        # Períodos (ano-mês) viram texto "AAAA-MM", que ordena como o período
+        for coluna in df.columns:
+            if isinstance(df[coluna].dtype, pd.PeriodDtype):
+                dados[coluna] = dados[coluna].dt.strftime("%Y-%m")
+
+        with self._trava:
+            conexao = self._conexao
+            for tabela in (TABELA, "_colunas", "_categorias"):
+                conexao.execute(f"DROP TABLE IF EXISTS {tabela}")
+
+            if self.motor == "duckdb":
+                conexao.register("_entrada", dados)
+                conexao.execute(f"CREATE TABLE {TABELA} AS SELECT * FROM _entrada")
+                conexao.unregister("_entrada")
+            else:
+                dados.to_sql(TABELA, conexao, index=False, chunksize=50_000)
+
+            for coluna in indices:
+                if coluna in tipos:
+                    nome_indice = _q(f"idx_{list(tipos).index(coluna)}")
+                    conexao.execute(f"CREATE INDEX {nome_indice} ON {TABELA} ({_q(coluna)})")
+
+            conexao.execute("CREATE TABLE _colunas (posicao INTEGER, nome TEXT, tipo TEXT)")
+            conexao.executemany(
+                "INSERT INTO _colunas VALUES (?, ?, ?)",
+                [(i, coluna, tipo) for i, (coluna, tipo) in enumerate(tipos.items())]
+            )
+            conexao.execute("CREATE TABLE _categorias (coluna TEXT, posicao INTEGER, valor TEXT, ordenada INTEGER)")
+            conexao.executemany(
+                "INSERT INTO _categorias VALUES (?, ?, ?, ?)",
+                [
+                    (coluna, i, valor, int(dtype.ordered))
+                    for coluna, dtype in categorias.items()
+                    for i, valor in enumerate(dtype.categories)
+                ]
+            )
+            conexao.commit()
+
+        self._tipos = tipos
+        self._categorias = categorias
+        logger.info(f"Armazém {self.motor}: {len(dados)} linhas importadas em {self.caminho}")
+        return len(dados)
+
+    def pode_responder(self, coluna_valor: str, colunas_grupo: Sequence[str]) -> bool:
+        """Indica se a agregação pode ser feita no banco (medida numérica e colunas importadas)"""
+        if coluna_valor not in self._tipos or not colunas_grupo:
+            return False
+        if any(coluna not in self._tipos for coluna in colunas_grupo):
+            return False
+        dtype = pd.api.types.pandas_dtype(self._tipos[coluna_valor])
+        return is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+
+    def agregar(
+            self,
+            coluna_valor: str,
+            colunas_grupo: Sequence[str],
+            operacao: str = "sum",
+            remover_zeros: bool = True,
+            remover_nulos: bool = True
+    ) -> pd.DataFrame:
+        """
+        Agregação com GROUP BY no banco, no formato de agregar_por_coluna
+
+        Grupos com chave nula ficam de fora, como no groupby do pandas; as
+        chaves categóricas voltam com o dtype e a ordem de categorias originais.
+        """
+        if operacao not in _OPERACOES_SQL:
+            raise ValueError("Operação inválida")
+        if not self.pode_responder(coluna_valor, colunas_grupo):
+            raise ValueError(f"Agregação de '{coluna_valor}' não disponível no armazém")
+
+        colunas_grupo = list(colunas_grupo)
+        grupos = ", ".join(_q(c) for c in colunas_grupo)
+        valor = _q(coluna_valor)
+
+        condicoes = [f"{_q(c)} IS NOT NULL" for c in colunas_grupo]
+        if remover_nulos:
+            condicoes.append(f"{valor} IS NOT NULL")
+        if remover_zeros:
+            condicoes.append(f"({valor} <> 0 OR {valor} IS NULL)")
+
+        sql = (
+            f"SELECT {grupos}, {_OPERACOES_SQL[operacao].format(v=valor)} "
+            f"FROM {TABELA} WHERE {' AND '.join(condicoes)} GROUP BY {grupos}"
+        )
+        linhas = self._executar(sql)
+        logger.debug(f"Armazém: {len(linhas)} grupo(s) de {sql}")
+
+        resultado = pd.DataFrame.from_records(linhas, columns=[*colunas_grupo, coluna_valor])
+        tipos = {coluna: self._categorias.get(coluna, self._tipos[coluna]) for coluna in colunas_grupo}
+        tipos[coluna_valor] = tipo_resultado_agregacao(
+            self._tipos[coluna_valor], operacao, resultado[coluna_valor]
+        )
+        resultado = resultado.astype(tipos)
+
+        return resultado.sort_values(colunas_grupo, ignore_index=True)
+
+    def fechar(self) -> None:
+        with self._trava:
+            self._conexao.close()
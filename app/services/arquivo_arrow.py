@@ -0,0 +1,122 @@
+"""
+Dados limpos em um arquivo Arrow IPC (Feather v2) sem compressão, lido por memory-map
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+from app.config import ARQUIVO_ARROW
+from app.services.cache import PYARROW_DISPONIVEL
+
+logger = logging.getLogger(__name__)
+
+
+def _exigir_pyarrow() -> None:
+    if not PYARROW_DISPONIVEL:
+        raise ValueError("O modo Arrow exige o pacote pyarrow")
+
+
+def gravar_arrow(df: pd.DataFrame, caminho: Optional[Path] = None) -> Path:
+    """
+    Grava o DataFrame em Arrow IPC sem compressão
+
+    Sem compressão, as colunas ficam no arquivo no mesmo formato da memória e
+    podem ser mapeadas sem descompactar. Os tipos do pandas (categorias,
+    inteiros com nulos, períodos) vão nos metadados do arquivo. A gravação é
+    feita em um temporário e renomeada: quem já mapeou a versão anterior
+    continua lendo-a até reabrir.
+
+    Args:
+        df (pd.DataFrame): Dados limpos
+        caminho (Path): Arquivo de destino (padrão: ARQUIVO_ARROW)
+
+    Returns:
+        Path: Caminho gravado
+    """
+    _exigir_pyarrow()
+    import pyarrow as pa
+    from pyarrow import feather
+
+    caminho = Path(caminho or ARQUIVO_ARROW)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.tmp")
+    feather.write_feather(tabela, temporario, compression="uncompressed")
+    temporario.replace(caminho)
+
+    logger.info(f"Arrow: {tabela.num_rows} linhas gravadas em {caminho}")
+    return caminho
+
+
+class ArquivoArrow:
+    """
+    Leitura por colunas de um arquivo gravado por gravar_arrow.
+
+    O arquivo é mapeado em memória uma vez, na abertura: cada leitura traz só
+    as colunas pedidas, direto das páginas do arquivo (colunas numéricas sem
+    nulos, sem cópia), e processos que mapeiam o mesmo arquivo compartilham o
+    page cache do sistema em vez de manter cada um a sua cópia dos dados. O
+    mapeamento continua válido se o arquivo for substituído ou removido.
+    """
+
+    def __init__(self, caminho: Optional[Path] = None):
+        """
+        Args:
+            caminho (Path): Arquivo Arrow (padrão: ARQUIVO_ARROW)
+        """
+        _exigir_pyarrow()
+        import pyarrow as pa
+
+        self.caminho = Path(caminho or ARQUIVO_ARROW)
+        if not self.caminho.exists():
+            raise ValueError(f"Arquivo Arrow não encontrado: {self.caminho}")
+
+        # Só o esquema e o rodapé são lidos aqui; os lotes não são copiados
+        self._mapa = pa.memory_map(str(self.caminho))
+        leitor = pa.ipc.open_file(self._mapa)
+        self._colunas = list(leitor.schema.names)
+        self._numericas = [
+            campo.name for campo in leitor.schema
+            if pa.types.is_integer(campo.type) or pa.types.is_floating(campo.type)
+        ]
+        self.linhas = sum(leitor.get_batch(i).num_rows for i in range(leitor.num_record_batches))
+
+    @property
+    def colunas(self) -> List[str]:
+        """Colunas gravadas no arquivo"""
+        return list(self._colunas)
+
+    @property
+    def colunas_numericas(self) -> List[str]:
+        """Colunas inteiras ou de ponto flutuante, pelo esquema (sem ler os dados)"""
+        return list(self._numericas)
+
+    def ler(self, colunas: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Lê colunas do arquivo mapeado
+
+        Args:
+            colunas (list): Colunas lidas, na ordem pedida (padrão: todas)
+
+        Returns:
+            pd.DataFrame: Colunas com os tipos do DataFrame gravado
+        """
+        from pyarrow import feather
+
+        if colunas is not None:
+            colunas = list(dict.fromkeys(colunas))
+            faltando = [c for c in colunas if c not in self._colunas]
+            if faltando:
+                raise ValueError(f"Coluna(s) não encontrada(s) no arquivo Arrow: {', '.join(faltando)}")
+
+        tabela = feather.read_table(self._mapa, columns=colunas)
+        # split_blocks: cada coluna vira um bloco próprio, sem consolidar (copiar) em 2D
+        return tabela.to_pandas(split_blocks=True)
+
+    def fechar(self) -> None:
+        self._mapa.close()
@@ -0,0 +1,115 @@
+"""
+Cache colunar em disco para leituras de planilhas Excel
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PYARROW_DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
+
+
+def hash_conteudo(path_file: Path, tamanho_bloco: int = 1 << 20) -> str:
+    """Calcula o hash do conteúdo de um arquivo lendo-o em blocos"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path_file, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def impressao_arquivo(path_file: Path) -> Dict[str, Any]:
+    """
+    Identifica a versão de um arquivo em disco
+
+    Returns:
+        dict: caminho absoluto, tamanho, mtime e hash do conteúdo
+    """
+    path_file = Path(path_file).resolve()
+    stat = path_file.stat()
+    return {
+        'caminho': str(path_file),
+        'tamanho': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'hash': hash_conteudo(path_file),
+    }
+
+
+def chave_cache(path_file: Path, params: Dict[str, Any]) -> str:
+    """Gera a chave do snapshot a partir do arquivo e dos parâmetros de leitura"""
+    conteudo = json.dumps(
+        {**impressao_arquivo(path_file), 'params': params},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class CacheColunar:
+    """
+    Guarda snapshots Parquet de DataFrames lidos de arquivos Excel.
+
+    Cada arquivo de origem mantém no máximo um snapshot: ao gravar uma nova
+    versão, os snapshots antigos do mesmo arquivo são removidos.
+    """
+
+    def __init__(self, diretorio: Path):
+        self.diretorio = Path(diretorio)
+
+    @staticmethod
+    def _prefixo(path_file: Path) -> str:
+        caminho = str(Path(path_file).resolve())
+        return hashlib.blake2b(caminho.encode("utf-8"), digest_size=6).hexdigest()
+
+    def caminho_snapshot(self, path_file: Path, chave: str) -> Path:
+        """Caminho do snapshot de um arquivo para uma chave"""
+        prefixo = self._prefixo(path_file)
+        return self.diretorio / f"{Path(path_file).stem}_{prefixo}_{chave}.parquet"
+
+    def ler(self, path_file: Path, chave: str) -> Optional[pd.DataFrame]:
+        """Lê o snapshot da chave, ou None se não existir"""
+        caminho = self.caminho_snapshot(path_file, chave)
+        if not caminho.exists():
+            return None
+
+        try:
+            return pd.read_parquet(caminho)
+        except Exception as e:
+            logger.warning(f"Snapshot inválido ignorado ({caminho}): {e}")
+            caminho.unlink(missing_ok=True)
+            return None
+
+    def gravar(self, path_file: Path, chave: str, df: pd.DataFrame) -> Optional[Path]:
+        """
+        Grava o snapshot da chave e remove versões antigas do mesmo arquivo
+
+        Returns:
+            Path | None: caminho do snapshot, ou None se não foi possível gravar
+        """
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        caminho = self.caminho_snapshot(path_file, chave)
+        temporario = caminho.with_suffix(".tmp")
+
+        try:
+            # index=None: RangeIndex vai só nos metadados, sem coluna int64 extra na leitura
+            df.to_parquet(temporario, index=None)
+            temporario.replace(caminho)
+        except Exception as e:
+            # Ex.: colunas com tipos mistos ou nomes não textuais
+            logger.warning(f"Snapshot não gravado para {path_file}: {e}")
+            temporario.unlink(missing_ok=True)
+            return None
+
+        padrao = f"{Path(path_file).stem}_{self._prefixo(path_file)}_*.parquet"
+        for antigo in self.diretorio.glob(padrao):
+            if antigo != caminho:
+                antigo.unlink(missing_ok=True)
+
+        return caminho
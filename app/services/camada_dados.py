@@ -0,0 +1,237 @@
+"""
+Camada de dados compartilhada pelos dashboards: carrega e limpa uma vez,
+publica um snapshot imutável e recarrega em segundo plano quando a planilha muda
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from app.config import ARQUIVO_ESTATISTICAS, INTERVALO_VERIFICACAO
+from app.processador import ProcessadorDados
+from app.services.cache import hash_conteudo
+
+logger = logging.getLogger(__name__)
+
+
+def _assinatura_stat(arquivos) -> Tuple:
+    """Tamanho e mtime de cada arquivo: barato, verificado a cada intervalo"""
+    assinatura = []
+    for arquivo in arquivos:
+        try:
+            stat = arquivo.stat()
+        except FileNotFoundError:
+            continue
+        assinatura.append((str(arquivo), stat.st_size, stat.st_mtime_ns))
+    return tuple(assinatura)
+
+
+def _hash_arquivos(assinatura: Tuple) -> str:
+    """Hash do conteúdo de todos os arquivos, calculado só quando o stat muda"""
+    h = hashlib.blake2b(digest_size=16)
+    for caminho, _, _ in assinatura:
+        h.update(caminho.encode("utf-8"))
+        h.update(hash_conteudo(Path(caminho)).encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class SnapshotDados:
+    """
+    Versão carregada e limpa dos dados, compartilhada entre as sessões.
+
+    O DataFrame não deve ser alterado por quem lê; com Copy-on-Write, as
+    cópias rasas devolvidas por `dados` protegem o snapshot de alterações.
+    """
+    hash: str
+    assinatura: Tuple
+    carregado_em: float
+    processador: ProcessadorDados = field(repr=False)
+    _trava: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    _materializado: Dict[str, pd.DataFrame] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def dados(self) -> pd.DataFrame:
+        """
+        Cópia rasa dos dados limpos
+
+        No modo Arrow, todas as colunas são lidas do arquivo mapeado no
+        primeiro acesso e o DataFrame fica guardado no snapshot; os acessos
+        seguintes não leem o arquivo de novo.
+        """
+        if self.processador.df is not None:
+            return self.processador.df.copy(deep=False)
+        with self._trava:
+            if 'dados' not in self._materializado:
+                self._materializado['dados'] = self.processador.arrow.ler()
+            return self._materializado['dados'].copy(deep=False)
+
+    def agregar_por_coluna(self, *args, **kwargs) -> pd.DataFrame:
+        """agregar_por_coluna do processador, serializado entre as sessões (o cache LRU não é thread-safe)"""
+        with self._trava:
+            return self.processador.agregar_por_coluna(*args, **kwargs)
+
+    def total_presos_por_guarnicao(self) -> pd.DataFrame:
+        """total_presos_por_guarnicao do processador, serializado entre as sessões"""
+        with self._trava:
+            return self.processador.total_presos_por_guarnicao()
+
+
+class CamadaDados:
+    """
+    Mantém o snapshot atual dos dados e o substitui quando a origem muda.
+
+    Uma thread em segundo plano compara tamanho e mtime dos arquivos a cada
+    `intervalo` segundos; só quando eles mudam o conteúdo é lido para o hash,
+    e só um hash diferente dispara a recarga. Enquanto a nova versão é
+    carregada, as sessões continuam lendo o snapshot anterior.
+
+    Com `dir_arrow`, cada versão é gravada uma vez em <hash>.arrow e o
+    snapshot lê desse arquivo mapeado em memória: os processos de dashboard
+    que apontam para o mesmo diretório reaproveitam o arquivo (sem ler a
+    planilha) e compartilham o page cache em vez de manter um DataFrame cada.
+    """
+
+    def __init__(
+            self,
+            fonte: Path = ARQUIVO_ESTATISTICAS,
+            intervalo: float = INTERVALO_VERIFICACAO,
+            carregar: Optional[Callable[[ProcessadorDados], bool]] = None,
+            vigiar: bool = True,
+            dir_arrow: Optional[Path] = None
+    ):
+        """
+        Args:
+            fonte (Path): Arquivo Excel, diretório ou padrão glob (relativo a RAW_DATA_DIR)
+            intervalo (float): Segundos entre verificações de alteração
+            carregar (callable): Carrega os dados no processador (padrão:
+                carregar_dados para um arquivo, carregar_multiplos para os demais)
+            vigiar (bool): Inicia a thread que verifica alterações
+            dir_arrow (Path): Diretório dos snapshots Arrow (None mantém os dados em memória)
+        """
+        self.fonte = Path(fonte)
+        self.dir_arrow = Path(dir_arrow) if dir_arrow is not None else None
+        self.intervalo = intervalo
+        self._carregar = carregar or self._carregar_padrao
+        self._snapshot: Optional[SnapshotDados] = None
+        self._parar = threading.Event()
+        self._thread = None
+        self._assinatura_falha = None
+        self.recargas = 0
+
+        self.verificar()
+
+        if vigiar:
+            self._thread = threading.Thread(target=self._vigiar, name="camada-dados", daemon=True)
+            self._thread.start()
+
+    def _arquivos(self):
+        return ProcessadorDados._resolver_arquivos(str(self.fonte))
+
+    def _carregar_padrao(self, processador: ProcessadorDados) -> bool:
+        if self.fonte.is_file():
+            return processador.carregar_dados()
+        return processador.carregar_multiplos(str(self.fonte))
+
+    @property
+    def snapshot(self) -> Optional[SnapshotDados]:
+        """Snapshot atual (None se nenhuma carga foi bem-sucedida)"""
+        return self._snapshot
+
+    def verificar(self) -> bool:
+        """
+        Verifica a origem e recarrega se o conteúdo mudou
+
+        Returns:
+            bool: True se um novo snapshot foi publicado
+        """
+        assinatura = _assinatura_stat(self._arquivos())
+        atual = self._snapshot
+
+        if atual is not None and assinatura == atual.assinatura:
+            return False
+        if assinatura == self._assinatura_falha:
+            # Mesma versão que já falhou: espera o arquivo mudar de novo
+            return False
+        if not assinatura:
+            logger.warning(f"Nenhum arquivo encontrado para: {self.fonte}")
+            return False
+
+        hash_atual = _hash_arquivos(assinatura)
+        if atual is not None and hash_atual == atual.hash:
+            # Só o mtime mudou (ex.: arquivo salvo sem alterações)
+            self._snapshot = replace(atual, assinatura=assinatura)
+            return False
+
+        processador = ProcessadorDados(self.fonte)
+        if not self._carregar_versao(processador, hash_atual):
+            logger.error(f"Recarga falhou; mantendo a versão anterior de {self.fonte}")
+            self._assinatura_falha = assinatura
+            return False
+
+        self._snapshot = SnapshotDados(hash_atual, assinatura, time.time(), processador)
+        self.recargas += 1
+        linhas = processador.arrow.linhas if processador.df is None else len(processador.df)
+        logger.info(f"Snapshot {hash_atual[:8]} publicado ({linhas} linhas)")
+        return True
+
+    def _carregar_versao(self, processador: ProcessadorDados, hash_atual: str) -> bool:
+        """Carrega e limpa a versão; no modo Arrow, grava (se preciso) e mapeia <hash>.arrow"""
+        if self.dir_arrow is None:
+            if not self._carregar(processador):
+                return False
+            processador.limpar_dados()
+            return True
+
+        arquivo = self.dir_arrow / f"{hash_atual}.arrow"
+        if not arquivo.exists():
+            if not self._carregar(processador):
+                return False
+            # O cubo é construído em carregar_arrow, também quando o arquivo é reaproveitado
+            processador.limpar_dados(materializar_cubo=False)
+            processador.salvar_arrow(arquivo)
+        else:
+            # Outro processo já gravou esta versão: a planilha nem é lida
+            logger.info(f"Snapshot Arrow reaproveitado: {arquivo}")
+
+        if not processador.carregar_arrow(arquivo):
+            return False
+
+        # Versões antigas: quem ainda as mapeia continua lendo (POSIX); no
+        # Windows o arquivo mapeado não pode ser removido e fica para depois
+        for antigo in self.dir_arrow.glob("*.arrow"):
+            if antigo != arquivo:
+                try:
+                    antigo.unlink()
+                except OSError:
+                    pass
+        return True
+
+    def _vigiar(self) -> None:
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                logger.error(f"Erro ao verificar alterações em {self.fonte}: {e}")
+
+    def parar(self) -> None:
+        """Encerra a thread de verificação"""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def info(self) -> Dict[str, Any]:
+        """Estado da camada, para exibição no dashboard"""
+        snapshot = self._snapshot
+        return {
+            'fonte': str(self.fonte),
+            'hash': snapshot.hash if snapshot else None,
+            'carregado_em': snapshot.carregado_em if snapshot else None,
+            'recargas': self.recargas,
+        }
@@ -0,0 +1,173 @@
+"""
+Cubo materializado MÊS × TIPO DE SERVIÇO com consultas por roll-up
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.config import COLUNA_MES, DIMENSOES
+from app.services.schema import normalizar_meses
+
+# Estatísticas combináveis guardadas para cada medida, com a função de roll-up
+ESTATISTICAS = {
+    'soma': 'sum',
+    'contagem': 'sum',
+    'contagem_nz': 'sum',
+    'nulos': 'sum',
+    'min': 'min',
+    'max': 'max',
+    'min_nz': 'min',
+    'max_nz': 'max',
+}
+
+
+def medidas_do_cubo(cubo: pd.DataFrame) -> List[str]:
+    """Medidas disponíveis no cubo"""
+    return list(cubo.columns.get_level_values(0).unique())
+
+
+def construir_cubo(
+        df: pd.DataFrame,
+        dimensoes: Sequence[str] = DIMENSOES,
+        medidas: Optional[Sequence[str]] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Agrega cada medida numérica por todas as dimensões
+
+    Para cada célula guarda soma, contagem, nulos, mínimo e máximo, com e sem
+    zeros, o que permite responder agregar_por_coluna para qualquer
+    subconjunto das dimensões e qualquer combinação de remover_zeros/remover_nulos.
+
+    Args:
+        df (pd.DataFrame): Dados limpos
+        dimensoes (list): Dimensões do cubo
+        medidas (list): Medidas agregadas (padrão: todas as colunas numéricas)
+
+    Returns:
+        pd.DataFrame | None: Cubo indexado pelas dimensões, com colunas
+            (medida, estatística); None se faltar alguma dimensão ou medida
+    """
+    dimensoes = list(dimensoes)
+    if any(d not in df.columns for d in dimensoes):
+        return None
+
+    if medidas is None:
+        medidas = [
+            c for c in df.columns
+            if c not in dimensoes and is_numeric_dtype(df[c].dtype) and not is_bool_dtype(df[c].dtype)
+        ]
+    if not medidas:
+        return None
+
+    colunas = {}
+    especificacao = {}
+    for i, medida in enumerate(medidas):
+        valores = pd.to_numeric(df[medida], errors="coerce")
+        colunas[f"v{i}"] = valores
+        colunas[f"nz{i}"] = valores.where((valores != 0).fillna(False))
+        colunas[f"n{i}"] = valores.isna()
+        especificacao[f"v{i}"] = ['sum', 'count', 'min', 'max']
+        especificacao[f"nz{i}"] = ['count', 'min', 'max']
+        especificacao[f"n{i}"] = ['sum']
+
+    # dropna=False mantém células com dimensão nula: um roll-up que não usa
+    # essa dimensão ainda precisa das linhas
+    agregado = (
+        pd.DataFrame(colunas, index=df.index)
+        .groupby([df[d] for d in dimensoes], dropna=False)
+        .agg(especificacao)
+    )
+
+    partes = {}
+    for i, medida in enumerate(medidas):
+        partes[(medida, 'soma')] = agregado[(f"v{i}", 'sum')]
+        partes[(medida, 'contagem')] = agregado[(f"v{i}", 'count')]
+        partes[(medida, 'contagem_nz')] = agregado[(f"nz{i}", 'count')]
+        partes[(medida, 'nulos')] = agregado[(f"n{i}", 'sum')]
+        partes[(medida, 'min')] = agregado[(f"v{i}", 'min')]
+        partes[(medida, 'max')] = agregado[(f"v{i}", 'max')]
+        partes[(medida, 'min_nz')] = agregado[(f"nz{i}", 'min')]
+        partes[(medida, 'max_nz')] = agregado[(f"nz{i}", 'max')]
+
+    cubo = pd.DataFrame(partes)
+    cubo.columns = pd.MultiIndex.from_tuples(cubo.columns, names=['medida', 'estatistica'])
+    return cubo
+
+
+def combinar_cubos(a: Optional[pd.DataFrame], b: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Combina dois cubos com as mesmas dimensões (ex.: histórico + linhas novas)
+
+    Somas e contagens são somadas e mínimos/máximos combinados; medidas
+    presentes em apenas um dos cubos ficam com estatísticas parciais.
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+
+    juntos = pd.concat([a, b])
+
+    # Categorias diferentes nos dois cubos viram texto no concat; restaura a
+    # ordem de calendário do mês e as categóricas das demais dimensões
+    chaves = []
+    for nome in juntos.index.names:
+        nivel = juntos.index.get_level_values(nome)
+        categorias = normalizar_meses(pd.Series(nivel)) if nome == COLUNA_MES else pd.Categorical(nivel)
+        chaves.append(pd.CategoricalIndex(categorias, name=nome))
+
+    regras = {coluna: ESTATISTICAS[coluna[1]] for coluna in juntos.columns}
+    cubo = juntos.groupby(chaves, dropna=False).agg(regras)
+    cubo.columns = pd.MultiIndex.from_tuples(cubo.columns, names=['medida', 'estatistica'])
+    return cubo
+
+
+def pode_responder(cubo: Optional[pd.DataFrame], coluna_valor: str, colunas_grupo: Sequence[str]) -> bool:
+    """Indica se a consulta pode ser respondida pelo cubo"""
+    return (
+        cubo is not None
+        and len(colunas_grupo) > 0
+        and coluna_valor in medidas_do_cubo(cubo)
+        and set(colunas_grupo) <= set(cubo.index.names)
+        and len(set(colunas_grupo)) == len(colunas_grupo)
+    )
+
+
+def consultar_cubo(
+        cubo: pd.DataFrame,
+        coluna_valor: str,
+        colunas_grupo: Sequence[str],
+        operacao: str = "sum",
+        remover_zeros: bool = True,
+        remover_nulos: bool = True
+) -> pd.DataFrame:
+    """
+    Responde uma agregação por roll-up do cubo, no formato de agregar_por_coluna
+    """
+    estatisticas = cubo[coluna_valor]
+    agrupado = estatisticas.groupby(level=list(colunas_grupo), dropna=True).agg(ESTATISTICAS)
+
+    # Contagem de linhas que sobrevivem aos filtros de cada grupo
+    validas = agrupado['contagem_nz'] if remover_zeros else agrupado['contagem']
+    if not remover_nulos:
+        validas = validas + agrupado['nulos']
+    agrupado = agrupado[validas.to_numpy() > 0]
+
+    sufixo = '_nz' if remover_zeros else ''
+    contagem = agrupado['contagem_nz'] if remover_zeros else agrupado['contagem']
+
+    if operacao == "sum":
+        serie = agrupado['soma']
+    elif operacao == "count":
+        serie = contagem
+    elif operacao == "mean":
+        serie = agrupado['soma'] / contagem.replace(0, np.nan)
+    elif operacao in ("min", "max"):
+        serie = agrupado[operacao + sufixo]
+    else:
+        raise ValueError("Operação inválida")
+
+    return serie.rename(coluna_valor).reset_index()
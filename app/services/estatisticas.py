@@ -0,0 +1,230 @@
+"""
+Estatísticas calculadas sob demanda ou de forma incremental, bloco a bloco
+"""
+
+from collections.abc import Mapping
+from typing import Dict, Any, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.config import AMOSTRA_MEMORIA
+from app.services.schema import unir_categorias
+
+__all__ = ["AcumuladorEstatisticas", "EstatisticasLazy", "estimar_memoria_mb"]
+
+
+def _memoria_varre_objetos(serie: pd.Series) -> bool:
+    """Colunas cuja memória profunda exige percorrer objetos Python"""
+    return serie.dtype == object or getattr(serie.dtype, "storage", None) == "python"
+
+
+def estimar_memoria_mb(df: pd.DataFrame, amostra: Optional[int] = AMOSTRA_MEMORIA) -> float:
+    """
+    Memória ocupada pelo DataFrame em MB, equivalente a memory_usage(deep=True)
+
+    Colunas de objetos Python (textos) são estimadas a partir de uma amostra
+    de `amostra` linhas; as demais são medidas exatamente. Com amostra=None,
+    ou com menos linhas do que a amostra, o resultado é exato.
+    """
+    if amostra is None or len(df) <= amostra:
+        return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+    total = df.index.memory_usage(deep=True)
+    posicoes = np.random.default_rng(0).choice(len(df), size=amostra, replace=False)
+
+    for i in range(df.shape[1]):
+        serie = df.iloc[:, i]
+        if _memoria_varre_objetos(serie):
+            por_linha = serie.iloc[posicoes].memory_usage(deep=True, index=False) / amostra
+            total += por_linha * len(serie)
+        else:
+            total += serie.memory_usage(deep=True, index=False)
+
+    return total / 1024 ** 2
+
+
+class EstatisticasLazy(Mapping):
+    """
+    Estatísticas de calcular_estatisticas calculadas no primeiro acesso.
+
+    Tem as mesmas chaves do dicionário original; cada métrica é calculada
+    apenas quando lida, e o describe() é feito e guardado por coluna.
+    Contagens e percentuais de ausentes saem de uma única passada.
+    Os dados são fixados no momento da criação (cópia Copy-on-Write), então
+    alterações posteriores em self.df não mudam as estatísticas.
+    """
+
+    def __init__(
+            self,
+            df: pd.DataFrame,
+            memoria_original: Optional[float] = None,
+            amostra_memoria: Optional[int] = None
+    ):
+        """
+        Args:
+            df (pd.DataFrame): Dados analisados
+            memoria_original (float): Memória antes do schema compacto, em MB
+            amostra_memoria (int): Linhas amostradas para estimar a memória de
+                colunas de texto (modo rápido); None mede exatamente
+        """
+        self._df = df.copy(deep=False)
+        self._memoria_original = memoria_original
+        self._amostra_memoria = amostra_memoria
+        self._valores: Dict[str, Any] = {}
+        self._describe: Dict[Any, Dict[str, float]] = {}
+        self._ausentes: Optional[pd.Series] = None
+        self._numericas = list(self._df.select_dtypes(include=['number']).columns)
+
+        self._calculos = {
+            'total_linhas': lambda: len(self._df),
+            'total_colunas': lambda: len(self._df.columns),
+            'colunas': lambda: list(self._df.columns),
+            'tipos_dados': lambda: self._df.dtypes.to_dict(),
+            'valores_ausentes': lambda: self._contar_ausentes().to_dict(),
+            'percentual_ausentes': lambda: (self._contar_ausentes() / len(self._df) * 100).to_dict(),
+            'memoria_uso': lambda: estimar_memoria_mb(self._df, self._amostra_memoria),  # MB
+            'memoria_uso_original': lambda: self._memoria_original,  # MB, antes do schema compacto
+        }
+        if self._numericas:
+            self._calculos['estatisticas_numericas'] = lambda: {
+                coluna: self.describe_coluna(coluna) for coluna in self._numericas
+            }
+
+    def _contar_ausentes(self) -> pd.Series:
+        if self._ausentes is None:
+            self._ausentes = self._df.isnull().sum()
+        return self._ausentes
+
+    def describe_coluna(self, coluna) -> Dict[str, float]:
+        """describe() de uma coluna numérica, calculado uma única vez"""
+        if coluna not in self._describe:
+            self._describe[coluna] = self._df[coluna].describe().to_dict()
+        return self._describe[coluna]
+
+    @property
+    def calculadas(self) -> List[str]:
+        """Chaves já calculadas"""
+        return list(self._valores)
+
+    def __getitem__(self, chave: str) -> Any:
+        if chave not in self._valores:
+            if chave not in self._calculos:
+                raise KeyError(chave)
+            self._valores[chave] = self._calculos[chave]()
+        return self._valores[chave]
+
+    def __contains__(self, chave) -> bool:
+        return chave in self._calculos
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._calculos)
+
+    def __len__(self) -> int:
+        return len(self._calculos)
+
+
+def _quantil(valores: np.ndarray, contagens: np.ndarray, q: float) -> float:
+    """Quantil com interpolação linear (como pandas) a partir de um histograma ordenado"""
+    acumulado = np.cumsum(contagens)
+    posicao = q * (acumulado[-1] - 1)
+    inferior = int(np.floor(posicao))
+    superior = int(np.ceil(posicao))
+    v_inf = valores[np.searchsorted(acumulado, inferior, side="right")]
+    v_sup = valores[np.searchsorted(acumulado, superior, side="right")]
+    return float(v_inf + (v_sup - v_inf) * (posicao - inferior))
+
+
+class AcumuladorEstatisticas:
+    """
+    Acumula as estatísticas de calcular_estatisticas sobre blocos de dados.
+
+    Para as colunas numéricas mantém um histograma (valor → frequência), o que
+    dá os mesmos quantis de describe() com memória proporcional ao número de
+    valores distintos, e não ao número de linhas.
+    """
+
+    def __init__(self):
+        self.total_linhas = 0
+        self.esqueleto = None
+        self.ausentes = pd.Series(dtype="int64")
+        self.memoria = 0
+        self.histogramas: Dict[Any, pd.Series] = {}
+
+    def adicionar(self, bloco: pd.DataFrame) -> None:
+        """Incorpora um bloco às estatísticas"""
+        self.total_linhas += len(bloco)
+        vazio = bloco.iloc[:0]
+        if self.esqueleto is None:
+            self.esqueleto = vazio
+        else:
+            # Cada bloco tem as suas categorias: unidas, a coluna continua categórica
+            categoricas = {
+                coluna: unir_categorias([self.esqueleto[coluna].dtype, vazio[coluna].dtype])
+                for coluna in vazio.columns.intersection(self.esqueleto.columns)
+                if isinstance(self.esqueleto[coluna].dtype, pd.CategoricalDtype)
+                and isinstance(vazio[coluna].dtype, pd.CategoricalDtype)
+            }
+            self.esqueleto = pd.concat([self.esqueleto.astype(categoricas), vazio.astype(categoricas)])
+        self.ausentes = self.ausentes.add(bloco.isnull().sum(), fill_value=0)
+        self.memoria += bloco.memory_usage(deep=True).sum()
+
+        for coluna in bloco.columns:
+            serie = bloco[coluna]
+            if not is_numeric_dtype(serie.dtype) or is_bool_dtype(serie.dtype):
+                continue
+            contagem = serie.value_counts()
+            anterior = self.histogramas.get(coluna)
+            self.histogramas[coluna] = contagem if anterior is None else anterior.add(contagem, fill_value=0)
+
+    def _describe(self, coluna) -> Dict[str, float]:
+        histograma = self.histogramas.get(coluna, pd.Series(dtype="float64")).sort_index()
+        valores = histograma.index.to_numpy(dtype="float64")
+        contagens = histograma.to_numpy(dtype="float64")
+        n = contagens.sum()
+
+        if n == 0:
+            return {'count': 0.0, 'mean': np.nan, 'std': np.nan, 'min': np.nan,
+                    '25%': np.nan, '50%': np.nan, '75%': np.nan, 'max': np.nan}
+
+        media = float((valores * contagens).sum() / n)
+        std = float(np.sqrt((contagens * (valores - media) ** 2).sum() / (n - 1))) if n > 1 else np.nan
+
+        return {
+            'count': float(n),
+            'mean': media,
+            'std': std,
+            'min': float(valores[0]),
+            '25%': _quantil(valores, contagens, 0.25),
+            '50%': _quantil(valores, contagens, 0.50),
+            '75%': _quantil(valores, contagens, 0.75),
+            'max': float(valores[-1]),
+        }
+
+    def resultado(self) -> Dict[str, Any]:
+        """Estatísticas no mesmo formato de ProcessadorDados.calcular_estatisticas"""
+        if self.esqueleto is None:
+            raise ValueError("Nenhum bloco processado")
+
+        colunas: List = list(self.esqueleto.columns)
+        ausentes = self.ausentes.reindex(colunas, fill_value=0).astype("int64")
+        total = self.total_linhas
+
+        estatisticas = {
+            'total_linhas': total,
+            'total_colunas': len(colunas),
+            'colunas': colunas,
+            'tipos_dados': self.esqueleto.dtypes.to_dict(),
+            'valores_ausentes': ausentes.to_dict(),
+            'percentual_ausentes': (ausentes / total * 100).to_dict(),
+            'memoria_uso': self.memoria / 1024 ** 2  # MB
+        }
+
+        colunas_numericas = self.esqueleto.select_dtypes(include=['number']).columns
+        if len(colunas_numericas) > 0:
+            estatisticas['estatisticas_numericas'] = {
+                coluna: self._describe(coluna) for coluna in colunas_numericas
+            }
+
+        return estatisticas
@@ -0,0 +1,121 @@
+"""
+Gravação dos dados processados em vários formatos, em paralelo
+"""
+
+import importlib.util
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+LINHAS_POR_LOTE_XLSX = 10_000
+ZSTANDARD_DISPONIVEL = importlib.util.find_spec("zstandard") is not None
+
+
+def _csv(df: pd.DataFrame, caminho: Path, compressao: Optional[str] = None) -> None:
+    df.to_csv(caminho, index=False, encoding='utf-8-sig', compression=compressao)
+
+
+def _parquet(df: pd.DataFrame, caminho: Path) -> None:
+    df.to_parquet(caminho, index=False)
+
+
+def _feather(df: pd.DataFrame, caminho: Path) -> None:
+    df.reset_index(drop=True).to_feather(caminho)
+
+
+def _xlsx(df: pd.DataFrame, caminho: Path) -> None:
+    """Grava xlsx com o modo write_only do openpyxl (memória constante)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    planilha = workbook.create_sheet()
+    planilha.append([str(coluna) for coluna in df.columns])
+
+    # O Excel não tem tipo ano-mês: períodos vão como texto "AAAA-MM"
+    periodos = {coluna: "%Y-%m" for coluna in df.columns if isinstance(df[coluna].dtype, pd.PeriodDtype)}
+
+    # Converte por lotes para não duplicar o DataFrame inteiro em objetos Python
+    for inicio in range(0, len(df), LINHAS_POR_LOTE_XLSX):
+        lote = df.iloc[inicio:inicio + LINHAS_POR_LOTE_XLSX]
+        for coluna, formato in periodos.items():
+            lote[coluna] = lote[coluna].dt.strftime(formato)
+        lote = lote.astype(object)
+        lote = lote.where(lote.notna(), None)
+        for linha in lote.itertuples(index=False, name=None):
+            planilha.append(linha)
+
+    workbook.save(caminho)
+
+
+# Formato → (extensão, função de gravação)
+FORMATOS: Dict[str, tuple] = {
+    'csv': ('.csv', _csv),
+    'csv.gz': ('.csv.gz', lambda df, caminho: _csv(df, caminho, 'gzip')),
+    'parquet': ('.parquet', _parquet),
+    'feather': ('.feather', _feather),
+    'xlsx': ('.xlsx', _xlsx),
+}
+if ZSTANDARD_DISPONIVEL:
+    # Compressão zstd do pandas exige o pacote zstandard (opcional)
+    FORMATOS['csv.zst'] = ('.csv.zst', lambda df, caminho: _csv(df, caminho, 'zstd'))
+
+
+def _gravar(escritor: Callable, df: pd.DataFrame, caminho: Path) -> Dict[str, Any]:
+    inicio = time.perf_counter()
+    try:
+        escritor(df, caminho)
+    except Exception as e:
+        # A falha de um formato não descarta os que foram gravados
+        logger.error(f"Erro ao salvar {caminho}: {e}")
+        caminho.unlink(missing_ok=True)
+        return {'caminho': caminho, 'erro': str(e)}
+    segundos = time.perf_counter() - inicio
+    logger.info(f"Dados salvos em: {caminho} ({segundos:.2f}s)")
+    return {'caminho': caminho, 'segundos': segundos, 'bytes': caminho.stat().st_size}
+
+
+def salvar_formatos(
+        df: pd.DataFrame,
+        diretorio: Path,
+        nome_arquivo: str,
+        formatos: Sequence[str],
+        max_workers: Optional[int] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Grava o DataFrame em cada formato, simultaneamente em um pool de threads
+
+    Args:
+        df (pd.DataFrame): Dados a gravar
+        diretorio (Path): Diretório de saída
+        nome_arquivo (str): Nome base dos arquivos (sem extensão)
+        formatos (list): Formatos de FORMATOS ('csv', 'csv.gz', 'parquet', 'feather', 'xlsx'
+            e 'csv.zst', se o pacote zstandard estiver instalado)
+        max_workers (int): Número de threads (padrão: um por formato)
+
+    Returns:
+        dict: Formato → {'caminho', 'segundos', 'bytes'}, ou {'caminho', 'erro'}
+            para o formato que falhou
+    """
+    desconhecidos = [f for f in formatos if f not in FORMATOS]
+    if desconhecidos:
+        raise ValueError(f"Formato(s) inválido(s): {', '.join(desconhecidos)}")
+    if not formatos:
+        raise ValueError("Nenhum formato informado")
+
+    diretorio.mkdir(parents=True, exist_ok=True)
+    formatos = list(dict.fromkeys(formatos))
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(formatos)) as executor:
+        futuros = {
+            formato: executor.submit(
+                _gravar, FORMATOS[formato][1], df, diretorio / f"{nome_arquivo}{FORMATOS[formato][0]}"
+            )
+            for formato in formatos
+        }
+        return {formato: futuro.result() for formato, futuro in futuros.items()}
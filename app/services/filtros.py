@@ -0,0 +1,167 @@
+"""
+Índice de filtros para os multiselects dos dashboards
+"""
+
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class IndiceFiltros:
+    """
+    Índice construído uma vez por conjunto de dados para filtrar por valores.
+
+    Cada coluna indexada vira códigos inteiros (como uma categórica), com as
+    posições das linhas de cada valor pré-calculadas. Filtros de um
+    multiselect são a união das posições dos valores escolhidos, e filtros em
+    colunas diferentes são a interseção dessas uniões. As medidas são
+    pré-somadas por combinação de valores (baldes), então totais filtrados
+    não precisam percorrer as linhas.
+    """
+
+    # Seleções com menos de 1/FRACAO_POSICOES das linhas usam as posições em vez da máscara
+    FRACAO_POSICOES = 16
+
+    def __init__(self, df: pd.DataFrame, colunas: Sequence[str], medidas: Sequence[str] = ()):
+        """
+        Args:
+            df (pd.DataFrame): Dados indexados (não devem ser alterados depois)
+            colunas (list): Colunas usadas em filtros
+            medidas (list): Colunas numéricas pré-somadas por combinação de valores
+        """
+        if not colunas:
+            raise ValueError("Informe ao menos uma coluna para o índice de filtros")
+
+        self.total_linhas = len(df)
+        self.colunas = list(colunas)
+        self.medidas = list(medidas)
+        self.codigos: Dict[str, np.ndarray] = {}
+        self.valores: Dict[str, pd.Index] = {}
+        self._posicoes: Dict[str, List[np.ndarray]] = {}
+        self._tamanhos: Dict[str, np.ndarray] = {}
+
+        for coluna in self.colunas:
+            codigos, valores = pd.factorize(df[coluna], sort=True, use_na_sentinel=False)
+            self.codigos[coluna] = codigos
+            self.valores[coluna] = pd.Index(valores)
+
+            # Posições de cada valor: ordena os códigos uma vez e corta nos limites
+            ordem = np.argsort(codigos, kind="stable")
+            self._tamanhos[coluna] = np.bincount(codigos, minlength=len(valores))
+            self._posicoes[coluna] = np.split(ordem, np.cumsum(self._tamanhos[coluna])[:-1])
+
+        # Baldes: uma célula por combinação de valores das colunas indexadas
+        self._formato = tuple(len(self.valores[c]) for c in self.colunas)
+        celulas = np.ravel_multi_index([self.codigos[c] for c in self.colunas], self._formato)
+        tamanho = int(np.prod(self._formato))
+        self._contagens = np.bincount(celulas, minlength=tamanho).reshape(self._formato)
+        self._somas: Dict[str, np.ndarray] = {}
+        for medida in self.medidas:
+            valores = pd.to_numeric(df[medida], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            self._somas[medida] = np.bincount(
+                celulas, weights=np.nan_to_num(valores, nan=0.0), minlength=tamanho
+            ).reshape(self._formato)
+
+    def _codigos_selecionados(self, coluna: str, selecionados: Optional[Sequence]) -> np.ndarray:
+        """Códigos dos valores escolhidos (todos, se None); valores desconhecidos são ignorados"""
+        if selecionados is None:
+            return np.arange(len(self.valores[coluna]))
+        codigos = self.valores[coluna].get_indexer(pd.Index(list(selecionados), dtype=object))
+        return np.unique(codigos[codigos >= 0])
+
+    def posicoes(self, selecoes: Mapping[str, Optional[Sequence]]) -> np.ndarray:
+        """
+        Posições (ordenadas) das linhas que atendem a todos os filtros
+
+        Quando a seleção é pequena, parte da união das posições da coluna mais
+        seletiva e só confere as demais colunas nessas linhas; caso contrário
+        usa a máscara, que percorre os códigos uma vez.
+
+        Args:
+            selecoes (dict): Coluna → valores escolhidos; colunas ausentes ou
+                com None não filtram
+
+        Returns:
+            np.ndarray: Posições para df.iloc
+        """
+        ativos = {
+            coluna: self._codigos_selecionados(coluna, selecionados)
+            for coluna, selecionados in selecoes.items()
+            if selecionados is not None
+        }
+        ativos = {c: cods for c, cods in ativos.items() if len(cods) < len(self.valores[c])}
+        if not ativos:
+            return np.arange(self.total_linhas)
+
+        linhas = {c: int(self._tamanhos[c][cods].sum()) for c, cods in ativos.items()}
+        seletiva = min(linhas, key=linhas.get)
+        if linhas[seletiva] * self.FRACAO_POSICOES > self.total_linhas:
+            return np.flatnonzero(self.mascara(selecoes))
+
+        partes = [self._posicoes[seletiva][c] for c in ativos[seletiva]]
+        resultado = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=np.intp)
+        for coluna, codigos in ativos.items():
+            if coluna == seletiva:
+                continue
+            permitidos = np.zeros(len(self.valores[coluna]), dtype=bool)
+            permitidos[codigos] = True
+            resultado = resultado[permitidos[self.codigos[coluna][resultado]]]
+        return resultado
+
+    def mascara(self, selecoes: Mapping[str, Optional[Sequence]]) -> np.ndarray:
+        """Máscara booleana das linhas que atendem a todos os filtros (equivale a isin combinado com &)"""
+        mascara = np.ones(self.total_linhas, dtype=bool)
+        for coluna, selecionados in selecoes.items():
+            if selecionados is None:
+                continue
+            permitidos = np.zeros(len(self.valores[coluna]), dtype=bool)
+            permitidos[self._codigos_selecionados(coluna, selecionados)] = True
+            mascara &= permitidos[self.codigos[coluna]]
+        return mascara
+
+    def _balde(self, selecoes: Mapping[str, Optional[Sequence]], cubo: np.ndarray):
+        """Recorta o cubo de baldes nos valores escolhidos; devolve o recorte e os códigos de cada eixo"""
+        eixos = [self._codigos_selecionados(c, selecoes.get(c)) for c in self.colunas]
+        return cubo[np.ix_(*eixos)], eixos
+
+    def somar(
+            self,
+            medida: str,
+            selecoes: Mapping[str, Optional[Sequence]],
+            por: Optional[str] = None
+    ):
+        """
+        Soma da medida nas linhas filtradas, a partir dos baldes
+
+        Args:
+            medida (str): Medida pré-somada
+            selecoes (dict): Filtros, como em posicoes
+            por (str): Coluna indexada para quebrar o total (opcional)
+
+        Returns:
+            float | pd.Series: Total, ou totais por valor de `por` (só valores com linhas)
+        """
+        if medida not in self._somas:
+            raise ValueError(f"Medida não indexada: {medida}")
+        return self._reduzir(self._somas[medida], selecoes, por, medida)
+
+    def contar(self, selecoes: Mapping[str, Optional[Sequence]], por: Optional[str] = None):
+        """Número de linhas filtradas, a partir dos baldes (total ou por valor de `por`)"""
+        return self._reduzir(self._contagens, selecoes, por, "linhas")
+
+    def _reduzir(self, cubo: np.ndarray, selecoes, por: Optional[str], nome: str):
+        recorte, eixos = self._balde(selecoes, cubo)
+        if por is None:
+            return recorte.sum().item()
+
+        if por not in self.colunas:
+            raise ValueError(f"Coluna não indexada: {por}")
+        eixo = self.colunas.index(por)
+        outros = tuple(i for i in range(len(self.colunas)) if i != eixo)
+        totais = recorte.sum(axis=outros)
+        linhas = self._balde(selecoes, self._contagens)[0].sum(axis=outros)
+
+        serie = pd.Series(totais, index=self.valores[por][eixos[eixo]], name=nome)
+        serie.index.name = por
+        return serie[linhas > 0]
@@ -1,13 +1,96 @@
-import matplotlib.pyplot as plt
+import hashlib
 import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
+import pandas as pd
 
 from app.config import GRAFICOS_DIR
+from app.services.perfil import instrumentar
 
 logger = logging.getLogger(__name__)
 
+TIPOS_GRAFICO = ["bar", "line"]
+TAMANHO_FIGURA = (10, 6)
+# Abaixo disso, abrir o pool custa mais que desenhar os gráficos em série
+MINIMO_LOTE_PARALELO = 4
 
+# Incrementar quando o desenho mudar, para invalidar os PNGs em cache
+VERSAO_DESENHO = 1
+_PADRAO_ARQUIVO = re.compile(r"^(?P<nome>.+)_(?P<hash>[0-9a-f]{12})\.png$")
+
+# Figura reaproveitada por processo (e por thread) no modo em lote
+_figura_lote = threading.local()
+
+
+def _desenhar(ax, df, coluna_x: str, coluna_y: str, titulo: str, tipo: str, ordenar: bool) -> None:
+    """Desenha o gráfico em um Axes (comum a gerar e gerar_lote)"""
+    if ordenar:
+        df = df.sort_values(coluna_y, ascending=False)
+
+    if tipo == "bar":
+        ax.bar(df[coluna_x].astype(str), df[coluna_y])
+    elif tipo == "line":
+        ax.plot(df[coluna_x], df[coluna_y])
+    else:
+        raise ValueError("Tipo de gráfico inválido")
+
+    ax.set_title(titulo)
+    ax.set_xlabel(coluna_x)
+    ax.set_ylabel(coluna_y)
+    ax.tick_params(axis="x", labelrotation=45)
+
+
+def _nome_padrao(titulo: str) -> str:
+    return titulo.lower().replace(" ", "_")
+
+
+def hash_grafico(df, coluna_x: str, coluna_y: str, titulo: str, tipo: str, ordenar: bool) -> str:
+    """Hash das entradas que determinam o PNG: valores, colunas, título, tipo e ordenação"""
+    h = hashlib.blake2b(digest_size=6)
+    h.update(pd.util.hash_pandas_object(df[[coluna_x, coluna_y]], index=False).to_numpy().tobytes())
+    h.update(repr((coluna_x, coluna_y, titulo, tipo, ordenar, TAMANHO_FIGURA, VERSAO_DESENHO)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _renderizar_em_lote(spec: Dict[str, Any], caminho: Path) -> Path:
+    """
+    Renderiza um gráfico sem pyplot, com o backend Agg (executado nos processos do lote)
+
+    A figura é limpa e reaproveitada a cada gráfico, então a memória não
+    cresce com o tamanho do lote. Cada thread tem a sua figura: sem pyplot,
+    threads diferentes podem renderizar ao mesmo tempo.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figura = getattr(_figura_lote, "figura", None)
+    if figura is None:
+        figura = _figura_lote.figura = Figure(figsize=TAMANHO_FIGURA)
+        FigureCanvasAgg(figura)
+    else:
+        figura.clear()
+
+    ax = figura.add_subplot()
+    _desenhar(
+        ax,
+        spec["df"],
+        spec["coluna_x"],
+        spec["coluna_y"],
+        spec["titulo"],
+        spec.get("tipo", "bar"),
+        spec.get("ordenar", True)
+    )
+    figura.tight_layout()
+    figura.savefig(caminho)
+    return caminho
+
+
+@instrumentar
 class GraficoService:
     """
     Serviço responsável por geração de gráficos.
@@ -15,7 +98,28 @@ class GraficoService:
 
     def __init__(self):
         self.output_dir = GRAFICOS_DIR / "graficos"
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.renderizados = 0
+        self.reutilizados = 0
+
+    def _caminho_em_cache(
+        self,
+        df,
+        coluna_x: str,
+        coluna_y: str,
+        titulo: str,
+        tipo: str,
+        ordenar: bool,
+        nome_arquivo: Optional[str]
+    ) -> Tuple[Path, bool]:
+        """Caminho endereçado pelo conteúdo ("nome_<hash>.png") e se ele já existe"""
+        chave = hash_grafico(df, coluna_x, coluna_y, titulo, tipo, ordenar)
+        caminho = self.output_dir / f"{nome_arquivo or _nome_padrao(titulo)}_{chave}.png"
+        return caminho, caminho.exists()
+
+    def _reutilizar(self, caminho: Path) -> None:
+        """Conta o reuso e atualiza o mtime, marcando o PNG como em uso para limpar_obsoletos"""
+        caminho.touch()
+        self.reutilizados += 1
 
     def gerar(
         self,
@@ -26,41 +130,151 @@ class GraficoService:
         tipo: str = "bar",
         ordenar: bool = True,
         salvar: bool = True,
-        nome_arquivo: str = None
+        nome_arquivo: str = None,
+        mostrar: bool = True
     ) -> Path | None:
+        """
+        Gera um gráfico e salva o PNG como "nome_<hash>.png"
+
+        O hash cobre os valores de coluna_x/coluna_y, título, tipo e
+        ordenação. Com mostrar=False e o PNG já existente, ele é devolvido
+        sem chamar o matplotlib; com mostrar=True (padrão) o gráfico é
+        desenhado para exibição na tela, mas um PNG existente não é regravado.
+        """
 
         if df.empty:
             raise ValueError("DataFrame vazio para geração de gráfico")
 
-        if ordenar:
-            df = df.sort_values(coluna_y, ascending=False)
-
-        plt.figure(figsize=(10, 6))
-
-        if tipo == "bar":
-            plt.bar(df[coluna_x].astype(str), df[coluna_y])
-        elif tipo == "line":
-            plt.plot(df[coluna_x], df[coluna_y])
-        else:
+        if tipo not in TIPOS_GRAFICO:
             raise ValueError("Tipo de gráfico inválido")
 
-        plt.title(titulo)
-        plt.xlabel(coluna_x)
-        plt.ylabel(coluna_y)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-
         caminho = None
+        existente = False
 
         if salvar:
-            if not nome_arquivo:
-                nome_arquivo = titulo.lower().replace(" ", "_")
+            caminho, existente = self._caminho_em_cache(
+                df, coluna_x, coluna_y, titulo, tipo, ordenar, nome_arquivo
+            )
+            if existente:
+                self._reutilizar(caminho)
+                logger.info(f"Gráfico reutilizado: {caminho}")
+                if not mostrar:
+                    return caminho
+
+        # pyplot só é importado quando um gráfico é de fato desenhado
+        import matplotlib.pyplot as plt
+
+        if not existente:
+            self.renderizados += 1
+        fig, ax = plt.subplots(figsize=TAMANHO_FIGURA)
 
-            caminho = self.output_dir / f"{nome_arquivo}.png"
-            plt.savefig(caminho)
-            logger.info(f"Gráfico salvo em {caminho}")
+        try:
+            _desenhar(ax, df, coluna_x, coluna_y, titulo, tipo, ordenar)
+            fig.tight_layout()
 
-        plt.show()
+            if salvar and not existente:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                fig.savefig(caminho)
+                logger.info(f"Gráfico salvo em {caminho}")
+
+            if mostrar:
+                plt.show()
+        finally:
+            plt.close(fig)
 
         return caminho
 
+    def gerar_lote(
+        self,
+        specs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None
+    ) -> List[Path]:
+        """
+        Renderiza vários gráficos sem interface, em paralelo
+
+        Cada gráfico é desenhado com o backend Agg em um pool de processos,
+        sem plt.show() e sem acumular figuras abertas; lotes com menos de
+        MINIMO_LOTE_PARALELO gráficos a renderizar são desenhados em série, sem
+        abrir o pool. Gráficos cujo PNG já existe (mesmo hash de entradas) não
+        são renderizados de novo.
+
+        Args:
+            specs (list): Dicionários com os argumentos de gerar (df, coluna_x,
+                coluna_y, titulo e, opcionalmente, tipo, ordenar, nome_arquivo)
+            max_workers (int): Número de processos (padrão: núcleos disponíveis)
+
+        Returns:
+            list: Caminhos dos PNGs, na ordem das specs
+        """
+        for spec in specs:
+            if spec["df"].empty:
+                raise ValueError(f"DataFrame vazio para o gráfico '{spec['titulo']}'")
+            if spec.get("tipo", "bar") not in TIPOS_GRAFICO:
+                raise ValueError("Tipo de gráfico inválido")
+
+        caminhos = []
+        pendentes = []
+        for spec in specs:
+            caminho, existente = self._caminho_em_cache(
+                spec["df"],
+                spec["coluna_x"],
+                spec["coluna_y"],
+                spec["titulo"],
+                spec.get("tipo", "bar"),
+                spec.get("ordenar", True),
+                spec.get("nome_arquivo")
+            )
+            caminhos.append(caminho)
+            if existente:
+                self._reutilizar(caminho)
+            elif caminho not in (c for _, c in pendentes):
+                pendentes.append((spec, caminho))
+
+        self.renderizados += len(pendentes)
+        if pendentes:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        processos = max(1, min(len(pendentes), max_workers or os.cpu_count() or 1))
+        if len(pendentes) < MINIMO_LOTE_PARALELO:
+            processos = 1
+
+        if processos > 1:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                list(executor.map(_renderizar_em_lote, *zip(*pendentes)))
+        else:
+            for spec, caminho in pendentes:
+                _renderizar_em_lote(spec, caminho)
+
+        logger.info(
+            f"Lote de {len(specs)} gráfico(s): {len(pendentes)} renderizado(s) com {processos} processo(s), "
+            f"{len(specs) - len(pendentes)} reutilizado(s) ou repetido(s)"
+        )
+
+        return caminhos
+
+    def limpar_obsoletos(self) -> List[Path]:
+        """
+        Remove PNGs substituídos por versões mais novas do mesmo gráfico
+
+        Para cada nome de gráfico mantém apenas o PNG usado (gerado ou
+        reutilizado) mais recentemente.
+
+        Returns:
+            list: Caminhos removidos
+        """
+        por_nome: Dict[str, List[Path]] = {}
+        for caminho in self.output_dir.glob("*.png"):
+            correspondencia = _PADRAO_ARQUIVO.match(caminho.name)
+            if correspondencia:
+                por_nome.setdefault(correspondencia["nome"], []).append(caminho)
+
+        removidos = []
+        for caminhos in por_nome.values():
+            caminhos.sort(key=lambda c: c.stat().st_mtime_ns, reverse=True)
+            for obsoleto in caminhos[1:]:
+                obsoleto.unlink(missing_ok=True)
+                removidos.append(obsoleto)
+
+        logger.info(f"{len(removidos)} gráfico(s) obsoleto(s) removido(s)")
+
+        return removidos
@@ -0,0 +1,99 @@
+"""
+Impressões digitais (hashes de 64 bits) de linhas de DataFrames
+"""
+
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype, is_string_dtype
+
+from app.config import COLUNAS_DERIVADAS
+
+_MULTIPLICADOR = np.uint64(1000003)
+
+
+def colunas_chave_padrao(df: pd.DataFrame) -> List[str]:
+    """
+    Colunas da chave padrão: todas as da planilha, sem as criadas na carga
+
+    ORIGEM difere entre planilhas e PERÍODO é derivada de outras colunas;
+    com elas na chave, a mesma linha lida de dois arquivos não seria duplicata.
+    """
+    return [coluna for coluna in df.columns if coluna not in COLUNAS_DERIVADAS]
+
+
+def calcular_impressoes(df: pd.DataFrame, colunas: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Calcula um hash de 64 bits por linha
+
+    Colunas numéricas são normalizadas para float64, de modo que o mesmo valor
+    gere o mesmo hash em int64, Int8 ou float64 (blocos diferentes da mesma
+    planilha podem inferir tipos diferentes).
+
+    Args:
+        df (pd.DataFrame): Dados de origem
+        colunas (list): Subconjunto de colunas usado como chave (padrão: colunas_chave_padrao)
+
+    Returns:
+        np.ndarray: Array uint64 com um hash por linha
+    """
+    dados = df[colunas_chave_padrao(df) if colunas is None else list(colunas)]
+    impressoes = np.zeros(len(dados), dtype=np.uint64)
+
+    for i in range(dados.shape[1]):
+        serie = dados.iloc[:, i]
+        if is_numeric_dtype(serie.dtype) and not is_bool_dtype(serie.dtype):
+            serie = pd.Series(serie.to_numpy(dtype="float64", na_value=np.nan))
+        elif is_string_dtype(serie.dtype) and not isinstance(serie.dtype, pd.CategoricalDtype):
+            # Hash dos valores distintos + códigos: mesmo resultado, bem mais rápido
+            serie = serie.astype("category")
+
+        hashes = pd.util.hash_pandas_object(serie, index=False).to_numpy()
+        impressoes = (impressoes * _MULTIPLICADOR) ^ hashes
+
+    return impressoes
+
+
+def carregar_impressoes(caminho: Path) -> np.ndarray:
+    """Lê impressões persistidas (array ordenado e sem repetições); vazio se não existir"""
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return np.empty(0, dtype=np.uint64)
+    return np.load(caminho)
+
+
+def incorporar_impressoes(conhecidas: np.ndarray, novas: np.ndarray) -> np.ndarray:
+    """
+    Insere impressões novas em um array ordenado e sem repetições
+
+    Só as novas são ordenadas; as posições no histórico vêm de busca binária,
+    sem reordenar o que já estava gravado.
+    """
+    novas = np.unique(novas)
+    novas = novas[~ja_vistas(novas, conhecidas)]
+    return np.insert(conhecidas, np.searchsorted(conhecidas, novas), novas)
+
+
+def salvar_impressoes(caminho: Path, impressoes: np.ndarray) -> None:
+    """Persiste impressões já ordenadas e sem repetições (ver incorporar_impressoes) em .npy"""
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    with open(temporario, "wb") as f:
+        np.save(f, impressoes)
+    temporario.replace(caminho)
+
+
+def ja_vistas(impressoes: np.ndarray, conhecidas: np.ndarray) -> np.ndarray:
+    """
+    Indica quais impressões já constam em `conhecidas` (ordenado)
+
+    Usa busca binária: o custo cresce com as impressões novas, O(k log n).
+    """
+    if len(conhecidas) == 0:
+        return np.zeros(len(impressoes), dtype=bool)
+    posicoes = np.searchsorted(conhecidas, impressoes)
+    posicoes[posicoes == len(conhecidas)] = 0
+    return conhecidas[posicoes] == impressoes
@@ -0,0 +1,102 @@
+"""
+Estado persistido para ingestão incremental: cubo agregado e impressões das linhas já vistas
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services.cubo import combinar_cubos, construir_cubo
+from app.services.impressoes import (
+    calcular_impressoes, carregar_impressoes, colunas_chave_padrao, incorporar_impressoes, ja_vistas,
+    salvar_impressoes
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EstadoIncremental:
+    """
+    Guarda em disco o cubo (somas, contagens, mínimos e máximos combináveis)
+    e as impressões digitais das linhas já incorporadas.
+
+    A cada atualização apenas as linhas ainda não vistas são agregadas e
+    combinadas ao cubo existente.
+    """
+
+    def __init__(self, diretorio: Path):
+        self.diretorio = Path(diretorio)
+        self.caminho_cubo = self.diretorio / "cubo.parquet"
+        self.caminho_impressoes = self.diretorio / "impressoes.npy"
+        self.caminho_metadados = self.diretorio / "estado.json"
+        self.cubo: Optional[pd.DataFrame] = None
+        self.impressoes = np.empty(0, dtype=np.uint64)
+        self.metadados: Dict[str, Any] = {'total_linhas': 0, 'colunas_chave': None}
+
+    def carregar(self) -> "EstadoIncremental":
+        """Lê o estado persistido, se existir"""
+        if self.caminho_cubo.exists():
+            self.cubo = pd.read_parquet(self.caminho_cubo)
+        self.impressoes = carregar_impressoes(self.caminho_impressoes)
+        if self.caminho_metadados.exists():
+            self.metadados = json.loads(self.caminho_metadados.read_text(encoding="utf-8"))
+        return self
+
+    def salvar(self) -> None:
+        """Persiste o estado atual"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        if self.cubo is not None:
+            temporario = self.caminho_cubo.with_suffix(".tmp")
+            self.cubo.to_parquet(temporario)
+            temporario.replace(self.caminho_cubo)
+        salvar_impressoes(self.caminho_impressoes, self.impressoes)
+        self.caminho_metadados.write_text(json.dumps(self.metadados, ensure_ascii=False), encoding="utf-8")
+
+    def incorporar(self, df: pd.DataFrame, colunas_chave: Optional[Sequence[str]] = None) -> Dict[str, int]:
+        """
+        Agrega apenas as linhas de `df` ainda não vistas e as combina ao estado
+
+        A lista de colunas efetivamente usada na chave fica gravada no estado;
+        atualizações seguintes precisam resolver para a mesma lista, na mesma
+        ordem, ou as impressões não seriam comparáveis.
+
+        Args:
+            df (pd.DataFrame): Dados carregados (ex.: a planilha do mês)
+            colunas_chave (list): Colunas que identificam uma linha (padrão:
+                colunas_chave_padrao, as colunas da planilha sem ORIGEM e PERÍODO)
+
+        Returns:
+            dict: linhas_novas, linhas_ignoradas e total_linhas acumulado
+        """
+        colunas = list(colunas_chave) if colunas_chave else colunas_chave_padrao(df)
+        faltando = [coluna for coluna in colunas if coluna not in df.columns]
+        if faltando:
+            raise ValueError(f"Coluna(s) da chave ausente(s) nos dados: {', '.join(map(str, faltando))}")
+
+        if len(self.impressoes) and self.metadados.get('colunas_chave') != colunas:
+            raise ValueError(
+                f"Colunas da chave ({colunas}) diferentes das usadas no estado persistido "
+                f"({self.metadados.get('colunas_chave')}); use as mesmas colunas ou recrie o estado"
+            )
+
+        impressoes = calcular_impressoes(df, colunas)
+        novas = ~ja_vistas(impressoes, self.impressoes)
+        novas &= ~pd.Series(impressoes).duplicated().to_numpy()
+
+        linhas_novas = int(novas.sum())
+        if linhas_novas:
+            self.cubo = combinar_cubos(self.cubo, construir_cubo(df[novas]))
+            self.impressoes = incorporar_impressoes(self.impressoes, impressoes[novas])
+
+        self.metadados['total_linhas'] = self.metadados.get('total_linhas', 0) + linhas_novas
+        self.metadados['colunas_chave'] = colunas
+
+        return {
+            'linhas_novas': linhas_novas,
+            'linhas_ignoradas': len(df) - linhas_novas,
+            'total_linhas': self.metadados['total_linhas'],
+        }
@@ -0,0 +1,190 @@
+"""
+Leitura de planilhas Excel em blocos com memória limitada
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from app.config import NA_VALUES, TAMANHO_BLOCO
+from app.services.cache import CacheColunar, chave_cache, PYARROW_DISPONIVEL
+
+logger = logging.getLogger(__name__)
+
+# Textos que pd.read_excel trata como ausentes por padrão (keep_default_na=True)
+NULOS_PADRAO = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+
+
+def ler_excel(
+        path_file: Path,
+        params: Dict[str, Any],
+        cache: Optional[CacheColunar] = None
+) -> pd.DataFrame:
+    """
+    Lê uma planilha com pd.read_excel, passando pelo cache colunar quando possível
+
+    Args:
+        path_file (Path): Arquivo Excel
+        params (dict): Parâmetros para pd.read_excel
+        cache (CacheColunar): Cache de snapshots; None desativa o cache
+
+    Returns:
+        pd.DataFrame: Dados lidos
+    """
+    # Abas múltiplas (sheet_name=None ou lista) retornam dict e não vão ao cache
+    sheet_name = params.get('sheet_name', 0)
+    if cache is None or not PYARROW_DISPONIVEL or sheet_name is None or isinstance(sheet_name, list):
+        return pd.read_excel(path_file, **params)
+
+    chave = chave_cache(path_file, params)
+    df = cache.ler(path_file, chave)
+
+    if df is not None:
+        logger.info(f"Cache hit: snapshot {cache.caminho_snapshot(path_file, chave).name}")
+        return df
+
+    logger.info(f"Cache miss: lendo planilha Excel {Path(path_file).name}")
+    df = pd.read_excel(path_file, **params)
+    cache.gravar(path_file, chave, df)
+    return df
+
+
+def listar_abas(path_file: Path) -> List[str]:
+    """Lista os nomes das abas de um arquivo Excel"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path_file, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def normalizar_colunas(df: pd.DataFrame) -> pd.DataFrame:
+    """Remove espaços nas bordas dos nomes de colunas para alinhar planilhas diferentes"""
+    df.columns = [col.strip() if isinstance(col, str) else col for col in df.columns]
+    return df
+
+
+def ler_aba(tarefa: Tuple[Path, Union[int, str], Sequence[str], Optional[Path]]) -> Tuple[pd.DataFrame, float]:
+    """
+    Lê uma aba de um arquivo (executado nos processos de carregar_multiplos)
+
+    Args:
+        tarefa (tuple): Arquivo, aba, NA_VALUES e diretório do cache (ou None)
+
+    Returns:
+        tuple: DataFrame com colunas normalizadas e tempo de leitura em segundos
+    """
+    path_file, sheet_name, na_values, dir_cache = tarefa
+    inicio = time.perf_counter()
+
+    cache = CacheColunar(dir_cache) if dir_cache is not None else None
+    df = ler_excel(path_file, {'sheet_name': sheet_name, 'na_values': list(na_values)}, cache)
+
+    return normalizar_colunas(df), time.perf_counter() - inicio
+
+
+def _nomes_colunas(cabecalho: Sequence) -> List:
+    """Reproduz os nomes de colunas gerados por pd.read_excel"""
+    nomes = []
+    vistos = {}
+    for i, nome in enumerate(cabecalho):
+        if nome is None:
+            nome = f"Unnamed: {i}"
+        if nome in vistos:
+            vistos[nome] += 1
+            nome = f"{nome}.{vistos[nome]}"
+        else:
+            vistos[nome] = 0
+        nomes.append(nome)
+    return nomes
+
+
+def _montar_bloco(linhas: List[tuple], colunas: List, nulos: set) -> pd.DataFrame:
+    """Converte as linhas cruas do openpyxl em um DataFrame tipado"""
+    largura = len(colunas)
+    registros = [
+        tuple(
+            None if isinstance(valor, str) and valor in nulos else valor
+            for valor in (linha + (None,) * (largura - len(linha)))[:largura]
+        )
+        for linha in linhas
+    ]
+    return pd.DataFrame.from_records(registros, columns=colunas).infer_objects()
+
+
+def ler_excel_em_blocos(
+        path_file: Path,
+        sheet_name: Union[int, str] = 0,
+        tamanho_bloco: int = TAMANHO_BLOCO,
+        na_values: Sequence[str] = NA_VALUES
+) -> Iterator[pd.DataFrame]:
+    """
+    Lê uma aba com openpyxl em modo read_only, em blocos de linhas
+
+    Args:
+        path_file (Path): Arquivo Excel
+        sheet_name (int | str): Índice ou nome da aba
+        tamanho_bloco (int): Número máximo de linhas por bloco
+        na_values (list): Textos tratados como ausentes (além dos padrões do pandas)
+
+    Yields:
+        pd.DataFrame: Bloco com até tamanho_bloco linhas
+    """
+    from openpyxl import load_workbook
+
+    if tamanho_bloco < 1:
+        raise ValueError("tamanho_bloco deve ser positivo")
+
+    nulos = NULOS_PADRAO | set(na_values)
+    workbook = load_workbook(path_file, read_only=True, data_only=True)
+
+    try:
+        if isinstance(sheet_name, int):
+            planilha = workbook.worksheets[sheet_name]
+        else:
+            planilha = workbook[sheet_name]
+
+        linhas = planilha.iter_rows(values_only=True)
+        cabecalho = next(linhas, None)
+        if cabecalho is None:
+            return
+
+        # Descarta colunas vazias à direita do cabeçalho, como pd.read_excel
+        while cabecalho and cabecalho[-1] is None:
+            cabecalho = cabecalho[:-1]
+        colunas = _nomes_colunas(cabecalho)
+
+        vazia = (None,) * len(colunas)
+        bloco = []
+        vazias = 0
+        for linha in linhas:
+            # Linhas vazias só entram se houver dados depois delas: guarda-se a contagem
+            if all(valor is None for valor in linha):
+                vazias += 1
+                continue
+
+            while vazias:
+                n = min(vazias, tamanho_bloco - len(bloco))
+                bloco.extend([vazia] * n)
+                vazias -= n
+                if len(bloco) >= tamanho_bloco:
+                    yield _montar_bloco(bloco, colunas, nulos)
+                    bloco = []
+
+            bloco.append(linha)
+            if len(bloco) >= tamanho_bloco:
+                yield _montar_bloco(bloco, colunas, nulos)
+                bloco = []
+
+        if bloco:
+            yield _montar_bloco(bloco, colunas, nulos)
+    finally:
+        workbook.close()
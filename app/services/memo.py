@@ -0,0 +1,63 @@
+"""
+Cache LRU em memória com contadores de acerto
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class CacheLRU:
+    """
+    Cache LRU limitado por número de entradas.
+
+    Com tamanho_maximo=0 o cache fica desativado: nada é guardado e toda
+    consulta conta como falta.
+    """
+
+    def __init__(self, tamanho_maximo: int = 128):
+        if tamanho_maximo < 0:
+            raise ValueError("tamanho_maximo não pode ser negativo")
+        self.tamanho_maximo = tamanho_maximo
+        self.hits = 0
+        self.misses = 0
+        self._itens: OrderedDict = OrderedDict()
+
+    @property
+    def ativo(self) -> bool:
+        return self.tamanho_maximo > 0
+
+    def obter(self, chave: Hashable) -> Optional[Any]:
+        """Retorna o valor da chave (marcando-o como mais recente) ou None"""
+        if chave in self._itens:
+            self._itens.move_to_end(chave)
+            self.hits += 1
+            return self._itens[chave]
+
+        self.misses += 1
+        return None
+
+    def guardar(self, chave: Hashable, valor: Any) -> None:
+        """Guarda o valor, descartando as entradas menos recentes acima do limite"""
+        if not self.ativo:
+            return
+
+        self._itens[chave] = valor
+        self._itens.move_to_end(chave)
+        while len(self._itens) > self.tamanho_maximo:
+            self._itens.popitem(last=False)
+
+    def limpar(self) -> None:
+        """Remove todas as entradas (os contadores são mantidos)"""
+        self._itens.clear()
+
+    def info(self) -> Dict[str, int]:
+        """Contadores e ocupação do cache"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'tamanho': len(self._itens),
+            'tamanho_maximo': self.tamanho_maximo,
+        }
+
+    def __len__(self) -> int:
+        return len(self._itens)
@@ -0,0 +1,237 @@
+"""
+Instrumentação por etapa: tempo, CPU, linhas e memória de cada método público
+"""
+
+import cProfile
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+import pandas as pd
+
+__all__ = ["Perfilador", "RegistroEtapa", "instrumentar", "perfilador_ativo"]
+
+# Perfilador em uso; None desliga a instrumentação (custo de uma comparação por chamada)
+_ativo: Optional["Perfilador"] = None
+
+
+@dataclass
+class RegistroEtapa:
+    """Medições de uma chamada instrumentada"""
+    etapa: str
+    inicio_s: float
+    wall_s: float
+    cpu_s: float
+    linhas_entrada: Optional[int]
+    linhas_saida: Optional[int]
+    memoria_pico_mb: Optional[float]
+    profundidade: int
+    thread: str
+    erro: Optional[str] = None
+
+
+def _contar_linhas(valor: Any) -> Optional[int]:
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        return len(valor)
+    return None
+
+
+def _linhas_entrada(instancia: Any, args: tuple) -> Optional[int]:
+    """Linhas do primeiro DataFrame dos argumentos, ou de instancia.df"""
+    for arg in args:
+        linhas = _contar_linhas(arg)
+        if linhas is not None:
+            return linhas
+    return _contar_linhas(getattr(instancia, "df", None))
+
+
+class Perfilador:
+    """
+    Coleta os registros das etapas instrumentadas enquanto estiver ativo.
+
+    O pico de memória é o do tracemalloc, medido por etapa: etapas aninhadas
+    zeram o pico localmente e o repassam à etapa de fora ao terminar. Com
+    cprofile=True, cada etapa de primeiro nível roda sob o cProfile e as
+    estatísticas da mais lenta ficam guardadas para salvar_cprofile.
+    """
+
+    def __init__(self, memoria: bool = True, cprofile: bool = False):
+        """
+        Args:
+            memoria (bool): Mede o pico de memória com tracemalloc (deixa o código mais lento)
+            cprofile (bool): Perfila as etapas de primeiro nível e guarda a mais lenta
+        """
+        self.memoria = memoria
+        self.cprofile = cprofile
+        self.registros: List[RegistroEtapa] = []
+        self.mais_lenta: Optional[RegistroEtapa] = None
+        self._perfil_mais_lento: Optional[cProfile.Profile] = None
+        self._inicio = time.perf_counter()
+        self._local = threading.local()
+        self._trava = threading.Lock()
+        self._iniciou_tracemalloc = False
+
+    def __enter__(self) -> "Perfilador":
+        global _ativo
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        self._inicio = time.perf_counter()
+        _ativo = self
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _ativo
+        _ativo = None
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def _pilha(self) -> list:
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    def executar(self, etapa: str, func: Callable, args: tuple, kwargs: dict, estatico: bool = False) -> Any:
+        """Executa func(*args, **kwargs) medindo a etapa (args[0] é a instância, exceto em métodos estáticos)"""
+        instancia = None if estatico else args[0]
+        pilha = self._pilha()
+        profundidade = len(pilha)
+        medir_memoria = self.memoria and tracemalloc.is_tracing()
+
+        quadro = {'pico_filhas': 0}
+        if medir_memoria:
+            atual, pico_anterior = tracemalloc.get_traced_memory()
+            quadro['base'] = atual
+            if pilha:
+                pilha[-1]['pico_filhas'] = max(pilha[-1]['pico_filhas'], pico_anterior)
+            tracemalloc.reset_peak()
+        pilha.append(quadro)
+
+        perfil = cProfile.Profile() if self.cprofile and profundidade == 0 else None
+        linhas_entrada = _linhas_entrada(instancia, args if estatico else args[1:])
+        erro = None
+        inicio_cpu = time.process_time()
+        inicio = time.perf_counter()
+        try:
+            if perfil is not None:
+                perfil.enable()
+            resultado = func(*args, **kwargs)
+            return resultado
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+            resultado = None
+            raise
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            wall = time.perf_counter() - inicio
+            cpu = time.process_time() - inicio_cpu
+            pilha.pop()
+
+            memoria_pico_mb = None
+            if medir_memoria and tracemalloc.is_tracing():
+                pico = max(tracemalloc.get_traced_memory()[1], quadro['pico_filhas'])
+                memoria_pico_mb = (pico - quadro['base']) / 1024 ** 2
+                if pilha:
+                    pilha[-1]['pico_filhas'] = max(pilha[-1]['pico_filhas'], pico)
+
+            # Métodos que alteram self.df (carregar_*, limpar_dados) devolvem bool ou None
+            linhas_saida = _contar_linhas(resultado)
+            if linhas_saida is None and (resultado is None or isinstance(resultado, bool)):
+                linhas_saida = _contar_linhas(getattr(instancia, "df", None))
+
+            registro = RegistroEtapa(
+                etapa=etapa,
+                inicio_s=inicio - self._inicio,
+                wall_s=wall,
+                cpu_s=cpu,
+                linhas_entrada=linhas_entrada,
+                linhas_saida=linhas_saida,
+                memoria_pico_mb=memoria_pico_mb,
+                profundidade=profundidade,
+                thread=threading.current_thread().name,
+                erro=erro,
+            )
+            with self._trava:
+                self.registros.append(registro)
+                if perfil is not None and (self.mais_lenta is None or wall > self.mais_lenta.wall_s):
+                    self.mais_lenta = registro
+                    self._perfil_mais_lento = perfil
+
+    def salvar_jsonl(self, caminho: Path) -> Path:
+        """Grava a linha do tempo, um registro JSON por linha, em ordem de início"""
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            for registro in sorted(self.registros, key=lambda r: r.inicio_s):
+                f.write(json.dumps(asdict(registro), ensure_ascii=False) + "\n")
+        return caminho
+
+    def salvar_cprofile(self, caminho: Path) -> Optional[Path]:
+        """Grava as estatísticas do cProfile da etapa mais lenta (abrir com pstats ou snakeviz)"""
+        if self._perfil_mais_lento is None:
+            return None
+        caminho = Path(caminho)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._perfil_mais_lento.dump_stats(caminho)
+        return caminho
+
+    def resumo(self) -> pd.DataFrame:
+        """Totais por etapa: chamadas, tempo, CPU e maior pico de memória"""
+        if not self.registros:
+            return pd.DataFrame(columns=["etapa", "chamadas", "wall_s", "cpu_s", "memoria_pico_mb"])
+        df = pd.DataFrame([asdict(r) for r in self.registros])
+        return (
+            df.groupby("etapa", sort=False)
+            .agg(
+                chamadas=("etapa", "size"),
+                wall_s=("wall_s", "sum"),
+                cpu_s=("cpu_s", "sum"),
+                memoria_pico_mb=("memoria_pico_mb", "max"),
+            )
+            .sort_values("wall_s", ascending=False)
+            .reset_index()
+        )
+
+
+def perfilador_ativo() -> Optional[Perfilador]:
+    """Perfilador em uso, se houver"""
+    return _ativo
+
+
+def _instrumentar_funcao(func: Callable, etapa: str, estatico: bool = False) -> Callable:
+    @functools.wraps(func)
+    def envoltorio(*args, **kwargs):
+        perfilador = _ativo
+        if perfilador is None:
+            return func(*args, **kwargs)
+        return perfilador.executar(etapa, func, args, kwargs, estatico)
+    return envoltorio
+
+
+def instrumentar(classe: type) -> type:
+    """
+    Decorador de classe: instrumenta os métodos públicos definidos na classe
+
+    Métodos geradores ficam de fora (o tempo medido seria só o da criação do
+    gerador). Sem perfilador ativo, a chamada segue direto para o método.
+    """
+    for nome, atributo in list(vars(classe).items()):
+        if nome.startswith("_"):
+            continue
+        etapa = f"{classe.__name__}.{nome}"
+
+        if isinstance(atributo, staticmethod):
+            if not inspect.isgeneratorfunction(atributo.__func__):
+                setattr(classe, nome, staticmethod(_instrumentar_funcao(atributo.__func__, etapa, estatico=True)))
+        elif inspect.isfunction(atributo) and not inspect.isgeneratorfunction(atributo):
+            setattr(classe, nome, _instrumentar_funcao(atributo, etapa))
+
+    return classe
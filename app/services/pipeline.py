@@ -0,0 +1,356 @@
+"""
+Pipeline em etapas (DAG) com resultados intermediários em cache endereçado pelo conteúdo
+"""
+
+import hashlib
+import importlib.util
+import json
+import logging
+import pickle
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import PIPELINE_DIR
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_codigo(funcao: Callable) -> str:
+    """Hash do bytecode e das constantes da função: editar a etapa invalida o cache"""
+    codigo = getattr(funcao, "__code__", None)
+    h = hashlib.blake2b(digest_size=8)
+    if codigo is None:
+        h.update(getattr(funcao, "__qualname__", repr(funcao)).encode("utf-8"))
+    else:
+        h.update(codigo.co_code)
+        h.update(repr(codigo.co_consts).encode("utf-8"))
+        h.update(repr(codigo.co_names).encode("utf-8"))
+    return h.hexdigest()
+
+
+_hashes_modulos: Dict[tuple, str] = {}
+
+
+def _hash_modulo(nome: str) -> str:
+    """
+    Hash do código-fonte de um módulo (sem importá-lo)
+
+    O bytecode da etapa não muda quando muda o código que ela chama (ex.:
+    ProcessadorDados.limpar_dados); os módulos declarados em `modulos` entram
+    na chave por este hash. Recalculado só quando o mtime do arquivo muda.
+    """
+    spec = importlib.util.find_spec(nome)
+    if spec is None or not spec.origin or not Path(spec.origin).is_file():
+        raise ValueError(f"Módulo não encontrado: {nome}")
+
+    caminho = Path(spec.origin)
+    chave = (str(caminho), caminho.stat().st_mtime_ns)
+    if chave not in _hashes_modulos:
+        _hashes_modulos[chave] = hashlib.blake2b(caminho.read_bytes(), digest_size=8).hexdigest()
+    return _hashes_modulos[chave]
+
+
+@dataclass
+class Etapa:
+    """
+    Uma etapa do pipeline
+
+    A função recebe os resultados das `entradas`, na ordem declarada, seguidos
+    dos `parametros` como argumentos nomeados. `modulos` lista os módulos
+    cujo código a etapa executa (o código da própria função já entra na chave).
+    """
+    nome: str
+    funcao: Callable[..., Any]
+    entradas: Sequence[str] = ()
+    parametros: Dict[str, Any] = field(default_factory=dict)
+    versao: str = "1"
+    trava: Optional[str] = None  # etapas com a mesma trava não rodam ao mesmo tempo
+    modulos: Sequence[str] = ()
+
+
+class Pipeline:
+    """
+    Executa etapas declaradas com entradas explícitas, reaproveitando resultados.
+
+    A chave de cada etapa é o hash de nome, versão, código da função e dos
+    módulos que ela chama, parâmetros e do conteúdo dos resultados de entrada. Uma etapa só é
+    executada se não houver resultado gravado para a sua chave; se uma etapa
+    anterior for refeita e produzir o mesmo resultado, as seguintes continuam
+    válidas. Etapas independentes rodam ao mesmo tempo em um pool de threads.
+    """
+
+    def __init__(self, diretorio: Optional[Path] = None):
+        """
+        Args:
+            diretorio (Path): Onde os resultados são gravados (padrão: PIPELINE_DIR)
+        """
+        self.diretorio = Path(diretorio or PIPELINE_DIR)
+        self.etapas: Dict[str, Etapa] = {}
+        self.executadas: List[str] = []
+        self.reutilizadas: List[str] = []
+        self._travas: Dict[str, threading.Lock] = {}
+
+    def adicionar(
+            self,
+            nome: str,
+            funcao: Callable[..., Any],
+            entradas: Sequence[str] = (),
+            parametros: Optional[Dict[str, Any]] = None,
+            versao: str = "1",
+            trava: Optional[str] = None,
+            modulos: Sequence[str] = ()
+    ) -> "Pipeline":
+        """Declara uma etapa; as entradas devem ter sido declaradas antes"""
+        if nome in self.etapas:
+            raise ValueError(f"Etapa repetida: {nome}")
+        faltando = [e for e in entradas if e not in self.etapas]
+        if faltando:
+            raise ValueError(f"Entrada(s) não declarada(s) para {nome}: {', '.join(faltando)}")
+
+        self.etapas[nome] = Etapa(
+            nome, funcao, tuple(entradas), dict(parametros or {}), versao, trava, tuple(modulos)
+        )
+        if trava is not None:
+            self._travas.setdefault(trava, threading.Lock())
+        return self
+
+    def _necessarias(self, alvos: Sequence[str]) -> List[str]:
+        """Alvos e todas as etapas de que dependem, em ordem de declaração (topológica)"""
+        desconhecidas = [a for a in alvos if a not in self.etapas]
+        if desconhecidas:
+            raise ValueError(f"Etapa(s) inexistente(s): {', '.join(desconhecidas)}")
+
+        necessarias = set()
+        pendentes = list(alvos)
+        while pendentes:
+            nome = pendentes.pop()
+            if nome not in necessarias:
+                necessarias.add(nome)
+                pendentes.extend(self.etapas[nome].entradas)
+        return [nome for nome in self.etapas if nome in necessarias]
+
+    def _chave(self, etapa: Etapa, hashes_entradas: Sequence[str]) -> str:
+        conteudo = json.dumps(
+            {
+                'nome': etapa.nome,
+                'versao': etapa.versao,
+                'codigo': _hash_codigo(etapa.funcao),
+                'modulos': {modulo: _hash_modulo(modulo) for modulo in etapa.modulos},
+                'parametros': etapa.parametros,
+                'entradas': list(hashes_entradas),
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.blake2b(conteudo.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _caminhos(self, nome: str, chave: str):
+        base = self.diretorio / f"{nome}_{chave}"
+        return base.with_suffix(".pkl"), base.with_suffix(".json")
+
+    def _ler_meta(self, nome: str, chave: str) -> Optional[Dict[str, Any]]:
+        resultado, meta = self._caminhos(nome, chave)
+        if not (resultado.exists() and meta.exists()):
+            return None
+        try:
+            conteudo = json.loads(meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        # Resultado que aponta para um arquivo (ex.: PNG) só vale se o arquivo existir
+        if conteudo.get('arquivo') and not Path(conteudo['arquivo']).exists():
+            return None
+        return conteudo
+
+    def _ler_resultado(self, nome: str, chave: str) -> Any:
+        with open(self._caminhos(nome, chave)[0], "rb") as f:
+            return pickle.load(f)
+
+    def _gravar(self, nome: str, chave: str, valor: Any) -> str:
+        """Grava o resultado e devolve o hash do seu conteúdo"""
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        dados = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        hash_saida = hashlib.blake2b(dados, digest_size=16).hexdigest()
+
+        resultado, meta = self._caminhos(nome, chave)
+        temporario = resultado.with_suffix(".tmp")
+        temporario.write_bytes(dados)
+        temporario.replace(resultado)
+        conteudo = {'etapa': nome, 'chave': chave, 'hash_saida': hash_saida}
+        if isinstance(valor, Path):
+            conteudo['arquivo'] = str(valor)
+        meta.write_text(json.dumps(conteudo), encoding="utf-8")
+
+        # Resultados antigos da mesma etapa não serão mais lidos
+        for antigo in self.diretorio.glob(f"{nome}_*.*"):
+            if antigo.stem != f"{nome}_{chave}" and antigo.stem.rsplit("_", 1)[0] == nome:
+                antigo.unlink(missing_ok=True)
+
+        return hash_saida
+
+    def _rodar(self, etapa: Etapa, entradas: List[Any]) -> Any:
+        trava = self._travas.get(etapa.trava) if etapa.trava else None
+        if trava is None:
+            return etapa.funcao(*entradas, **etapa.parametros)
+        with trava:
+            return etapa.funcao(*entradas, **etapa.parametros)
+
+    def executar(
+            self,
+            alvos: Optional[Sequence[str]] = None,
+            max_workers: Optional[int] = None,
+            forcar: Sequence[str] = ()
+    ) -> Dict[str, Any]:
+        """
+        Executa as etapas desatualizadas necessárias para os alvos
+
+        Args:
+            alvos (list): Etapas cujos resultados são devolvidos (padrão: todas)
+            max_workers (int): Etapas executadas ao mesmo tempo
+            forcar (list): Etapas executadas mesmo com resultado em cache
+
+        Returns:
+            dict: Etapa alvo → resultado
+        """
+        alvos = list(alvos or self.etapas)
+        ordem = self._necessarias(alvos)
+        self.executadas, self.reutilizadas = [], []
+
+        chaves: Dict[str, str] = {}
+        hashes: Dict[str, str] = {}
+        valores: Dict[str, Any] = {}
+        trava_valores = threading.Lock()
+
+        def valor(nome: str) -> Any:
+            with trava_valores:
+                if nome not in valores:
+                    valores[nome] = self._ler_resultado(nome, chaves[nome])
+                return valores[nome]
+
+        def executar_etapa(etapa: Etapa) -> Any:
+            return self._rodar(etapa, [valor(e) for e in etapa.entradas])
+
+        pendentes = list(ordem)
+        em_execucao = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pendentes or em_execucao:
+                # Etapas com todas as entradas resolvidas: reaproveita ou agenda
+                for nome in list(pendentes):
+                    etapa = self.etapas[nome]
+                    if any(e not in hashes for e in etapa.entradas):
+                        continue
+                    pendentes.remove(nome)
+
+                    chaves[nome] = self._chave(etapa, [hashes[e] for e in etapa.entradas])
+                    meta = None if nome in forcar else self._ler_meta(nome, chaves[nome])
+                    if meta is not None:
+                        hashes[nome] = meta['hash_saida']
+                        self.reutilizadas.append(nome)
+                    else:
+                        em_execucao[executor.submit(executar_etapa, etapa)] = nome
+
+                if not em_execucao:
+                    continue
+
+                concluidas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in concluidas:
+                    nome = em_execucao.pop(futuro)
+                    resultado = futuro.result()
+                    with trava_valores:
+                        valores[nome] = resultado
+                    hashes[nome] = self._gravar(nome, chaves[nome], resultado)
+                    self.executadas.append(nome)
+
+        logger.info(
+            f"Pipeline: {len(self.executadas)} etapa(s) executada(s), "
+            f"{len(self.reutilizadas)} reutilizada(s) do cache"
+        )
+
+        return {nome: valor(nome) for nome in alvos}
+
+
+# ===============================
+# PIPELINE PADRÃO: carregar → limpar → agregar → gráfico
+# ===============================
+
+# Módulos cujo código cada etapa executa: editá-los invalida a etapa
+MODULOS_CARGA = ["app.config", "app.processador", "app.services.leitura", "app.services.cache", "app.services.schema"]
+MODULOS_LIMPEZA = ["app.config", "app.processador", "app.services.impressoes"]
+MODULOS_AGREGACAO = ["app.processador", "app.services.agregacao_numpy", "app.services.cubo", "app.services.schema"]
+MODULOS_GRAFICO = ["app.services.graficos"]
+
+def _processador_com(df):
+    """Processador sobre uma cópia rasa do DataFrame (alterações não vazam para a entrada)"""
+    from app.processador import ProcessadorDados
+
+    processador = ProcessadorDados()
+    processador.df = df.copy(deep=False)
+    processador.registrar_alteracao()
+    return processador
+
+
+def etapa_carregar(arquivo: str, sheet_name=0, conteudo: str = None):
+    """Lê a planilha; `conteudo` (hash do arquivo) só entra na chave da etapa"""
+    from app.processador import ProcessadorDados
+
+    processador = ProcessadorDados(Path(arquivo))
+    if not processador.carregar_dados(sheet_name=sheet_name):
+        raise ValueError(f"Falha ao carregar {arquivo}")
+    return processador.df
+
+
+def etapa_limpar(df):
+    processador = _processador_com(df)
+    processador.limpar_dados(materializar_cubo=False)
+    return processador.df
+
+
+def etapa_agregar(df, coluna_valor: str, colunas_grupo: List[str], operacao: str = "sum"):
+    return _processador_com(df).agregar_por_coluna(coluna_valor, colunas_grupo, operacao)
+
+
+def etapa_grafico(df, coluna_x: str, coluna_y: str, titulo: str, tipo: str = "bar", nome_arquivo: str = None):
+    """Renderiza sem pyplot (Agg, figura por thread): pode rodar em paralelo com outras etapas"""
+    from app.services.graficos import GraficoService
+
+    spec = {'df': df, 'coluna_x': coluna_x, 'coluna_y': coluna_y, 'titulo': titulo,
+            'tipo': tipo, 'nome_arquivo': nome_arquivo}
+    return GraficoService().gerar_lote([spec], max_workers=1)[0]
+
+
+def pipeline_padrao(arquivo: Path, sheet_name=0, diretorio: Optional[Path] = None) -> Pipeline:
+    """
+    Pipeline do main.py: carrega, limpa, agrega presos e veículos por tipo de
+    serviço e gera um gráfico de cada agregação (os dois ramos são independentes)
+    """
+    from app.services.cache import hash_conteudo
+
+    pipeline = Pipeline(diretorio)
+    pipeline.adicionar("carregar", etapa_carregar, parametros={
+        'arquivo': str(Path(arquivo).resolve()),
+        'sheet_name': sheet_name,
+        'conteudo': hash_conteudo(arquivo),
+    }, modulos=MODULOS_CARGA)
+    pipeline.adicionar("limpar", etapa_limpar, ["carregar"], modulos=MODULOS_LIMPEZA)
+
+    ramos = [
+        ("presos", "PRESOS/APREENDIDOS", "Total de Presos por Tipo de Serviço"),
+        ("veiculos", "VEÍCULOS RECUPERADOS", "Total de veículos recuperados por Tipo de Serviço"),
+    ]
+    for nome, medida, titulo in ramos:
+        pipeline.adicionar(f"{nome}_por_tipo", etapa_agregar, ["limpar"], {
+            'coluna_valor': medida,
+            'colunas_grupo': ["TIPO DE SERVIÇO"],
+        }, modulos=MODULOS_AGREGACAO)
+        pipeline.adicionar(f"grafico_{nome}", etapa_grafico, [f"{nome}_por_tipo"], {
+            'coluna_x': "TIPO DE SERVIÇO",
+            'coluna_y': medida,
+            'titulo': titulo,
+            'nome_arquivo': f"{nome}_por_tipo",
+        }, modulos=MODULOS_GRAFICO)
+
+    return pipeline
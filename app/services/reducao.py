@@ -0,0 +1,186 @@
+"""
+Redução de dados no servidor antes de enviá-los aos gráficos e tabelas dos dashboards
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import MAX_CATEGORIAS, MAX_PONTOS_GRAFICO, TAMANHO_PAGINA
+
+METODOS_REDUCAO = ["lttb", "minmax"]
+
+
+def _eixo_numerico(x: pd.Series) -> np.ndarray:
+    """Eixo x como float64 (datas viram nanossegundos)"""
+    if pd.api.types.is_datetime64_any_dtype(x.dtype):
+        return x.to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+    return x.to_numpy(dtype="float64")
+
+
+def indices_lttb(x: np.ndarray, y: np.ndarray, limite: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: escolhe `limite` pontos que preservam a forma da série
+
+    O primeiro e o último ponto são mantidos; em cada balde intermediário fica
+    o ponto que forma o maior triângulo com o ponto escolhido no balde
+    anterior e a média do balde seguinte.
+
+    Returns:
+        np.ndarray: Posições escolhidas, em ordem crescente
+    """
+    n = len(x)
+    if limite >= n:
+        return np.arange(n)
+    if limite < 3:
+        raise ValueError("LTTB precisa de ao menos 3 pontos")
+
+    limites = np.linspace(1, n - 1, limite - 1).astype(np.intp)
+    escolhidos = np.empty(limite, dtype=np.intp)
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+    anterior = 0
+
+    for i in range(limite - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        proximo_fim = limites[i + 2] if i + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+
+    return escolhidos
+
+
+def indices_minmax(y: np.ndarray, limite: int) -> np.ndarray:
+    """
+    Mínimo e máximo de cada balde (limite // 2 baldes): preserva os picos da série
+
+    Returns:
+        np.ndarray: Posições escolhidas, em ordem crescente
+    """
+    n = len(y)
+    baldes = max(1, limite // 2)
+    if n <= limite:
+        return np.arange(n)
+
+    limites = np.linspace(0, n, baldes + 1).astype(np.intp)
+    escolhidos = []
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        trecho = y[inicio:fim]
+        escolhidos.extend((inicio + int(np.argmin(trecho)), inicio + int(np.argmax(trecho))))
+    return np.unique(escolhidos)
+
+
+def reduzir_serie(
+        df: pd.DataFrame,
+        coluna_x: str,
+        coluna_y: str,
+        limite: int = MAX_PONTOS_GRAFICO,
+        metodo: str = "lttb"
+) -> pd.DataFrame:
+    """
+    Reduz uma série temporal a no máximo `limite` pontos por traço
+
+    Args:
+        df (pd.DataFrame): Dados da série
+        coluna_x (str): Eixo x (numérico ou data)
+        coluna_y (str): Valores
+        limite (int): Máximo de pontos enviados ao gráfico
+        metodo (str): "lttb" (forma da curva) ou "minmax" (picos)
+
+    Returns:
+        pd.DataFrame: Linhas escolhidas, ordenadas por coluna_x
+    """
+    if metodo not in METODOS_REDUCAO:
+        raise ValueError(f"Método de redução inválido: {metodo}")
+
+    serie = df[[coluna_x, coluna_y]].dropna()
+    if len(serie) <= limite:
+        return serie.sort_values(coluna_x, kind="stable")
+
+    serie = serie.sort_values(coluna_x, kind="stable")
+    y = serie[coluna_y].to_numpy(dtype="float64")
+    if metodo == "lttb":
+        posicoes = indices_lttb(_eixo_numerico(serie[coluna_x]), y, limite)
+    else:
+        posicoes = indices_minmax(y, limite)
+    return serie.iloc[posicoes]
+
+
+def totais_por_categoria(
+        df: pd.DataFrame,
+        coluna_categoria: str,
+        coluna_valor: str,
+        por: Optional[str] = None,
+        limite: int = MAX_CATEGORIAS,
+        rotulo_outros: str = "OUTROS"
+) -> pd.DataFrame:
+    """
+    Totais já agrupados para gráficos de pizza e barras
+
+    As `limite` categorias de maior total são mantidas e as demais somadas em
+    `rotulo_outros`, limitando o número de fatias ou barras enviadas.
+
+    Args:
+        df (pd.DataFrame): Dados (linhas ou totais já agregados)
+        coluna_categoria (str): Categoria (fatias, ou cor das barras)
+        coluna_valor (str): Valor somado
+        por (str): Segunda chave, ex.: eixo x das barras (opcional)
+        limite (int): Máximo de categorias
+        rotulo_outros (str): Nome da categoria que reúne as demais
+
+    Returns:
+        pd.DataFrame: Colunas [coluna_categoria, (por,) coluna_valor]
+    """
+    total = df.groupby(coluna_categoria, observed=True)[coluna_valor].sum().sort_values(ascending=False)
+    categorias = df[coluna_categoria]
+
+    if len(total) > limite:
+        mantidas = total.index[:limite - 1]
+        categorias = categorias.astype(object).where(categorias.isin(mantidas), rotulo_outros)
+
+    chaves = [categorias] if por is None else [categorias, df[por]]
+    return df[coluna_valor].groupby(chaves, observed=True).sum().reset_index()
+
+
+def paginar(
+        df: pd.DataFrame,
+        pagina: int = 1,
+        tamanho_pagina: int = TAMANHO_PAGINA,
+        ordenar_por: Optional[str] = None,
+        ascendente: bool = True
+) -> Tuple[pd.DataFrame, int]:
+    """
+    Uma página da tabela, ordenada no servidor
+
+    Só a coluna de ordenação é ordenada (argsort estável); as demais colunas
+    são lidas apenas para as linhas da página.
+
+    Args:
+        df (pd.DataFrame): Dados da tabela
+        pagina (int): Página, a partir de 1
+        tamanho_pagina (int): Linhas por página
+        ordenar_por (str): Coluna de ordenação (opcional)
+        ascendente (bool): Ordem crescente
+
+    Returns:
+        tuple: (linhas da página, total de páginas)
+    """
+    total_paginas = max(1, -(-len(df) // tamanho_pagina))
+    pagina = min(max(1, pagina), total_paginas)
+    inicio = (pagina - 1) * tamanho_pagina
+
+    if ordenar_por is None:
+        return df.iloc[inicio:inicio + tamanho_pagina], total_paginas
+
+    # Ordena só a chave, com índice posicional: mesma ordem de df.sort_values(kind="stable")
+    chave = df[ordenar_por].reset_index(drop=True)
+    ordem = chave.sort_values(ascending=ascendente, kind="stable", na_position="last").index.to_numpy()
+    return df.iloc[ordem[inicio:inicio + tamanho_pagina]], total_paginas
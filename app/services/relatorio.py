@@ -0,0 +1,228 @@
+"""
+Relatórios declarativos: agregações e gráficos descritos em um arquivo JSON ou YAML
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from app.config import RELATORIOS_DIR
+
+logger = logging.getLogger(__name__)
+
+OPERACOES_RELATORIO = ["sum", "mean", "count", "max", "min"]
+
+
+def carregar_spec(caminho: Path) -> Dict[str, Any]:
+    """
+    Lê a especificação do relatório (.json, .yaml ou .yml)
+
+    Formato:
+        nome: mensal
+        limpar: true                       # executa limpar_dados antes (padrão: false)
+        formatos: [csv]                    # formatos das tabelas (padrão: csv)
+        agregacoes:
+          - nome: presos_por_tipo
+            medida: PRESOS/APREENDIDOS
+            grupos: [TIPO DE SERVIÇO]
+            operacao: sum                  # padrão: sum
+            remover_zeros: true            # padrão: true
+            remover_nulos: true            # padrão: true
+        graficos:
+          - agregacao: presos_por_tipo
+            x: TIPO DE SERVIÇO
+            titulo: Presos por tipo de serviço
+            tipo: bar                      # padrão: bar; y padrão: a medida
+    """
+    caminho = Path(caminho)
+    texto = caminho.read_text(encoding="utf-8")
+
+    if caminho.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ValueError("Especificações YAML exigem o pacote pyyaml; use JSON ou instale pyyaml") from e
+        spec = yaml.safe_load(texto)
+    else:
+        spec = json.loads(texto)
+
+    validar_spec(spec)
+    spec.setdefault('nome', caminho.stem)
+    return spec
+
+
+def validar_spec(spec: Dict[str, Any]) -> None:
+    """Valida nomes, operações e referências entre gráficos e agregações"""
+    if not isinstance(spec, dict) or not spec.get('agregacoes'):
+        raise ValueError("A especificação precisa de uma lista 'agregacoes'")
+
+    nomes = set()
+    for agregacao in spec['agregacoes']:
+        for campo in ('nome', 'medida', 'grupos'):
+            if not agregacao.get(campo):
+                raise ValueError(f"Agregação sem o campo '{campo}': {agregacao}")
+        if agregacao['nome'] in nomes:
+            raise ValueError(f"Agregação repetida: {agregacao['nome']}")
+        if agregacao.get('operacao', 'sum') not in OPERACOES_RELATORIO:
+            raise ValueError(f"Operação inválida em {agregacao['nome']}: {agregacao['operacao']}")
+        nomes.add(agregacao['nome'])
+
+    for grafico in spec.get('graficos', []):
+        if grafico.get('agregacao') not in nomes:
+            raise ValueError(f"Gráfico referencia agregação inexistente: {grafico.get('agregacao')}")
+        if not grafico.get('x'):
+            raise ValueError(f"Gráfico sem o campo 'x': {grafico}")
+
+
+def _chave_passada(agregacao: Dict[str, Any]) -> Tuple:
+    """Colunas de grupo e filtros: agregações com a mesma chave saem do mesmo groupby"""
+    return (
+        tuple(agregacao['grupos']),
+        agregacao.get('remover_zeros', True),
+        agregacao.get('remover_nulos', True),
+    )
+
+
+def planejar(agregacoes: List[Dict[str, Any]]) -> Dict[Tuple, Dict[str, List[str]]]:
+    """
+    Agrupa as agregações que podem sair do mesmo groupby
+
+    Agregações com as mesmas colunas de grupo e os mesmos filtros de zeros e
+    nulos viram uma única chamada a agregar_multiplas.
+
+    Returns:
+        dict: (grupos, remover_zeros, remover_nulos) → medida → operações
+    """
+    passadas: Dict[Tuple, Dict[str, List[str]]] = {}
+    for agregacao in agregacoes:
+        operacoes = passadas.setdefault(_chave_passada(agregacao), {}).setdefault(agregacao['medida'], [])
+        operacao = agregacao.get('operacao', 'sum')
+        if operacao not in operacoes:
+            operacoes.append(operacao)
+    return passadas
+
+
+def executar_relatorio(
+        processador,
+        spec: Dict[str, Any],
+        diretorio: Optional[Path] = None,
+        max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Executa o relatório sobre dados já carregados no processador
+
+    As agregações são feitas pelo plano de `planejar` (um groupby por conjunto
+    de chaves), os gráficos são renderizados em lote e tabelas, PNGs e o
+    manifesto com os tempos de cada fase são gravados em `diretorio`.
+
+    Args:
+        processador (ProcessadorDados): Processador com os dados carregados
+        spec (dict): Especificação (ver carregar_spec)
+        diretorio (Path): Diretório de saída (padrão: RELATORIOS_DIR/<nome>)
+        max_workers (int): Processos para renderizar os gráficos
+
+    Returns:
+        dict: Manifesto do relatório (também gravado em manifesto.json)
+    """
+    from app.processador import ProcessadorDados
+    from app.services.exportacao import salvar_formatos
+
+    validar_spec(spec)
+    nome = spec.get('nome', 'relatorio')
+    diretorio = Path(diretorio or RELATORIOS_DIR / nome)
+    tempos: Dict[str, float] = {}
+
+    if spec.get('limpar', False):
+        inicio = time.perf_counter()
+        processador.limpar_dados()
+        tempos['limpar_dados'] = time.perf_counter() - inicio
+
+    # Uma passada por conjunto de chaves e filtros
+    resultados: Dict[str, pd.DataFrame] = {}
+    passadas = planejar(spec['agregacoes'])
+    longos = {}
+    plano = []
+    for chave, medidas in passadas.items():
+        grupos, remover_zeros, remover_nulos = chave
+        inicio = time.perf_counter()
+        longos[chave] = processador.agregar_multiplas(
+            medidas, list(grupos), remover_zeros, remover_nulos
+        )
+        plano.append({
+            'grupos': list(grupos),
+            'remover_zeros': remover_zeros,
+            'remover_nulos': remover_nulos,
+            'medidas': medidas,
+            'segundos': time.perf_counter() - inicio,
+        })
+    tempos['agregar'] = sum(passada['segundos'] for passada in plano)
+
+    for agregacao in spec['agregacoes']:
+        resultados[agregacao['nome']] = ProcessadorDados.extrair_medida(
+            longos[_chave_passada(agregacao)], agregacao['medida'], agregacao.get('operacao', 'sum')
+        )
+
+    logger.info(
+        f"Relatório {nome}: {len(spec['agregacoes'])} agregação(ões) em {len(passadas)} passada(s)"
+    )
+
+    # Tabelas
+    inicio = time.perf_counter()
+    formatos = spec.get('formatos', ['csv'])
+    tabelas = {
+        nome_tabela: {
+            formato: str(info['caminho'])
+            for formato, info in salvar_formatos(df, diretorio, nome_tabela, formatos).items()
+            if 'erro' not in info
+        }
+        for nome_tabela, df in resultados.items()
+    }
+    tempos['gravar_tabelas'] = time.perf_counter() - inicio
+
+    # Gráficos, renderizados em paralelo
+    graficos = {}
+    if spec.get('graficos'):
+        from app.services.graficos import GraficoService
+
+        servico = GraficoService()
+        servico.output_dir = diretorio / "graficos"
+        medidas = {a['nome']: a['medida'] for a in spec['agregacoes']}
+        lote = [
+            {
+                "df": resultados[g['agregacao']],
+                "coluna_x": g['x'],
+                "coluna_y": g.get('y', medidas[g['agregacao']]),
+                "titulo": g.get('titulo', g['agregacao']),
+                "tipo": g.get('tipo', 'bar'),
+                "ordenar": g.get('ordenar', True),
+                "nome_arquivo": g.get('nome', g['agregacao']),
+            }
+            for g in spec['graficos']
+        ]
+        inicio = time.perf_counter()
+        caminhos = servico.gerar_lote(lote, max_workers=max_workers)
+        tempos['gerar_graficos'] = time.perf_counter() - inicio
+        graficos = {spec_grafico['nome_arquivo']: str(c) for spec_grafico, c in zip(lote, caminhos)}
+
+    manifesto = {
+        'nome': nome,
+        'gerado_em': datetime.now().isoformat(timespec="seconds"),
+        'origem': str(processador.path_file),
+        'linhas': processador.contar_linhas(),
+        'passadas': plano,
+        'tabelas': tabelas,
+        'graficos': graficos,
+        'tempos_s': tempos,
+    }
+
+    diretorio.mkdir(parents=True, exist_ok=True)
+    caminho = diretorio / "manifesto.json"
+    caminho.write_text(json.dumps(manifesto, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"Relatório {nome} gravado em {diretorio}")
+
+    return manifesto
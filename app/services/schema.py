@@ -0,0 +1,159 @@
+"""
+Schema compacto aplicado aos dados carregados: dimensões categóricas e medidas inteiras
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype
+
+from app.config import COLUNA_ANO, COLUNA_DATA, COLUNA_MES, COLUNA_PERIODO, DIMENSOES, MEDIDAS, ORDEM_MESES
+
+_INTEIROS = ["Int8", "Int16", "Int32", "Int64"]
+
+
+def normalizar_meses(serie: pd.Series) -> pd.Categorical:
+    """
+    Converte a coluna de meses em categórica ordenada na ordem do calendário
+
+    Valores fora de ORDEM_MESES são mantidos, ordenados depois de dezembro.
+    """
+    valores = serie.astype("string").str.strip().str.upper()
+    extras = sorted(set(valores.dropna().unique()) - set(ORDEM_MESES))
+    return pd.Categorical(valores, categories=ORDEM_MESES + extras, ordered=True)
+
+
+def unir_categorias(tipos: Sequence[pd.CategoricalDtype]) -> pd.CategoricalDtype:
+    """
+    Tipo categórico que cobre as categorias de vários blocos
+
+    É o tipo que o schema daria à coluna inteira: meses (normalizar_meses) em
+    ORDEM_MESES seguidos dos valores desconhecidos em ordem alfabética; as
+    demais dimensões, como astype("category"), com as categorias ordenadas.
+    """
+    categorias = set().union(*(tipo.categories for tipo in tipos))
+    if all(tipo.ordered and list(tipo.categories[:12]) == ORDEM_MESES for tipo in tipos):
+        return pd.CategoricalDtype(ORDEM_MESES + sorted(categorias - set(ORDEM_MESES)), ordered=True)
+    return pd.CategoricalDtype(sorted(categorias))
+
+
+def menor_tipo_inteiro(serie: pd.Series) -> pd.Series:
+    """
+    Converte uma medida para o menor inteiro anulável que comporta os valores
+
+    Medidas com valores fracionários permanecem em ponto flutuante.
+    """
+    valores = pd.to_numeric(serie, errors="coerce")
+    presentes = valores.dropna()
+
+    if presentes.empty:
+        return valores.astype("Int8")
+    if not np.all(np.mod(presentes.to_numpy(dtype="float64"), 1) == 0):
+        return valores.astype("float64")
+
+    minimo, maximo = presentes.min(), presentes.max()
+    for tipo in _INTEIROS:
+        limites = np.iinfo(tipo.lower())
+        if limites.min <= minimo and maximo <= limites.max:
+            return valores.astype(tipo)
+
+    return valores.astype("Float64")
+
+
+def construir_periodo(
+        df: pd.DataFrame,
+        coluna_data: str = COLUNA_DATA,
+        coluna_ano: str = COLUNA_ANO,
+        coluna_mes: str = COLUNA_MES
+) -> Optional[pd.Series]:
+    """
+    Dimensão ano-mês (Period[M]) a partir de uma coluna de data ou de mês + ano
+
+    Datas inválidas, anos vazios e meses fora de ORDEM_MESES viram NaT.
+
+    Returns:
+        pd.Series | None: Períodos de cada linha; None se não houver data nem ano
+    """
+    if coluna_data in df.columns:
+        # ISO (como o Excel e o pandas gravam) e, no que sobrar, dia/mês/ano
+        valores = df[coluna_data]
+        datas = pd.to_datetime(valores, errors="coerce", format="ISO8601")
+        restantes = datas.isna() & valores.notna()
+        if restantes.any():
+            datas[restantes] = pd.to_datetime(valores[restantes], errors="coerce", dayfirst=True, format="mixed")
+        return datas.dt.to_period("M").rename(COLUNA_PERIODO)
+
+    if coluna_ano not in df.columns or coluna_mes not in df.columns:
+        return None
+
+    meses = df[coluna_mes]
+    if not (isinstance(meses.dtype, pd.CategoricalDtype) and list(meses.cat.categories[:12]) == ORDEM_MESES):
+        meses = pd.Series(normalizar_meses(meses), index=df.index)
+    codigos = meses.cat.codes.to_numpy(dtype="int64")
+    anos = pd.to_numeric(df[coluna_ano], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+    # Ordinal de Period[M]: meses desde janeiro de 1970
+    validos = (codigos >= 0) & (codigos < 12) & np.isfinite(anos)
+    ordinais = np.where(
+        validos, (np.nan_to_num(anos).astype("int64") - 1970) * 12 + codigos, np.iinfo("int64").min
+    )
+    return pd.Series(pd.PeriodIndex.from_ordinals(ordinais, freq="M"), index=df.index, name=COLUNA_PERIODO)
+
+
+def aplicar_schema(
+        df: pd.DataFrame,
+        dimensoes: Sequence[str] = DIMENSOES,
+        medidas: Sequence[str] = MEDIDAS
+) -> pd.DataFrame:
+    """
+    Aplica o schema compacto às colunas presentes no DataFrame
+
+    Args:
+        df (pd.DataFrame): Dados carregados (alterados no próprio objeto)
+        dimensoes (list): Colunas convertidas em categóricas (MÊS em ordem de calendário)
+        medidas (list): Colunas convertidas para o menor inteiro anulável
+
+    Com DATA, ou MÊS e ANO, cria também a coluna PERÍODO (ver construir_periodo).
+
+    Returns:
+        pd.DataFrame: O mesmo DataFrame, com os tipos ajustados
+    """
+    for coluna in dimensoes:
+        if coluna not in df.columns:
+            continue
+        if coluna == COLUNA_MES:
+            df[coluna] = normalizar_meses(df[coluna])
+        elif not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype("category")
+
+    for coluna in medidas:
+        if coluna in df.columns:
+            df[coluna] = menor_tipo_inteiro(df[coluna])
+
+    periodo = construir_periodo(df)
+    if periodo is not None:
+        df[COLUNA_PERIODO] = periodo
+
+    return df
+
+
+def tipo_resultado_agregacao(dtype, operacao: str, valores: pd.Series):
+    """
+    dtype que o groupby do pandas produz para a operação sobre uma coluna desse dtype
+
+    Usado por quem agrega fora do pandas (armazém SQL, motor numpy) para
+    devolver os mesmos tipos. A soma de inteiros volta ao tipo da coluna
+    quando todos os totais (`valores`) cabem nele; senão fica em 64 bits
+    (Int8 → Int64, int8 → int64).
+    """
+    amostra = pd.DataFrame({'g': [0], 'v': pd.Series([1], dtype=dtype)})
+    tipo = amostra.groupby('g')['v'].agg(operacao).dtype
+
+    if operacao == "sum" and is_integer_dtype(tipo):
+        anulavel = isinstance(tipo, pd.api.extensions.ExtensionDtype)
+        limites = np.iinfo(tipo.numpy_dtype if anulavel else tipo)
+        presentes = valores.dropna()
+        if len(presentes) and (presentes.min() < limites.min or presentes.max() > limites.max):
+            tipo = pd.api.types.pandas_dtype("Int64" if anulavel else "int64")
+    return tipo
@@ -0,0 +1,32 @@
+"""
+Acesso dos dashboards à camada de dados compartilhada
+"""
+
+from pathlib import Path
+
+import streamlit as st
+
+from app.config import ARQUIVO_ESTATISTICAS, ARROW_DIR
+from app.services.camada_dados import CamadaDados, SnapshotDados
+
+
+@st.cache_resource(show_spinner="Carregando dados...")
+def obter_camada_dados(fonte: str = str(ARQUIVO_ESTATISTICAS)) -> CamadaDados:
+    """
+    Camada de dados única por processo do Streamlit, compartilhada por todas as sessões
+
+    A primeira sessão carrega e limpa os dados; as seguintes recebem a mesma
+    instância. Alterações na planilha são detectadas em segundo plano. Os
+    dados ficam em um arquivo Arrow mapeado em ARROW_DIR, compartilhado
+    pelos processos do servidor.
+    """
+    return CamadaDados(Path(fonte), dir_arrow=ARROW_DIR)
+
+
+def obter_snapshot(fonte: str = str(ARQUIVO_ESTATISTICAS)) -> SnapshotDados:
+    """Snapshot atual dos dados; interrompe a página se nenhuma carga deu certo"""
+    snapshot = obter_camada_dados(fonte).snapshot
+    if snapshot is None:
+        st.error("Erro ao carregar o arquivo Excel.")
+        st.stop()
+    return snapshot
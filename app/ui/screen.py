@@ -5,6 +5,9 @@ import plotly.express as px
 from datetime import datetime, timedelta
 import numpy as np
 
+from app.services.filtros import IndiceFiltros
+from app.services.reducao import paginar, reduzir_serie
+
 
 # Configuração
 st.set_page_config(
@@ -36,6 +39,16 @@ st.markdown("""
 st.markdown('<h1 class="main-header">📊 Dashboard Analytics</h1>',
             unsafe_allow_html=True)
 
+
+# Dados e índice dos filtros saem juntos, com a mesma chave de load_data:
+# o índice nunca fica defasado em relação aos dados e, nos reruns, nada
+# percorre o DataFrame inteiro
+@st.cache_resource(max_entries=4)
+def indexar_dados(files):
+    df = load_data(files)
+    return df, IndiceFiltros(df, ['category', 'region'], ['sales', 'customers'])
+
+
 # Sidebar com controles
 with st.sidebar:
     st.image("https://via.placeholder.com/300x100/FF4B4B/FFFFFF?text=LOGO")
@@ -65,6 +78,7 @@ with st.sidebar:
     # Botão de refresh
     if st.button("🔄 Atualizar Dados"):
         st.cache_data.clear()
+        indexar_dados.clear()
         st.rerun()
 
 
@@ -91,7 +105,7 @@ def load_data(files):
 
 # Carregar dados
 uploaded_files = []  # Placeholder para arquivos carregados
-df = load_data(uploaded_files)
+df, indice = indexar_dados(uploaded_files)
 
 
 # Tabs para organização
@@ -142,12 +156,14 @@ with tab1:
     col5, col6 = st.columns(2)
 
     with col5:
-        fig = px.line(df, x='date', y='sales',
+        # Série reduzida no servidor ao número de pontos visíveis
+        fig = px.line(reduzir_serie(df, 'date', 'sales'), x='date', y='sales',
                       title='Vendas por Dia')
         st.plotly_chart(fig, use_container_width=True)
 
     with col6:
-        fig = px.pie(df, values='sales', names='category',
+        vendas_categoria = indice.somar('sales', {}, por='category').reset_index()
+        fig = px.pie(vendas_categoria, values='sales', names='category',
                      title='Distribuição por Categoria')
         st.plotly_chart(fig, use_container_width=True)
 
@@ -158,22 +174,20 @@ with tab2:
     with col7:
         category_filter = st.multiselect(
             "Categorias",
-            options=df['category'].unique(),
-            default=df['category'].unique()
+            options=list(indice.valores['category']),
+            default=list(indice.valores['category'])
         )
 
     with col8:
         region_filter = st.multiselect(
             "Regiões",
-            options=df['region'].unique(),
-            default=df['region'].unique()
+            options=list(indice.valores['region']),
+            default=list(indice.valores['region'])
         )
 
-    # Aplicar filtros
-    filtered_df = df[
-        (df['category'].isin(category_filter)) &
-        (df['region'].isin(region_filter))
-        ]
+    # Aplicar filtros pelo índice (união dos valores, interseção entre colunas)
+    selecoes = {'category': category_filter, 'region': region_filter}
+    filtered_df = df.iloc[indice.posicoes(selecoes)]
 
     # Heatmap de correlação
     fig = px.imshow(
@@ -183,9 +197,20 @@ with tab2:
     )
     st.plotly_chart(fig, use_container_width=True)
 
-    # Tabela interativa
+    # Tabela paginada e ordenada no servidor
+    col9, col10, col11 = st.columns(3)
+    with col9:
+        ordenar_por = st.selectbox("Ordenar por", list(filtered_df.columns))
+    with col10:
+        ascendente = st.toggle("Crescente", value=True)
+    with col11:
+        pagina = st.number_input("Página", min_value=1, value=1, step=1)
+
+    pagina_df, total_paginas = paginar(filtered_df, int(pagina), ordenar_por=ordenar_por, ascendente=ascendente)
+    st.caption(f"Página {min(int(pagina), total_paginas)} de {total_paginas} ({len(filtered_df)} linhas)")
+
     st.dataframe(
-        filtered_df,
+        pagina_df,
         use_container_width=True,
         hide_index=True,
         column_config={
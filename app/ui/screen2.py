@@ -1,25 +1,22 @@
 import streamlit as st
 import plotly.express as px
-from app.processador import ProcessadorDados
+from app.services.reducao import totais_por_categoria
+from app.ui.dados import obter_snapshot
 
-core = ProcessadorDados()
+# 1️⃣ carregar e limpar (uma vez por processo, compartilhado entre as sessões)
+snapshot = obter_snapshot()
 
-# 1️⃣ carregar
-if not core.carregar_dados():
-    st.error("Erro ao carregar o arquivo Excel.")
-    st.stop()
-
-# 2️⃣ limpar (boa prática)
-core.limpar_dados()
+# 2️⃣ processar
+res = snapshot.total_presos_por_guarnicao()
 
-# 3️⃣ processar
-res = core.total_presos_por_guarnicao()
-
-# 4️⃣ validar resultado
+# 3️⃣ validar resultado
 if res.empty:
     st.warning("Nenhum dado encontrado.")
     st.stop()
 
+# Limita as barras enviadas: tipos de menor total são somados em "OUTROS"
+res = totais_por_categoria(res, 'TIPO DE SERVIÇO', 'PRESOS/APREENDIDOS', por='MÊS')
+
 fig = px.bar(
     res,
     x='MÊS',
@@ -28,4 +25,4 @@ fig = px.bar(
     barmode='group'
 )
 
-st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+st.plotly_chart(fig, use_container_width=True)
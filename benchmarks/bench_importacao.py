@@ -0,0 +1,129 @@
+"""
+Tempo de inicialização a frio do CLI, medido com `python -X importtime`
+
+Uso:
+    python -m benchmarks.bench_importacao
+    python -m benchmarks.bench_importacao --comparar-com HEAD~1
+
+Com --comparar-com, a mesma medição é feita em uma cópia da revisão indicada
+(extraída com `git archive`), mostrando o antes e o depois.
+"""
+
+import argparse
+import json
+import logging
+import re
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+RAIZ = Path(__file__).resolve().parents[1]
+MODULO_PADRAO = "app.main"
+PESADOS = ["matplotlib", "openpyxl", "plotly", "pyarrow", "streamlit"]
+
+_LINHA = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+logger = logging.getLogger(__name__)
+
+
+def medir_importacao(raiz: Path, modulo: str) -> Dict[str, Any]:
+    """
+    Importa o módulo em um interpretador novo e lê a saída do -X importtime
+
+    Returns:
+        dict: tempo total (s), tempo acumulado dos módulos de primeiro nível
+            mais caros e quais módulos pesados foram carregados
+    """
+    codigo = (
+        f"import sys, json; import {modulo}; "
+        f"print(json.dumps([m for m in {PESADOS!r} if m in sys.modules]))"
+    )
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=raiz, capture_output=True, text=True, check=True
+    )
+
+    acumulado = {}
+    for linha in processo.stderr.splitlines():
+        correspondencia = _LINHA.match(linha)
+        if correspondencia:
+            nome = correspondencia[4]
+            acumulado[nome] = max(acumulado.get(nome, 0), int(correspondencia[2]))
+
+    raizes = {nome: us for nome, us in acumulado.items() if "." not in nome}
+    return {
+        'total_s': acumulado.get(modulo, 0) / 1e6,
+        'pacotes_s': {nome: us / 1e6 for nome, us in sorted(raizes.items(), key=lambda i: -i[1])[:10]},
+        'pesados_carregados': json.loads(processo.stdout.strip().splitlines()[-1]),
+    }
+
+
+def medir(raiz: Path, modulo: str, repeticoes: int) -> Dict[str, Any]:
+    """Mediana de várias importações a frio (cada uma em um processo novo)"""
+    execucoes = [medir_importacao(raiz, modulo) for _ in range(repeticoes)]
+    totais = [e['total_s'] for e in execucoes]
+    return {
+        'raiz': str(raiz),
+        'modulo': modulo,
+        'totais_s': totais,
+        'mediana_s': statistics.median(totais),
+        'pacotes_s': execucoes[-1]['pacotes_s'],
+        'pesados_carregados': execucoes[-1]['pesados_carregados'],
+    }
+
+
+def extrair_revisao(revisao: str, destino: Path) -> Path:
+    """Extrai a árvore de uma revisão do git em `destino`"""
+    arquivo = subprocess.run(
+        ["git", "archive", "--format=tar", revisao],
+        cwd=RAIZ, capture_output=True, check=True
+    ).stdout
+    with tarfile.open(fileobj=BytesIO(arquivo)) as tar:
+        tar.extractall(destino, filter="data")
+    return destino
+
+
+def _exibir(rotulo: str, resultado: Dict[str, Any]) -> None:
+    logger.info(f"{rotulo}: {resultado['modulo']} em {resultado['mediana_s'] * 1000:.0f} ms (mediana)")
+    for pacote, segundos in resultado['pacotes_s'].items():
+        logger.info(f"    {pacote:<20} {segundos * 1000:8.1f} ms")
+    logger.info(f"    módulos pesados carregados: {', '.join(resultado['pesados_carregados']) or 'nenhum'}")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Tempo de importação a frio do CLI")
+    parser.add_argument("--modulo", default=MODULO_PADRAO, help="Módulo importado")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Importações a frio por medição")
+    parser.add_argument("--comparar-com", metavar="REVISAO", help="Revisão do git usada como 'antes'")
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    execucao = {'depois': medir(RAIZ, args.modulo, args.repeticoes)}
+
+    if args.comparar_com:
+        with tempfile.TemporaryDirectory() as temporario:
+            antes = extrair_revisao(args.comparar_com, Path(temporario))
+            execucao['antes'] = {**medir(antes, args.modulo, args.repeticoes), 'revisao': args.comparar_com}
+        _exibir(f"Antes ({args.comparar_com})", execucao['antes'])
+
+    _exibir("Depois", execucao['depois'])
+    if 'antes' in execucao:
+        ganho = execucao['antes']['mediana_s'] / execucao['depois']['mediana_s']
+        logger.info(f"Inicialização {ganho:.2f}x mais rápida")
+
+    if args.saida:
+        args.saida.parent.mkdir(parents=True, exist_ok=True)
+        args.saida.write_text(json.dumps(execucao, indent=2, ensure_ascii=False), encoding="utf-8")
+        logger.info(f"Resultados gravados em {args.saida}")
+
+    return execucao
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark dos motores de agregar_por_coluna: groupby do pandas × numpy (bincount)
+
+Uso:
+    python -m benchmarks.bench_motores --tamanhos 100000 1000000 10000000
+
+Para cada tamanho, agrupamento e operação mede os dois motores (sem cubo e
+sem cache de agregações) e confere que os resultados são idênticos. O motor
+numpy é medido a frio (calculando os códigos de grupo) e com os códigos em
+cache, que é o caso das consultas repetidas dos dashboards.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from app.processador import OPERACOES
+from benchmarks.bench_pipeline import RESULTADOS_DIR, _metadados, _processador_carregado, medir
+from benchmarks.dados_sinteticos import gerar_dados_upp
+
+TAMANHOS_PADRAO = [100_000, 1_000_000]
+MEDIDA = "PRESOS/APREENDIDOS"
+AGRUPAMENTOS = [["TIPO DE SERVIÇO"], ["TIPO DE SERVIÇO", "MÊS"]]
+
+logger = logging.getLogger(__name__)
+
+
+def bench_tamanho(linhas: int, repeticoes: int, diretorio: Path) -> List[Dict[str, Any]]:
+    """Mede os dois motores para cada agrupamento e operação"""
+    # Sem limpar_dados: os dados sintéticos têm poucas combinações distintas e
+    # a remoção de duplicatas deixaria só alguns milhares de linhas
+    processador = _processador_carregado(gerar_dados_upp(linhas), None, diretorio)
+    resultados = []
+
+    for grupos in AGRUPAMENTOS:
+        for operacao in OPERACOES:
+            def agregar(engine: str) -> pd.DataFrame:
+                return processador.agregar_por_coluna(MEDIDA, grupos, operacao, engine=engine)
+
+            pd.testing.assert_frame_equal(agregar("numpy"), agregar("pandas"))
+
+            def limpar_codigos():
+                processador.codigos_grupo.limpar()
+
+            tempos = {
+                'pandas': medir(lambda _: agregar("pandas"), repeticoes),
+                'numpy (frio)': medir(lambda _: agregar("numpy"), repeticoes, limpar_codigos),
+                'numpy': medir(lambda _: agregar("numpy"), repeticoes),
+            }
+            medianas = {motor: statistics.median(t) for motor, t in tempos.items()}
+            resultados.append({
+                'tamanho': linhas,
+                'grupos': grupos,
+                'operacao': operacao,
+                'segundos': tempos,
+                'mediana': medianas,
+                'ganho': medianas['pandas'] / medianas['numpy'],
+            })
+            logger.info(
+                f"{linhas:>10} linhas | {' × '.join(grupos):<28} | {operacao:<5} | "
+                + " | ".join(f"{motor} {m:.4f}s" for motor, m in medianas.items())
+                + f" | {medianas['pandas'] / medianas['numpy']:.1f}x"
+            )
+
+    return resultados
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark dos motores de agregação (pandas × numpy)")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO,
+                        help="Número de linhas de cada execução")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Execuções de cada medição")
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultados")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temporario:
+        resultados = []
+        for linhas in args.tamanhos:
+            resultados.extend(bench_tamanho(linhas, args.repeticoes, Path(temporario)))
+
+    execucao = {'metadados': _metadados(), 'repeticoes': args.repeticoes, 'resultados': resultados}
+
+    saida = args.saida or RESULTADOS_DIR / f"motores_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(execucao, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"Resultados gravados em {saida}")
+
+    return execucao
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("app").setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark das etapas do pipeline sobre dados sintéticos da UPP
+
+Uso:
+    python -m benchmarks.bench_pipeline --tamanhos 10000 100000 1000000
+    python -m benchmarks.bench_pipeline --comparar benchmarks/resultados/anterior.json
+
+Cada etapa é medida `--repeticoes` vezes e o resultado é gravado em JSON
+(uma entrada por tamanho e etapa), para comparar execuções.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.processador import ProcessadorDados
+from benchmarks.dados_sinteticos import MAX_LINHAS_EXCEL, gerar_dados_upp, gravar_excel
+
+RESULTADOS_DIR = Path(__file__).resolve().parent / "resultados"
+TAMANHOS_PADRAO = [10_000, 100_000, 1_000_000]
+MEDIDA = "PRESOS/APREENDIDOS"
+GRUPOS = ["TIPO DE SERVIÇO", "MÊS"]
+
+logger = logging.getLogger(__name__)
+
+
+def medir(
+        etapa: Callable[[Any], Any],
+        repeticoes: int,
+        preparar: Optional[Callable[[], Any]] = None
+) -> List[float]:
+    """
+    Tempos (s) de `repeticoes` execuções da etapa
+
+    `preparar` monta um estado novo antes de cada execução, fora da medição;
+    o que ele devolve é passado para a etapa.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        estado = preparar() if preparar else None
+        inicio = time.perf_counter()
+        etapa(estado)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def _processador_carregado(df: pd.DataFrame, arquivo: Optional[Path], dir_cache: Path) -> ProcessadorDados:
+    """
+    Processador com os dados carregados: da planilha, se houver, ou do DataFrame gerado
+
+    O cache de agregações fica desligado para que cada repetição meça o cálculo.
+    """
+    processador = ProcessadorDados(
+        arquivo or Path("sintetico.xlsx"), dir_cache=dir_cache, tamanho_cache_agregacoes=0
+    )
+    if arquivo is not None:
+        processador.carregar_dados(usar_cache=True)
+    else:
+        processador.df = df.copy()
+        processador._aplicar_schema()
+        processador.registrar_alteracao()
+    return processador
+
+
+def _processador_limpo(df: pd.DataFrame, arquivo: Optional[Path], dir_cache: Path) -> ProcessadorDados:
+    processador = _processador_carregado(df, arquivo, dir_cache)
+    processador.limpar_dados()
+    return processador
+
+
+def bench_tamanho(linhas: int, repeticoes: int, diretorio: Path, max_linhas_excel: int) -> List[Dict[str, Any]]:
+    """Mede todas as etapas para um tamanho de dados"""
+    from app.services.graficos import GraficoService
+
+    df = gerar_dados_upp(linhas)
+    arquivo = gravar_excel(df, diretorio / f"upp_{linhas}.xlsx", max_linhas_excel)
+    dir_cache = diretorio / "cache"
+    resultados = []
+
+    def registrar(etapa: str, tempos: List[float], **extras) -> None:
+        resultados.append({
+            'tamanho': linhas,
+            'etapa': etapa,
+            'segundos': tempos,
+            'mediana': statistics.median(tempos),
+            'minimo': min(tempos),
+            **extras,
+        })
+        logger.info(f"{linhas:>10} linhas | {etapa:<38} | mediana {statistics.median(tempos):.4f}s")
+
+    if arquivo is not None:
+        registrar("carregar_dados (excel)", medir(
+            lambda p: p.carregar_dados(usar_cache=False), repeticoes,
+            lambda: ProcessadorDados(arquivo, dir_cache=dir_cache)
+        ))
+        ProcessadorDados(arquivo, dir_cache=dir_cache).carregar_dados(usar_cache=True)
+        registrar("carregar_dados (snapshot)", medir(
+            lambda p: p.carregar_dados(usar_cache=True), repeticoes,
+            lambda: ProcessadorDados(arquivo, dir_cache=dir_cache)
+        ))
+    else:
+        logger.info(f"{linhas:>10} linhas | carregar_dados omitido (acima de {max_linhas_excel} linhas)")
+
+    registrar("limpar_dados", medir(
+        lambda p: p.limpar_dados(), repeticoes,
+        lambda: _processador_carregado(df, arquivo, dir_cache)
+    ))
+
+    limpo = _processador_limpo(df, arquivo, dir_cache)
+
+    registrar("calcular_estatisticas", medir(
+        lambda p: dict(p.calcular_estatisticas()), repeticoes, lambda: limpo
+    ))
+    registrar("calcular_estatisticas (rapido)", medir(
+        lambda p: dict(p.calcular_estatisticas(rapido=True)), repeticoes, lambda: limpo
+    ))
+
+    registrar("agregar_por_coluna (cubo)", medir(
+        lambda p: p.agregar_por_coluna(MEDIDA, GRUPOS, "sum"), repeticoes, lambda: limpo
+    ))
+
+    sem_cubo = _processador_limpo(df, arquivo, dir_cache)
+    sem_cubo.cubo = None
+    registrar("agregar_por_coluna (groupby)", medir(
+        lambda p: p.agregar_por_coluna(MEDIDA, GRUPOS, "sum"), repeticoes, lambda: sem_cubo
+    ))
+
+    registrar("preparar_dados_barras_por_mes", medir(
+        lambda p: p.preparar_dados_barras_por_mes(MEDIDA), repeticoes, lambda: limpo
+    ))
+
+    agregado = limpo.agregar_por_coluna(MEDIDA, ["TIPO DE SERVIÇO"], "sum")
+
+    def novo_servico():
+        # Diretório novo a cada repetição: o PNG não pode vir do cache de gráficos
+        servico = GraficoService()
+        servico.output_dir = Path(tempfile.mkdtemp(dir=diretorio))
+        return servico
+
+    registrar("GraficoService.gerar", medir(
+        lambda s: s.gerar(agregado, "TIPO DE SERVIÇO", MEDIDA, "Benchmark", mostrar=False),
+        repeticoes, novo_servico
+    ))
+
+    return resultados
+
+
+def _metadados() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, cwd=Path(__file__).resolve().parent
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    return {
+        'data': datetime.now().isoformat(timespec="seconds"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def comparar(atual: Dict[str, Any], anterior: Dict[str, Any]) -> List[str]:
+    """Linhas de comparação das medianas entre duas execuções (razão atual / anterior)"""
+    referencia = {(r['tamanho'], r['etapa']): r['mediana'] for r in anterior['resultados']}
+    linhas = []
+    for r in atual['resultados']:
+        base = referencia.get((r['tamanho'], r['etapa']))
+        if base:
+            linhas.append(
+                f"{r['tamanho']:>10} | {r['etapa']:<38} | {base:.4f}s -> {r['mediana']:.4f}s "
+                f"({r['mediana'] / base:.2f}x)"
+            )
+    return linhas
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline com dados sintéticos da UPP")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO,
+                        help="Número de linhas de cada execução (ex.: 10000 ... 10000000)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções de cada etapa")
+    parser.add_argument("--max-excel", type=int, default=MAX_LINHAS_EXCEL,
+                        help="Maior tamanho gravado como planilha para medir carregar_dados")
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultados")
+    parser.add_argument("--comparar", type=Path, help="JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temporario:
+        resultados = []
+        for linhas in args.tamanhos:
+            diretorio = Path(temporario) / str(linhas)
+            diretorio.mkdir()
+            resultados.extend(bench_tamanho(linhas, args.repeticoes, diretorio, args.max_excel))
+
+    execucao = {'metadados': _metadados(), 'repeticoes': args.repeticoes, 'resultados': resultados}
+
+    saida = args.saida or RESULTADOS_DIR / f"bench_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(execucao, indent=2, ensure_ascii=False), encoding="utf-8")
+    logger.info(f"Resultados gravados em {saida}")
+
+    if args.comparar:
+        anterior = json.loads(args.comparar.read_text(encoding="utf-8"))
+        for linha in comparar(execucao, anterior):
+            logger.info(linha)
+
+    return execucao
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Os logs das etapas medidas atrapalham a leitura do benchmark
+    logging.getLogger("app").setLevel(logging.WARNING)
+    main()
@@ -0,0 +1,94 @@
+"""
+Gerador de dados sintéticos no formato da planilha da UPP
+"""
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.config import COLUNA_MES, ORDEM_MESES
+
+GUARNICOES = [
+    "GTPP I A", "GTPP I B", "GTPP I C", "GTPP I D",
+    "GTPP II A", "GTPP II B", "GTPP II C", "GTPP II D",
+    "GTPP I (OPERAÇÕES)", "GTPP II (SERRA)",
+]
+
+# Acima disso a planilha não é gravada: o openpyxl levaria minutos por arquivo
+MAX_LINHAS_EXCEL = 100_000
+
+
+def gerar_dados_upp(
+        linhas: int,
+        semente: int = 0,
+        fracao_zeros: float = 0.4,
+        fracao_nulos: float = 0.05,
+        fracao_duplicadas: float = 0.01,
+        fracao_meses_sujos: float = 0.02
+) -> pd.DataFrame:
+    """
+    Gera registros no schema da planilha (MÊS, TIPO DE SERVIÇO e medidas)
+
+    As medidas seguem uma Poisson com zeros extras e nulos esparsos, as
+    guarnições têm volumes diferentes, uma fração das linhas é repetida (como
+    em re-importações) e alguns meses vêm com espaços ou em minúsculas, como
+    nas planilhas preenchidas à mão.
+
+    Args:
+        linhas (int): Número de linhas
+        semente (int): Semente do gerador, para dados reprodutíveis
+        fracao_zeros (float): Fração de medidas zeradas além das da Poisson
+        fracao_nulos (float): Fração de medidas vazias
+        fracao_duplicadas (float): Fração de linhas que repetem outra linha
+        fracao_meses_sujos (float): Fração de meses com espaços ou minúsculas
+
+    Returns:
+        pd.DataFrame: Dados sintéticos
+    """
+    rng = np.random.default_rng(semente)
+
+    pesos = rng.uniform(0.5, 2.0, len(GUARNICOES))
+    guarnicoes = rng.choice(len(GUARNICOES), size=linhas, p=pesos / pesos.sum())
+    meses = np.asarray(ORDEM_MESES, dtype=object)[rng.integers(0, 12, linhas)]
+
+    sujos = rng.random(linhas) < fracao_meses_sujos
+    meses[sujos] = [f" {m.lower()} " for m in meses[sujos]]
+
+    def medida(media: float) -> np.ndarray:
+        valores = rng.poisson(media * (1 + guarnicoes / len(GUARNICOES)), linhas).astype("float64")
+        valores[rng.random(linhas) < fracao_zeros] = 0
+        valores[rng.random(linhas) < fracao_nulos] = np.nan
+        return valores
+
+    df = pd.DataFrame({
+        COLUNA_MES: meses,
+        "TIPO DE SERVIÇO": np.asarray(GUARNICOES, dtype=object)[guarnicoes],
+        "PRESOS/APREENDIDOS": medida(2.0),
+        "VEÍCULOS RECUPERADOS": medida(0.5),
+    })
+
+    repetidas = int(linhas * fracao_duplicadas)
+    if repetidas:
+        posicoes = np.arange(linhas)
+        posicoes[rng.choice(linhas, size=repetidas, replace=False)] = rng.choice(linhas, size=repetidas)
+        df = df.iloc[posicoes].reset_index(drop=True)
+
+    return df
+
+
+def gravar_excel(df: pd.DataFrame, caminho: Path, max_linhas: Optional[int] = MAX_LINHAS_EXCEL) -> Optional[Path]:
+    """
+    Grava os dados como planilha, se couberem no limite de linhas
+
+    Returns:
+        Path | None: Caminho gravado, ou None se os dados excedem max_linhas
+    """
+    if max_linhas is not None and len(df) > max_linhas:
+        return None
+
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    df.to_excel(caminho, index=False)
+    return caminho
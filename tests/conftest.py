@@ -0,0 +1,11 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def diretorios_temporarios(tmp_path, monkeypatch):
+    """Redireciona as saídas em disco para um diretório temporário"""
+    monkeypatch.setattr("app.processador.CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr("app.processador.ESTADO_DIR", tmp_path / "estado")
+    monkeypatch.setattr("app.processador.ARQUIVO_IMPRESSOES", tmp_path / "impressoes_linhas.npy")
+    monkeypatch.setattr("app.processador.PROCESSED_DATA_DIR", tmp_path / "processed")
+    monkeypatch.setattr("app.services.graficos.GRAFICOS_DIR", tmp_path / "graficos")
@@ -0,0 +1,102 @@
+import os
+
+import pandas as pd
+import pytest
+
+from app.services.camada_dados import CamadaDados
+
+
+@pytest.fixture
+def arquivo_upp(tmp_path):
+    """Cria planilha temporária no formato da UPP"""
+    caminho = tmp_path / "estatisticas_upp.xlsx"
+    pd.DataFrame({
+        'MÊS': ['JANEIRO', 'JANEIRO', 'FEVEREIRO'],
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I B', 'GTPP I A'],
+        'PRESOS/APREENDIDOS': [2, 1, 3],
+    }).to_excel(caminho, index=False)
+    return caminho
+
+
+def test_snapshot_recarrega_apenas_quando_conteudo_muda(arquivo_upp):
+    """Testa que só uma alteração de conteúdo publica um novo snapshot"""
+    camada = CamadaDados(arquivo_upp, vigiar=False)
+    primeiro = camada.snapshot
+    assert len(primeiro.dados) == 3
+
+    # Mesmo conteúdo, mtime diferente: não recarrega
+    stat = arquivo_upp.stat()
+    os.utime(arquivo_upp, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert camada.verificar() is False
+    assert camada.snapshot.processador is primeiro.processador
+
+    pd.DataFrame({
+        'MÊS': ['MARÇO'],
+        'TIPO DE SERVIÇO': ['GTPP I A'],
+        'PRESOS/APREENDIDOS': [7],
+    }).to_excel(arquivo_upp, index=False)
+    assert camada.verificar() is True
+    assert camada.recargas == 2
+
+    # Quem já tinha o snapshot anterior continua vendo os dados antigos
+    assert len(primeiro.dados) == 3
+    assert camada.snapshot.total_presos_por_guarnicao()['PRESOS/APREENDIDOS'].tolist() == [7]
+
+
+def test_recarga_com_falha_mantem_snapshot_anterior(arquivo_upp):
+    """Testa que uma planilha inválida não derruba a versão em uso"""
+    camada = CamadaDados(arquivo_upp, vigiar=False)
+    anterior = camada.snapshot
+
+    arquivo_upp.write_bytes(b"nao e uma planilha")
+    assert camada.verificar() is False
+    assert camada.snapshot is anterior
+
+
+def test_modo_arrow_compartilha_o_arquivo_entre_camadas(arquivo_upp, tmp_path):
+    """Testa que outra camada sobre a mesma versão mapeia o arquivo Arrow sem ler a planilha"""
+    cargas = []
+
+    def carregar(processador):
+        cargas.append(processador.path_file)
+        return processador.carregar_dados(usar_cache=False)
+
+    primeira = CamadaDados(arquivo_upp, carregar=carregar, vigiar=False, dir_arrow=tmp_path / "arrow")
+    segunda = CamadaDados(arquivo_upp, carregar=carregar, vigiar=False, dir_arrow=tmp_path / "arrow")
+    assert len(cargas) == 1
+    assert segunda.snapshot.processador.df is None
+    assert segunda.snapshot.total_presos_por_guarnicao()['PRESOS/APREENDIDOS'].tolist() == [2, 3, 1]
+
+    # Nova versão: o arquivo anterior é removido, mas quem o mapeou continua lendo
+    anterior = primeira.snapshot
+    pd.DataFrame({
+        'MÊS': ['MARÇO'],
+        'TIPO DE SERVIÇO': ['GTPP I A'],
+        'PRESOS/APREENDIDOS': [7],
+    }).to_excel(arquivo_upp, index=False)
+    assert primeira.verificar() is True
+    assert len(list((tmp_path / "arrow").glob("*.arrow"))) == 1
+    assert len(anterior.dados) == 3
+    assert primeira.snapshot.total_presos_por_guarnicao()['PRESOS/APREENDIDOS'].tolist() == [7]
+
+
+def test_modo_arrow_mantem_cubo_e_materializa_uma_vez(arquivo_upp, tmp_path, monkeypatch):
+    """Testa que o snapshot Arrow responde pelo cubo e guarda o DataFrame lido em `dados`"""
+    primeira = CamadaDados(arquivo_upp, vigiar=False, dir_arrow=tmp_path / "arrow")
+    segunda = CamadaDados(arquivo_upp, vigiar=False, dir_arrow=tmp_path / "arrow")
+
+    for camada in (primeira, segunda):
+        processador = camada.snapshot.processador
+        assert processador.df is None and processador.cubo is not None
+
+    leituras = []
+    ler = type(segunda.snapshot.processador.arrow).ler
+    monkeypatch.setattr(
+        type(segunda.snapshot.processador.arrow), "ler",
+        lambda self, colunas=None: leituras.append(colunas) or ler(self, colunas)
+    )
+    assert segunda.snapshot.total_presos_por_guarnicao()['PRESOS/APREENDIDOS'].tolist() == [2, 3, 1]
+    assert leituras == []
+
+    assert segunda.snapshot.dados.equals(segunda.snapshot.dados)
+    assert leituras == [None]
@@ -0,0 +1,31 @@
+import json
+
+import pandas as pd
+
+from app.config import ORDEM_MESES
+from benchmarks import bench_pipeline
+from benchmarks.dados_sinteticos import GUARNICOES, gerar_dados_upp
+
+
+def test_gerar_dados_upp_segue_o_schema():
+    """Testa que os dados sintéticos são reprodutíveis e seguem o schema da planilha"""
+    df = gerar_dados_upp(5_000, semente=1)
+
+    pd.testing.assert_frame_equal(df, gerar_dados_upp(5_000, semente=1))
+    assert list(df.columns) == ["MÊS", "TIPO DE SERVIÇO", "PRESOS/APREENDIDOS", "VEÍCULOS RECUPERADOS"]
+    assert set(df["MÊS"].str.strip().str.upper()) <= set(ORDEM_MESES)
+    assert set(df["TIPO DE SERVIÇO"]) <= set(GUARNICOES)
+    assert df["PRESOS/APREENDIDOS"].isna().any()
+    assert (df["PRESOS/APREENDIDOS"] == 0).any()
+    assert df.duplicated().any()
+
+
+def test_bench_pipeline_grava_json(tmp_path):
+    """Testa uma execução mínima do benchmark e o JSON de resultados"""
+    saida = tmp_path / "bench.json"
+    bench_pipeline.main(["--tamanhos", "500", "--repeticoes", "1", "--saida", str(saida)])
+
+    execucao = json.loads(saida.read_text(encoding="utf-8"))
+    etapas = {r['etapa'] for r in execucao['resultados']}
+    assert {"carregar_dados (excel)", "limpar_dados", "GraficoService.gerar"} <= etapas
+    assert bench_pipeline.comparar(execucao, execucao)
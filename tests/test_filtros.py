@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.filtros import IndiceFiltros
+
+
+@pytest.fixture
+def dados():
+    rng = np.random.default_rng(0)
+    n = 2000
+    return pd.DataFrame({
+        'category': rng.choice(['A', 'B', 'C'], n),
+        'region': rng.choice(['North', 'South', 'East', 'West', None], n),
+        'sales': rng.integers(1000, 5000, n).astype(float),
+    })
+
+
+@pytest.mark.parametrize("selecoes", [
+    {'category': ['A', 'C'], 'region': ['North', 'East']},
+    {'category': ['B']},
+    {'category': ['A'], 'region': ['West'], 'outra': None},
+    {'category': [], 'region': ['North']},
+    {'category': ['Z']},
+    {},
+])
+def test_indice_equivale_a_isin(dados, selecoes):
+    """Testa que posições, máscara e totais reproduzem o filtro com isin"""
+    indice = IndiceFiltros(dados, ['category', 'region'], ['sales'])
+    indice.FRACAO_POSICOES = 1000  # força o caminho pelas posições
+    mascara = np.ones(len(dados), dtype=bool)
+    for coluna, valores in selecoes.items():
+        if valores is not None:
+            mascara &= dados[coluna].isin(valores).to_numpy()
+    filtrado = dados[mascara]
+
+    np.testing.assert_array_equal(indice.mascara(selecoes), mascara)
+    np.testing.assert_array_equal(indice.posicoes(selecoes), np.flatnonzero(mascara))
+    assert indice.contar(selecoes) == len(filtrado)
+    assert indice.somar('sales', selecoes) == pytest.approx(filtrado['sales'].sum())
+
+    por_categoria = indice.somar('sales', selecoes, por='category')
+    esperado = filtrado.groupby('category')['sales'].sum()
+    pd.testing.assert_series_equal(por_categoria, esperado, check_names=False, check_index_type=False)
@@ -0,0 +1,102 @@
+import matplotlib
+import pandas as pd
+import pytest
+
+from app.services.graficos import GraficoService
+
+matplotlib.use("Agg")
+
+
+@pytest.fixture
+def dados_grafico():
+    """Cria dados agregados para gráficos"""
+    return pd.DataFrame({
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I B', 'GTPP II'],
+        'PRESOS/APREENDIDOS': [5, 3, 8],
+    })
+
+
+def test_gerar_fecha_figura(dados_grafico):
+    """Testa que gerar não deixa figuras abertas"""
+    import matplotlib.pyplot as plt
+
+    caminho = GraficoService().gerar(
+        dados_grafico, 'TIPO DE SERVIÇO', 'PRESOS/APREENDIDOS', 'Presos por Serviço', mostrar=False
+    )
+
+    assert caminho.exists()
+    assert plt.get_fignums() == []
+
+
+def test_gerar_lote(dados_grafico):
+    """Testa a renderização em lote em processos paralelos"""
+    specs = [
+        {'df': dados_grafico, 'coluna_x': 'TIPO DE SERVIÇO', 'coluna_y': 'PRESOS/APREENDIDOS',
+         'titulo': f'Unidade {i}', 'tipo': tipo}
+        for i, tipo in enumerate(['bar', 'line', 'bar', 'line'])
+    ]
+
+    caminhos = GraficoService().gerar_lote(specs, max_workers=2)
+
+    assert [c.name.rsplit('_', 1)[0] for c in caminhos] == ['unidade_0', 'unidade_1', 'unidade_2', 'unidade_3']
+    assert all(c.stat().st_size > 0 for c in caminhos)
+
+
+def test_gerar_lote_pequeno_em_serie(dados_grafico, monkeypatch):
+    """Testa que lotes abaixo de MINIMO_LOTE_PARALELO não abrem o pool de processos"""
+    def sem_pool(*args, **kwargs):
+        raise AssertionError("pool aberto para um lote pequeno")
+
+    monkeypatch.setattr("app.services.graficos.ProcessPoolExecutor", sem_pool)
+    specs = [
+        {'df': dados_grafico, 'coluna_x': 'TIPO DE SERVIÇO', 'coluna_y': 'PRESOS/APREENDIDOS', 'titulo': f'Serie {i}'}
+        for i in range(2)
+    ]
+
+    caminhos = GraficoService().gerar_lote(specs, max_workers=2)
+
+    assert all(c.stat().st_size > 0 for c in caminhos)
+
+
+def test_gerar_lote_rejeita_tipo_invalido(dados_grafico):
+    """Testa a validação das specs antes de abrir o pool"""
+    spec = {'df': dados_grafico, 'coluna_x': 'TIPO DE SERVIÇO', 'coluna_y': 'PRESOS/APREENDIDOS',
+            'titulo': 'X', 'tipo': 'pizza'}
+    with pytest.raises(ValueError):
+        GraficoService().gerar_lote([spec])
+
+
+def test_gerar_reutiliza_png_com_mesmo_conteudo(dados_grafico):
+    """Testa o cache endereçado pelo conteúdo dos gráficos"""
+    servico = GraficoService()
+    args = (dados_grafico, 'TIPO DE SERVIÇO', 'PRESOS/APREENDIDOS', 'Presos por Serviço')
+
+    primeiro = servico.gerar(*args)
+    segundo = servico.gerar(*args)
+    assert primeiro == segundo
+    assert (servico.renderizados, servico.reutilizados) == (1, 1)
+
+    alterado = dados_grafico.assign(**{'PRESOS/APREENDIDOS': [5, 3, 9]})
+    terceiro = servico.gerar(alterado, *args[1:], mostrar=False)
+    assert terceiro != primeiro
+    assert servico.renderizados == 2
+
+    assert servico.limpar_obsoletos() == [primeiro]
+    assert terceiro.exists() and not primeiro.exists()
+
+
+def test_gerar_mostrar_nao_regrava_png_existente(dados_grafico, monkeypatch):
+    """Testa que exibir na tela (mostrar=True) não regrava o PNG já em cache"""
+    import matplotlib.pyplot as plt
+
+    exibidos = []
+    monkeypatch.setattr(plt, "show", lambda: exibidos.append(plt.gcf()))
+    servico = GraficoService()
+    args = (dados_grafico, 'TIPO DE SERVIÇO', 'PRESOS/APREENDIDOS', 'Presos por Serviço')
+
+    caminho = servico.gerar(*args, mostrar=False)
+    caminho.write_bytes(b"png em cache")
+    assert servico.gerar(*args, mostrar=True) == caminho
+    assert len(exibidos) == 1
+    assert caminho.read_bytes() == b"png em cache"
+    assert (servico.renderizados, servico.reutilizados) == (1, 1)
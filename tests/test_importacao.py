@@ -0,0 +1,36 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+
+CODIGO = """
+import json, pathlib, sys
+criados = []
+mkdir = pathlib.Path.mkdir
+pathlib.Path.mkdir = lambda self, *a, **k: (criados.append(str(self)), mkdir(self, *a, **k))
+import app.main, app.processador, app.services
+print(json.dumps({
+    "pesados": [m for m in ("matplotlib", "openpyxl", "plotly") if m in sys.modules],
+    "criados": criados,
+}))
+"""
+
+
+def test_importar_cli_nao_carrega_modulos_pesados():
+    """Testa que importar o CLI não carrega matplotlib/openpyxl/plotly nem cria diretórios"""
+    processo = subprocess.run(
+        [sys.executable, "-c", CODIGO], cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    resultado = json.loads(processo.stdout.strip().splitlines()[-1])
+
+    assert resultado == {"pesados": [], "criados": []}
+
+
+def test_services_importa_grafico_service_sob_demanda():
+    """Testa o acesso preguiçoso aos nomes exportados por app.services"""
+    import app.services
+    from app.services.graficos import GraficoService
+
+    assert app.services.GraficoService is GraficoService
@@ -0,0 +1,67 @@
+import json
+
+import pandas as pd
+
+from app.processador import ProcessadorDados
+from app.services.perfil import Perfilador, instrumentar
+
+
+def test_perfilador_registra_etapas(tmp_path):
+    """Testa tempos, linhas e memória registrados para os métodos públicos"""
+    arquivo = tmp_path / "upp.xlsx"
+    pd.DataFrame({
+        'MÊS': ['JANEIRO', 'JANEIRO', 'FEVEREIRO', 'FEVEREIRO'],
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I A', 'GTPP I B', 'GTPP I A'],
+        'PRESOS/APREENDIDOS': [2, 2, 1, 3],
+    }).to_excel(arquivo, index=False)
+
+    with Perfilador(cprofile=True) as perfilador:
+        processador = ProcessadorDados(arquivo)
+        processador.carregar_dados(usar_cache=False)
+        processador.limpar_dados()
+        processador.agregar_por_coluna("PRESOS/APREENDIDOS", ["MÊS"], "sum")
+
+    registros = {r.etapa: r for r in perfilador.registros}
+    limpeza = registros["ProcessadorDados.limpar_dados"]
+    assert (limpeza.linhas_entrada, limpeza.linhas_saida) == (4, 3)
+    assert registros["ProcessadorDados.agregar_por_coluna"].linhas_saida == 2
+    assert registros["ProcessadorDados.registrar_alteracao"].profundidade == 1
+    assert all(r.wall_s >= 0 and r.memoria_pico_mb is not None for r in perfilador.registros)
+    assert perfilador.mais_lenta.profundidade == 0
+
+    linhas = perfilador.salvar_jsonl(tmp_path / "perfil.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(linhas) == len(perfilador.registros)
+    assert json.loads(linhas[0])["etapa"] == "ProcessadorDados.carregar_dados"
+    assert perfilador.salvar_cprofile(tmp_path / "perfil.prof").exists()
+
+    # Fora do contexto nada é registrado
+    processador.agregar_por_coluna("PRESOS/APREENDIDOS", ["MÊS"], "count")
+    assert len(perfilador.registros) == len(linhas)
+
+
+def test_instrumentar_ignora_geradores_e_privados():
+    """Testa que métodos geradores e privados não são instrumentados"""
+    @instrumentar
+    class Exemplo:
+        def publico(self):
+            return 1
+
+        def gerador(self):
+            yield 1
+
+        def _privado(self):
+            return 2
+
+        @staticmethod
+        def estatico(df):
+            return df
+
+    with Perfilador(memoria=False) as perfilador:
+        exemplo = Exemplo()
+        exemplo.publico()
+        list(exemplo.gerador())
+        exemplo._privado()
+        Exemplo.estatico(pd.DataFrame({'a': [1, 2]}))
+
+    assert [r.etapa for r in perfilador.registros] == ["Exemplo.publico", "Exemplo.estatico"]
+    assert perfilador.registros[1].linhas_entrada == 2
@@ -0,0 +1,155 @@
+import os
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+from app.services.pipeline import Pipeline, pipeline_padrao
+
+
+def _montar(diretorio, chamadas, fator=2, limite=10):
+    def base():
+        chamadas['base'] += 1
+        return list(range(5))
+
+    def dobrar(valores, fator):
+        chamadas['dobrar'] += 1
+        return [v * fator for v in valores]
+
+    def limitar(valores, limite):
+        chamadas['limitar'] += 1
+        return [min(v, limite) for v in valores]
+
+    def somar(valores):
+        chamadas['somar'] += 1
+        return sum(valores)
+
+    return (
+        Pipeline(diretorio)
+        .adicionar("base", base)
+        .adicionar("dobrar", dobrar, ["base"], {'fator': fator})
+        .adicionar("limitar", limitar, ["dobrar"], {'limite': limite})
+        .adicionar("somar", somar, ["limitar"])
+    )
+
+
+def test_pipeline_reutiliza_e_refaz_so_o_desatualizado(tmp_path):
+    chamadas = Counter()
+
+    pipeline = _montar(tmp_path, chamadas)
+    assert pipeline.executar() == {'base': [0, 1, 2, 3, 4], 'dobrar': [0, 2, 4, 6, 8],
+                                   'limitar': [0, 2, 4, 6, 8], 'somar': 20}
+    assert pipeline.executadas == ["base", "dobrar", "limitar", "somar"]
+
+    # Nova instância, mesmo diretório: tudo vem do disco
+    pipeline = _montar(tmp_path, chamadas)
+    assert pipeline.executar(["somar"]) == {'somar': 20}
+    assert pipeline.executadas == []
+    assert sum(chamadas.values()) == 4
+
+    # Parâmetro alterado: refaz a etapa e as que dependem dela
+    pipeline = _montar(tmp_path, chamadas, fator=3)
+    assert pipeline.executar(["somar"]) == {'somar': 10 + 9 + 6 + 3}
+    assert pipeline.executadas == ["dobrar", "limitar", "somar"]
+    assert pipeline.reutilizadas == ["base"]
+
+
+def test_pipeline_saida_igual_mantem_etapas_seguintes(tmp_path):
+    chamadas = Counter()
+    _montar(tmp_path, chamadas, limite=10).executar()
+
+    # Limite diferente com o mesmo resultado ([0, 2, 4, 6, 8]): somar não é refeita
+    pipeline = _montar(tmp_path, chamadas, limite=8)
+    assert pipeline.executar(["somar"]) == {'somar': 20}
+    assert pipeline.executadas == ["limitar"]
+    assert chamadas['somar'] == 1
+
+    pipeline = _montar(tmp_path, chamadas, limite=3)
+    assert pipeline.executar(["somar"]) == {'somar': 11}
+    assert pipeline.executadas == ["limitar", "somar"]
+
+
+def test_pipeline_trava_serializa_etapas(tmp_path):
+    ativas = []
+    simultaneas = []
+    trava = threading.Lock()
+
+    def etapa(valor):
+        with trava:
+            ativas.append(valor)
+            simultaneas.append(len(ativas))
+        time.sleep(0.05)
+        with trava:
+            ativas.remove(valor)
+        return valor
+
+    pipeline = Pipeline(tmp_path)
+    for i in range(3):
+        pipeline.adicionar(f"etapa_{i}", etapa, parametros={'valor': i}, trava="unica")
+    pipeline.executar(max_workers=3)
+    assert max(simultaneas) == 1
+
+    with pytest.raises(ValueError):
+        pipeline.adicionar("orfa", etapa, ["inexistente"])
+
+
+def test_pipeline_padrao(tmp_path):
+    arquivo = tmp_path / "upp.xlsx"
+    df = pd.DataFrame({
+        'MÊS': ['JANEIRO', 'FEVEREIRO', 'MARÇO'],
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I B', 'GTPP I A'],
+        'PRESOS/APREENDIDOS': [2, 1, 4],
+        'VEÍCULOS RECUPERADOS': [1, 0, 2],
+    })
+    df.to_excel(arquivo, index=False)
+
+    resultados = pipeline_padrao(arquivo, diretorio=tmp_path / "pipeline").executar()
+    presos = resultados['presos_por_tipo'].set_index('TIPO DE SERVIÇO')['PRESOS/APREENDIDOS']
+    assert presos.to_dict() == {'GTPP I A': 6, 'GTPP I B': 1}
+    assert resultados['grafico_presos'].exists()
+
+    pipeline = pipeline_padrao(arquivo, diretorio=tmp_path / "pipeline")
+    pipeline.executar()
+    assert pipeline.executadas == []
+
+    # Planilha alterada: só o ramo de veículos muda de resultado
+    df.loc[1, 'VEÍCULOS RECUPERADOS'] = 5
+    df.to_excel(arquivo, index=False)
+    pipeline = pipeline_padrao(arquivo, diretorio=tmp_path / "pipeline")
+    pipeline.executar()
+    assert set(pipeline.executadas) == {
+        "carregar", "limpar", "presos_por_tipo", "veiculos_por_tipo", "grafico_veiculos"
+    }
+    assert pipeline.reutilizadas == ["grafico_presos"]
+
+
+def test_pipeline_modulo_alterado_invalida_etapa(tmp_path, monkeypatch):
+    """Testa que editar um módulo chamado pela etapa refaz a etapa (o bytecode dela não muda)"""
+    modulo = tmp_path / "modulo_etapa.py"
+    modulo.write_text("FATOR = 2\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    chamadas = Counter()
+
+    def dobrar():
+        chamadas['dobrar'] += 1
+        return chamadas['dobrar']
+
+    def montar():
+        return Pipeline(tmp_path / "pipeline").adicionar("dobrar", dobrar, modulos=["modulo_etapa"])
+
+    montar().executar()
+    pipeline = montar()
+    pipeline.executar()
+    assert pipeline.executadas == []
+
+    modulo.write_text("FATOR = 3\n", encoding="utf-8")
+    stat = modulo.stat()
+    os.utime(modulo, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    pipeline = montar()
+    pipeline.executar()
+    assert pipeline.executadas == ["dobrar"]
+
+    with pytest.raises(ValueError):
+        Pipeline(tmp_path).adicionar("x", dobrar, modulos=["modulo_inexistente"]).executar()
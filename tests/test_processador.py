@@ -1,3 +1,6 @@
+import sqlite3
+
+import numpy as np
 import pytest
 import pandas as pd
 from pathlib import Path
@@ -50,4 +53,603 @@ def test_calcular_estatisticas(arquivo_teste):
     assert 'total_linhas' in stats
     assert stats['total_linhas'] == 3
     assert 'colunas' in stats
-    assert len(stats['colunas']) == 3
\ No newline at end of file
+    assert len(stats['colunas']) == 3
+
+
+def test_carregar_dados_usa_snapshot(arquivo_teste, tmp_path, caplog):
+    """Testa que a segunda leitura vem do cache colunar"""
+    caplog.set_level("INFO")
+    primeiro = ProcessadorDados(arquivo_teste, dir_cache=tmp_path)
+    assert primeiro.carregar_dados()
+    assert "Cache miss" in caplog.text
+
+    caplog.clear()
+    segundo = ProcessadorDados(arquivo_teste, dir_cache=tmp_path)
+    assert segundo.carregar_dados()
+    assert "Cache hit" in caplog.text
+    pd.testing.assert_frame_equal(primeiro.df, segundo.df)
+    assert isinstance(segundo.df.index, pd.RangeIndex)
+
+
+def test_carregar_dados_invalida_snapshot(arquivo_teste, tmp_path, caplog):
+    """Testa que alterar a planilha invalida o snapshot"""
+    caplog.set_level("INFO")
+    ProcessadorDados(arquivo_teste, dir_cache=tmp_path).carregar_dados()
+
+    pd.DataFrame({'Nome': ['Ana'], 'Idade': [40], 'Cidade': ['SP']}).to_excel(arquivo_teste, index=False)
+
+    caplog.clear()
+    processador = ProcessadorDados(arquivo_teste, dir_cache=tmp_path)
+    assert processador.carregar_dados()
+    assert "Cache miss" in caplog.text
+    assert len(processador.df) == 1
+    assert len(list(tmp_path.glob("*.parquet"))) == 1
+
+
+@pytest.fixture
+def dados_upp():
+    """Cria dados no formato da planilha da UPP"""
+    return pd.DataFrame({
+        'MÊS': ['JANEIRO', 'JANEIRO', 'FEVEREIRO', 'FEVEREIRO', 'MARÇO', 'MARÇO', 'JANEIRO', 'MARÇO'],
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I B', 'GTPP I A', 'GTPP I B', 'GTPP I A', 'GTPP I B', 'GTPP I A', 'GTPP I A'],
+        'PRESOS/APREENDIDOS': [2, 0, 1, None, 3, 4, 2, 5],
+        'VEÍCULOS RECUPERADOS': [1, None, 0, 2, None, 1, 1, 0],
+    })
+
+
+@pytest.fixture
+def arquivo_upp(dados_upp, tmp_path):
+    """Cria planilha temporária no formato da UPP"""
+    caminho = tmp_path / "estatisticas_upp.xlsx"
+    dados_upp.to_excel(caminho, index=False)
+    return caminho
+
+
+@pytest.mark.parametrize("colunas_grupo", [["TIPO DE SERVIÇO", "MÊS"], ["MÊS", "TIPO DE SERVIÇO"], ["MÊS"]])
+@pytest.mark.parametrize("operacao", ["sum", "mean", "count", "max"])
+def test_blocos_equivalem_ao_modo_em_memoria(dados_upp, tmp_path, colunas_grupo, operacao):
+    """Testa que o processamento em blocos reproduz o modo em memória, com tipos e ordem dos meses"""
+    # Meses sujos e desconhecidos em blocos diferentes: cada bloco tem as suas categorias;
+    # 300 só cabe em Int16 no último bloco (os demais ficam em Int8)
+    caminho = tmp_path / "estatisticas_upp.xlsx"
+    meses = ['JANEIRO', ' janeiro ', 'FEVEREIRO', 'JAN', 'MARÇO', 'MARÇO', 'JANEIRO', 'ABR']
+    presos = [2, 0, 1, None, 3, 4, 2, 300]
+    dados_upp.assign(**{'MÊS': meses, 'PRESOS/APREENDIDOS': presos}).to_excel(caminho, index=False)
+
+    processador = ProcessadorDados(caminho)
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados()
+    esperado = processador.agregar_por_coluna("PRESOS/APREENDIDOS", colunas_grupo, operacao)
+    esperado_stats = processador.calcular_estatisticas()
+
+    blocos = processador.limpar_dados(blocos=processador.carregar_em_blocos(tamanho_bloco=3))
+    resultado = processador.agregar_por_coluna(
+        "PRESOS/APREENDIDOS", colunas_grupo, operacao, blocos=blocos
+    )
+    pd.testing.assert_frame_equal(resultado, esperado)
+
+    stats = processador.calcular_estatisticas(
+        blocos=processador.limpar_dados(blocos=processador.carregar_em_blocos(tamanho_bloco=3))
+    )
+    assert stats['total_linhas'] == esperado_stats['total_linhas']
+    assert stats['valores_ausentes'] == esperado_stats['valores_ausentes']
+    assert stats['tipos_dados'] == esperado_stats['tipos_dados']
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(stats['estatisticas_numericas']),
+        pd.DataFrame(esperado_stats['estatisticas_numericas'])
+    )
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 2, 4, 100])
+def test_blocos_com_linhas_vazias_equivalem_a_read_excel(tmp_path, tamanho_bloco):
+    """Testa linhas vazias no meio (mantidas) e no fim (descartadas) da leitura em blocos"""
+    from openpyxl import Workbook
+
+    from app.services.leitura import ler_excel_em_blocos
+
+    caminho = tmp_path / "vazias.xlsx"
+    workbook = Workbook()
+    planilha = workbook.active
+    for linha in [("MÊS", "VALOR"), ("JANEIRO", 1), (None, None), (None, None), (None, None),
+                  ("MARÇO", "N/A"), (None, None), ("ABRIL", 4), (None, None), (None, None)]:
+        planilha.append(linha)
+    workbook.save(caminho)
+
+    blocos = list(ler_excel_em_blocos(caminho, tamanho_bloco=tamanho_bloco))
+
+    assert all(len(bloco) <= tamanho_bloco for bloco in blocos)
+    pd.testing.assert_frame_equal(
+        pd.concat(blocos, ignore_index=True).infer_objects(), pd.read_excel(caminho), check_dtype=False
+    )
+
+
+def test_carregar_multiplos_marca_origem(dados_upp, tmp_path):
+    """Testa a leitura paralela de várias planilhas e abas"""
+    for mes in ("janeiro", "fevereiro"):
+        with pd.ExcelWriter(tmp_path / f"upp_{mes}.xlsx") as writer:
+            dados_upp.to_excel(writer, sheet_name="UNIDADE A", index=False)
+            dados_upp.rename(columns={'MÊS': ' MÊS '}).to_excel(writer, sheet_name="UNIDADE B", index=False)
+
+    processador = ProcessadorDados()
+    assert processador.carregar_multiplos(str(tmp_path / "upp_*.xlsx"), sheet_name=None, max_workers=2)
+
+    assert len(processador.df) == 4 * len(dados_upp)
+    assert 'MÊS' in processador.df.columns
+    assert processador.df['MÊS'].notna().all()
+    assert processador.df['ORIGEM'].value_counts().to_dict() == {
+        f"upp_{mes}.xlsx:UNIDADE {u}": len(dados_upp) for mes in ("fevereiro", "janeiro") for u in "AB"
+    }
+
+
+def test_schema_compacto(dados_upp, tmp_path):
+    """Testa dimensões categóricas e medidas em inteiros compactos"""
+    arquivo = tmp_path / "upp_grande.xlsx"
+    pd.concat([dados_upp] * 100, ignore_index=True).to_excel(arquivo, index=False)
+    processador = ProcessadorDados(arquivo)
+    processador.carregar_dados(usar_cache=False)
+
+    meses = processador.df['MÊS']
+    assert meses.cat.ordered
+    assert list(meses.cat.categories[:3]) == ['JANEIRO', 'FEVEREIRO', 'MARÇO']
+    assert isinstance(processador.df['TIPO DE SERVIÇO'].dtype, pd.CategoricalDtype)
+    assert str(processador.df['PRESOS/APREENDIDOS'].dtype) == 'Int8'
+    assert processador.df['PRESOS/APREENDIDOS'].isna().sum() == 100
+
+    stats = processador.calcular_estatisticas()
+    assert stats['memoria_uso'] < stats['memoria_uso_original']
+
+
+@pytest.mark.parametrize("remover_zeros, remover_nulos", [(True, True), (False, True), (True, False), (False, False)])
+def test_agregar_multiplas_equivale_a_agregar_por_coluna(arquivo_upp, remover_zeros, remover_nulos):
+    """Testa que a agregação em uma passada reproduz agregar_por_coluna"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    grupos = ["TIPO DE SERVIÇO", "MÊS"]
+    medidas = {
+        "PRESOS/APREENDIDOS": ["sum", "mean", "count", "max", "min"],
+        "VEÍCULOS RECUPERADOS": ["sum", "count"],
+    }
+
+    longo = processador.agregar_multiplas(medidas, grupos, remover_zeros, remover_nulos)
+
+    for medida, operacoes in medidas.items():
+        for operacao in operacoes:
+            esperado = processador.agregar_por_coluna(medida, grupos, operacao, remover_zeros, remover_nulos)
+            obtido = ProcessadorDados.extrair_medida(longo, medida, operacao)
+            pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_cache_de_agregacoes(arquivo_upp):
+    """Testa o cache LRU de agregar_por_coluna e sua invalidação"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    args = ("PRESOS/APREENDIDOS", ["TIPO DE SERVIÇO", "MÊS"], "sum")
+
+    primeiro = processador.agregar_por_coluna(*args)
+    primeiro["PRESOS/APREENDIDOS"] = -1
+    segundo = processador.agregar_por_coluna(*args)
+
+    assert processador.cache_agregacoes.info()['hits'] == 1
+    assert (segundo["PRESOS/APREENDIDOS"] >= 0).all()
+
+    processador.limpar_dados()
+    processador.agregar_por_coluna(*args)
+    assert processador.cache_agregacoes.info()['misses'] == 2
+
+
+def test_cache_de_agregacoes_desativado(arquivo_upp):
+    """Testa que tamanho_cache_agregacoes=0 desativa o cache"""
+    processador = ProcessadorDados(arquivo_upp, tamanho_cache_agregacoes=0)
+    processador.carregar_dados(usar_cache=False)
+    processador.agregar_por_coluna("PRESOS/APREENDIDOS", ["MÊS"])
+    processador.agregar_por_coluna("PRESOS/APREENDIDOS", ["MÊS"])
+    assert processador.cache_agregacoes.info()['hits'] == 0
+    assert len(processador.cache_agregacoes) == 0
+
+
+@pytest.mark.parametrize("colunas_grupo", [["MÊS"], ["TIPO DE SERVIÇO"], ["TIPO DE SERVIÇO", "MÊS"]])
+@pytest.mark.parametrize("operacao", ["sum", "mean", "count", "max", "min"])
+@pytest.mark.parametrize("remover_zeros, remover_nulos", [(True, True), (False, True), (True, False), (False, False)])
+def test_cubo_equivale_as_linhas(arquivo_upp, colunas_grupo, operacao, remover_zeros, remover_nulos):
+    """Testa que o roll-up do cubo reproduz a agregação sobre as linhas"""
+    processador = ProcessadorDados(arquivo_upp, tamanho_cache_agregacoes=0)
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(materializar_cubo=False)
+    args = ("PRESOS/APREENDIDOS", colunas_grupo, operacao, remover_zeros, remover_nulos)
+    esperado = processador.agregar_por_coluna(*args)
+
+    processador.limpar_dados()
+    assert processador.cubo is not None
+    pd.testing.assert_frame_equal(processador.agregar_por_coluna(*args), esperado)
+
+
+@pytest.mark.parametrize("colunas_grupo", [["MÊS"], ["TIPO DE SERVIÇO"], ["TIPO DE SERVIÇO", "MÊS"]])
+@pytest.mark.parametrize("operacao", ["sum", "mean", "count", "max", "min"])
+@pytest.mark.parametrize("remover_zeros, remover_nulos", [(True, True), (False, True), (True, False), (False, False)])
+def test_armazem_equivale_as_linhas(arquivo_upp, tmp_path, colunas_grupo, operacao, remover_zeros, remover_nulos):
+    """Testa que o GROUP BY no SQLite reproduz a agregação sobre as linhas"""
+    processador = ProcessadorDados(arquivo_upp, tamanho_cache_agregacoes=0)
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(materializar_cubo=False)
+    args = ("PRESOS/APREENDIDOS", colunas_grupo, operacao, remover_zeros, remover_nulos)
+    esperado = processador.agregar_por_coluna(*args)
+
+    assert processador.conectar_armazem(tmp_path / "armazem.sqlite")
+    pd.testing.assert_frame_equal(processador.armazem.agregar(*args), esperado)
+
+
+def test_armazem_sem_dataframe(arquivo_upp, tmp_path):
+    """Testa que um armazém já importado responde sem os dados em memória"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados()
+    esperado = processador.preparar_dados_barras_por_mes("PRESOS/APREENDIDOS")
+    assert processador.conectar_armazem(tmp_path / "armazem.sqlite")
+
+    # Alterar self.df desatualiza o armazém: volta a agregar em memória
+    processador.registrar_alteracao()
+    assert processador._armazem_atual() is None
+
+    leitor = ProcessadorDados(arquivo_upp)
+    assert leitor.conectar_armazem(tmp_path / "armazem.sqlite", importar=False)
+    assert leitor.preparar_dados_barras_por_mes("PRESOS/APREENDIDOS") == esperado
+    with pytest.raises(ValueError):
+        leitor.agregar_por_coluna("INEXISTENTE", ["MÊS"])
+
+    assert not ProcessadorDados(arquivo_upp).conectar_armazem(tmp_path / "vazio.sqlite", importar=False)
+
+
+def test_conectar_armazem_fecha_conexao_anterior(arquivo_upp, tmp_path):
+    """Testa que reconectar fecha o armazém anterior"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    assert processador.conectar_armazem(tmp_path / "armazem.sqlite")
+    anterior = processador.armazem
+
+    assert processador.conectar_armazem(tmp_path / "armazem.sqlite")
+    assert processador.armazem is not anterior
+    with pytest.raises(sqlite3.ProgrammingError):
+        anterior._executar("SELECT 1")
+
+    assert not processador.conectar_armazem(tmp_path / "armazem.sqlite", motor="oracle")
+    assert processador.armazem is None
+
+
+@pytest.mark.parametrize("colunas_grupo", [["MÊS"], ["TIPO DE SERVIÇO"], ["TIPO DE SERVIÇO", "MÊS"]])
+@pytest.mark.parametrize("operacao", ["sum", "mean", "count", "max", "min"])
+@pytest.mark.parametrize("remover_zeros, remover_nulos", [(True, True), (False, True), (True, False), (False, False)])
+def test_motor_numpy_equivale_ao_pandas(arquivo_upp, colunas_grupo, operacao, remover_zeros, remover_nulos):
+    """Testa que engine='numpy' reproduz o groupby do pandas, inclusive os tipos"""
+    processador = ProcessadorDados(arquivo_upp, tamanho_cache_agregacoes=0)
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(materializar_cubo=False)
+    args = ("PRESOS/APREENDIDOS", colunas_grupo, operacao, remover_zeros, remover_nulos)
+    esperado = processador.agregar_por_coluna(*args)
+    pd.testing.assert_frame_equal(processador.agregar_por_coluna(*args, engine="numpy"), esperado)
+
+
+@pytest.mark.parametrize("operacao", ["sum", "mean", "count", "max", "min"])
+def test_motor_numpy_chaves_texto(operacao):
+    """Testa chaves de texto com nulos, inteiros numpy e somas que estouram o tipo"""
+    processador = ProcessadorDados(tamanho_cache_agregacoes=0)
+    processador.df = pd.DataFrame({
+        'TURNO': ['NOITE', 'DIA', None, 'DIA', 'NOITE', 'DIA'],
+        'EQUIPE': ['B', 'A', 'A', 'A', None, 'B'],
+        'OCORRENCIAS': pd.Series([100, 100, 5, 50, 7, -3], dtype="int8"),
+    })
+    processador.registrar_alteracao()
+    for colunas_grupo in (["TURNO"], ["EQUIPE", "TURNO"]):
+        args = ("OCORRENCIAS", colunas_grupo, operacao)
+        pd.testing.assert_frame_equal(
+            processador.agregar_por_coluna(*args, engine="numpy"), processador.agregar_por_coluna(*args)
+        )
+    assert processador.codigos_grupo.info()['tamanho'] == 2
+
+    with pytest.raises(ValueError):
+        processador.agregar_por_coluna("OCORRENCIAS", ["TURNO"], engine="polars")
+
+
+@pytest.fixture
+def arquivo_dois_anos(tmp_path):
+    """Planilha com MÊS e ANO: o mesmo mês em dois anos e um mês sem registro"""
+    caminho = tmp_path / "upp_anos.xlsx"
+    pd.DataFrame({
+        'MÊS': ['NOVEMBRO', ' janeiro ', 'JANEIRO', 'JANEIRO', 'MARÇO', 'NOVEMBRO', 'MARÇO', 'JANEIRO'],
+        'ANO': [2023, 2024, 2024, 2025, 2024, 2024, 2025, None],
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I A', 'GTPP I B', 'GTPP I A', 'GTPP I B', 'GTPP I A', 'GTPP I A', 'GTPP I A'],
+        'PRESOS/APREENDIDOS': [1, 2, 3, 4, 5, 6, 7, 8],
+    }).to_excel(caminho, index=False)
+    return caminho
+
+
+def test_periodo_separa_os_anos(arquivo_dois_anos, tmp_path):
+    """Testa que a dimensão PERÍODO mantém o mesmo mês de anos diferentes em barras separadas"""
+    processador = ProcessadorDados(arquivo_dois_anos)
+    processador.carregar_dados(usar_cache=False)
+    assert str(processador.df["PERÍODO"].dtype) == "period[M]"
+    assert processador.df["PERÍODO"].isna().sum() == 1
+
+    meses, tipos, series = processador.preparar_dados_barras_por_mes("PRESOS/APREENDIDOS")
+    assert meses == ["NOVEMBRO/2023", "JANEIRO/2024", "MARÇO/2024", "NOVEMBRO/2024", "JANEIRO/2025", "MARÇO/2025"]
+    assert tipos == ["GTPP I A", "GTPP I B"]
+    assert series == [[1, 2, 0, 6, 4, 7], [0, 3, 5, 0, 0, 0]]
+
+    # A partir de uma coluna de datas (ISO ou dia/mês/ano)
+    caminho = tmp_path / "upp_datas.xlsx"
+    pd.DataFrame({
+        'DATA': ['2024-01-31', '05/02/2024', 'sem data'],
+        'TIPO DE SERVIÇO': ['GTPP I A'] * 3,
+        'PRESOS/APREENDIDOS': [1, 2, 3],
+    }).to_excel(caminho, index=False)
+    processador = ProcessadorDados(caminho)
+    processador.carregar_dados(usar_cache=False)
+    periodos = processador.df["PERÍODO"]
+    assert periodos.iloc[:2].tolist() == [pd.Period("2024-01", "M"), pd.Period("2024-02", "M")]
+    assert pd.isna(periodos.iloc[2])
+
+
+def test_serie_temporal(arquivo_dois_anos):
+    """Testa média móvel, variações e acumulado contra as operações equivalentes do pandas"""
+    processador = ProcessadorDados(arquivo_dois_anos)
+    processador.carregar_dados(usar_cache=False)
+    serie = processador.serie_temporal("PRESOS/APREENDIDOS", janela=2)
+
+    # Nov/2023 a mar/2025, todos os meses, para os dois tipos
+    assert len(serie) == 17 * 2
+    for tipo, grupo in serie.groupby("TIPO DE SERVIÇO"):
+        valores = grupo["PRESOS/APREENDIDOS"].reset_index(drop=True)
+        pd.testing.assert_series_equal(grupo["media_movel"].reset_index(drop=True),
+                                       valores.rolling(2).mean(), check_names=False)
+        pd.testing.assert_series_equal(grupo["variacao_mes"].reset_index(drop=True),
+                                       valores.diff().astype("float64"), check_names=False)
+        pd.testing.assert_series_equal(grupo["variacao_ano"].reset_index(drop=True),
+                                       (valores - valores.shift(12)).astype("float64"), check_names=False)
+        pd.testing.assert_series_equal(grupo["acumulado"].reset_index(drop=True),
+                                       valores.cumsum(), check_names=False)
+
+    janeiro = serie[(serie["PERÍODO"] == pd.Period("2025-01", "M")) & (serie["TIPO DE SERVIÇO"] == "GTPP I A")]
+    assert janeiro["variacao_ano"].item() == 4 - 2
+
+    sem_ano = ProcessadorDados(arquivo_dois_anos)
+    sem_ano.carregar_dados(usar_cache=False)
+    sem_ano.df = sem_ano.df.drop(columns=["PERÍODO"])
+    sem_ano.registrar_alteracao()
+    with pytest.raises(ValueError):
+        sem_ano.serie_temporal("PRESOS/APREENDIDOS")
+
+
+@pytest.mark.parametrize("engine", ["pandas", "numpy"])
+def test_modo_arrow_equivale_a_memoria(arquivo_dois_anos, tmp_path, monkeypatch, engine):
+    """Testa que o arquivo Arrow mapeado responde como o DataFrame, lendo só as colunas da consulta"""
+    processador = ProcessadorDados(arquivo_dois_anos, tamanho_cache_agregacoes=0)
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(materializar_cubo=False)
+    caminho = processador.salvar_arrow(tmp_path / "dados.arrow")
+
+    leitor = ProcessadorDados(tamanho_cache_agregacoes=0)
+    assert leitor.carregar_arrow(caminho)
+    assert leitor.df is None
+    pd.testing.assert_frame_equal(leitor.arrow.ler(), processador.df.reset_index(drop=True))
+
+    lidas = []
+    ler = type(leitor.arrow).ler
+    monkeypatch.setattr(type(leitor.arrow), "ler", lambda self, colunas=None: lidas.append(colunas) or ler(self, colunas))
+
+    for colunas_grupo in (["TIPO DE SERVIÇO"], ["PERÍODO", "TIPO DE SERVIÇO"]):
+        for operacao in ("sum", "mean", "max"):
+            args = ("PRESOS/APREENDIDOS", colunas_grupo, operacao)
+            pd.testing.assert_frame_equal(
+                leitor.agregar_por_coluna(*args, engine=engine), processador.agregar_por_coluna(*args)
+            )
+    assert {coluna for colunas in lidas for coluna in colunas} <= {"PRESOS/APREENDIDOS", "TIPO DE SERVIÇO", "PERÍODO"}
+
+    assert leitor.preparar_dados_barras_por_mes("PRESOS/APREENDIDOS") == \
+        processador.preparar_dados_barras_por_mes("PRESOS/APREENDIDOS")
+    pd.testing.assert_frame_equal(leitor.serie_temporal("PRESOS/APREENDIDOS"),
+                                  processador.serie_temporal("PRESOS/APREENDIDOS"))
+
+    assert not ProcessadorDados().carregar_arrow(tmp_path / "inexistente.arrow")
+
+
+def test_atualizar_incremental(dados_upp, tmp_path):
+    """Testa que a atualização incremental reproduz o processamento completo"""
+    primeiro_mes = tmp_path / "upp_1.xlsx"
+    segundo_mes = tmp_path / "upp_2.xlsx"
+    completo = tmp_path / "upp_completo.xlsx"
+    dados_upp.iloc[:5].to_excel(primeiro_mes, index=False)
+    dados_upp.iloc[3:].to_excel(segundo_mes, index=False)  # repete duas linhas já vistas
+    dados_upp.to_excel(completo, index=False)
+
+    processador = ProcessadorDados(primeiro_mes)
+    processador.carregar_dados(usar_cache=False)
+    assert processador.atualizar_incremental()['linhas_novas'] == 5
+
+    processador = ProcessadorDados(segundo_mes)
+    processador.carregar_dados(usar_cache=False)
+    resumo = processador.atualizar_incremental()
+    assert resumo == {'linhas_novas': 2, 'linhas_ignoradas': 3, 'total_linhas': 7}
+
+    referencia = ProcessadorDados(completo)
+    referencia.carregar_dados(usar_cache=False)
+    referencia.limpar_dados()
+
+    for operacao in ["sum", "count", "max"]:
+        args = ("PRESOS/APREENDIDOS", ["MÊS", "TIPO DE SERVIÇO"], operacao)
+        pd.testing.assert_frame_equal(
+            processador.agregar_por_coluna(*args), referencia.agregar_por_coluna(*args)
+        )
+
+
+def test_agregar_multiplas_incremental_usa_o_historico(dados_upp, tmp_path):
+    """Testa que agregar_multiplas e o gráfico por mês respondem por todo o histórico, não só pela última carga"""
+    dados = dados_upp.assign(ANO=2024)
+    for i, parte in enumerate([dados.iloc[:5], dados.iloc[3:]]):
+        caminho = tmp_path / f"upp_{i}.xlsx"
+        parte.to_excel(caminho, index=False)
+        processador = ProcessadorDados(caminho)
+        processador.carregar_dados(usar_cache=False)
+        processador.atualizar_incremental()
+
+    completo = tmp_path / "upp_completo.xlsx"
+    pd.concat([dados.iloc[:5], dados.iloc[3:]]).to_excel(completo, index=False)
+    referencia = ProcessadorDados(completo)
+    referencia.carregar_dados(usar_cache=False)
+    referencia.limpar_dados()
+
+    medidas = {"PRESOS/APREENDIDOS": ["sum", "mean", "count", "max"], "VEÍCULOS RECUPERADOS": ["sum", "min"]}
+    for grupos in (["TIPO DE SERVIÇO", "MÊS"], ["MÊS"]):
+        longo = processador.agregar_multiplas(medidas, grupos)
+        esperado = referencia.agregar_multiplas(medidas, grupos)
+        for medida, operacoes in medidas.items():
+            for operacao in operacoes:
+                pd.testing.assert_frame_equal(
+                    ProcessadorDados.extrair_medida(longo, medida, operacao),
+                    ProcessadorDados.extrair_medida(esperado, medida, operacao)
+                )
+
+    assert processador.contar_linhas() == len(referencia.df)
+    _, tipos, valores = processador.preparar_dados_barras_por_mes("PRESOS/APREENDIDOS")
+    assert dict(zip(tipos, map(sum, valores))) == \
+        referencia.agregar_por_coluna("PRESOS/APREENDIDOS", ["TIPO DE SERVIÇO"], remover_zeros=False) \
+        .set_index("TIPO DE SERVIÇO")["PRESOS/APREENDIDOS"].to_dict()
+
+    # Fora do cubo (PERÍODO, ANO) o histórico não existe: a consulta é recusada
+    with pytest.raises(ValueError, match="incremental"):
+        processador.agregar_multiplas(medidas, ["PERÍODO"])
+    with pytest.raises(ValueError, match="incremental"):
+        processador.agregar_por_coluna("PRESOS/APREENDIDOS", ["ANO"])
+
+
+def test_atualizar_incremental_chave_estavel(arquivo_dois_anos, tmp_path):
+    """Testa que a chave ignora PERÍODO e os tipos da carga e que mudar a chave falha"""
+    processador = ProcessadorDados(arquivo_dois_anos)
+    processador.carregar_dados(usar_cache=False)
+    assert 'PERÍODO' in processador.df.columns
+    assert processador.atualizar_incremental()['linhas_novas'] == 8
+
+    # Mesmas linhas sem o schema compacto (sem PERÍODO, texto e float64): nada novo
+    sem_tipos = ProcessadorDados(arquivo_dois_anos)
+    sem_tipos.carregar_dados(usar_cache=False, aplicar_tipos=False)
+    sem_tipos.df['MÊS'] = sem_tipos.df['MÊS'].str.strip().str.upper()
+    assert sem_tipos.atualizar_incremental()['linhas_novas'] == 0
+
+    # Estado gravado com a chave padrão: um subconjunto explícito não é aceito
+    with pytest.raises(ValueError):
+        sem_tipos.atualizar_incremental(colunas_chave=['MÊS', 'TIPO DE SERVIÇO'])
+
+
+def test_calcular_estatisticas_sob_demanda(arquivo_upp):
+    """Testa que cada estatística só é calculada quando acessada"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    stats = processador.calcular_estatisticas()
+
+    assert stats.calculadas == []
+    assert stats['total_linhas'] == 8
+    assert stats['valores_ausentes']['PRESOS/APREENDIDOS'] == 1
+    assert stats['percentual_ausentes']['PRESOS/APREENDIDOS'] == pytest.approx(12.5)
+    assert 'estatisticas_numericas' not in stats.calculadas
+
+    resumo = processador.resumo_dados()
+    assert 'PRESOS/APREENDIDOS: 1 (12.5%)' in resumo
+    assert 'estatisticas_numericas' not in stats.calculadas
+    assert stats['estatisticas_numericas']['PRESOS/APREENDIDOS']['max'] == 5
+
+
+def test_estimativa_rapida_de_memoria():
+    """Testa a estimativa de memória por amostragem"""
+    from app.services.estatisticas import estimar_memoria_mb
+
+    df = pd.DataFrame({'texto': pd.Series(['abc' * (i % 7) for i in range(50_000)], dtype=object),
+                       'numero': range(50_000)})
+    exato = estimar_memoria_mb(df, amostra=None)
+    assert estimar_memoria_mb(df, amostra=5_000) == pytest.approx(exato, rel=0.05)
+
+
+def test_limpar_dados_remove_duplicatas_por_hash(arquivo_upp, dados_upp):
+    """Testa a remoção de duplicatas por hash, com e sem colunas-chave"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    esperado = processador.df.drop_duplicates()
+    processador.limpar_dados()
+    pd.testing.assert_frame_equal(processador.df, esperado)
+    assert processador.duplicatas_removidas == 1
+
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(colunas_chave=['MÊS', 'TIPO DE SERVIÇO'])
+    assert processador.duplicatas_removidas == len(dados_upp) - 6
+
+
+def test_limpar_dados_persiste_impressoes(dados_upp, tmp_path):
+    """Testa a detecção de duplicatas entre planilhas diferentes"""
+    dados_upp.iloc[:5].to_excel(tmp_path / "upp_1.xlsx", index=False)
+    dados_upp.iloc[3:].to_excel(tmp_path / "upp_2.xlsx", index=False)
+
+    processador = ProcessadorDados(tmp_path / "upp_1.xlsx")
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(persistir_impressoes=True)
+    assert processador.duplicatas_removidas == 0
+
+    processador = ProcessadorDados(tmp_path / "upp_2.xlsx")
+    processador.carregar_dados(usar_cache=False)
+    processador.limpar_dados(persistir_impressoes=True)
+    assert processador.duplicatas_removidas == 3
+    assert len(processador.df) == 2
+
+    # Histórico gravado ordenado e sem repetições: as 5 + 2 linhas mantidas
+    salvas = np.load(tmp_path / "impressoes_linhas.npy")
+    assert len(salvas) == 7
+    assert (salvas[1:] > salvas[:-1]).all()
+
+
+def test_limpar_dados_duplicatas_entre_planilhas_de_carregar_multiplos(dados_upp, tmp_path):
+    """Testa que ORIGEM (e PERÍODO) ficam fora da chave: a mesma planilha duas vezes vira uma"""
+    dados_upp.assign(ANO=2024).to_excel(tmp_path / "upp_a.xlsx", index=False)
+    dados_upp.assign(ANO=2024).to_excel(tmp_path / "upp_b.xlsx", index=False)
+
+    processador = ProcessadorDados()
+    assert processador.carregar_multiplos(str(tmp_path / "upp_*.xlsx"), max_workers=1, usar_cache=False)
+    assert {'ORIGEM', 'PERÍODO'} <= set(processador.df.columns)
+    processador.limpar_dados()
+
+    assert len(processador.df) == len(dados_upp.drop_duplicates())
+    assert processador.duplicatas_removidas == 2 * len(dados_upp) - len(dados_upp.drop_duplicates())
+
+
+def test_salvar_dados_processados_em_varios_formatos(arquivo_upp, tmp_path):
+    """Testa a gravação simultânea em vários formatos"""
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    salvos = processador.salvar_dados_processados("saida", formatos=["csv.gz", "parquet", "feather", "xlsx"])
+
+    assert set(salvos) == {"csv.gz", "parquet", "feather", "xlsx"}
+    for info in salvos.values():
+        assert info['caminho'].exists()
+        assert info['bytes'] == info['caminho'].stat().st_size
+
+    pd.testing.assert_frame_equal(pd.read_parquet(salvos['parquet']['caminho']), processador.df)
+    relido = pd.read_excel(salvos['xlsx']['caminho'])
+    assert relido['PRESOS/APREENDIDOS'].sum() == processador.df['PRESOS/APREENDIDOS'].sum()
+    assert relido['PRESOS/APREENDIDOS'].isna().sum() == 1
+    assert len(pd.read_csv(salvos['csv.gz']['caminho'])) == len(processador.df)
+
+    with pytest.raises(ValueError):
+        processador.salvar_dados_processados("saida", formatos=["pdf"])
+
+
+def test_salvar_dados_processados_falha_de_um_formato(arquivo_upp, monkeypatch):
+    """Testa que a falha de um formato não descarta os demais"""
+    from app.services import exportacao
+
+    def falhar(df, caminho):
+        caminho.write_bytes(b"parcial")
+        raise ImportError("Import zstandard failed")
+
+    monkeypatch.setitem(exportacao.FORMATOS, "csv.zst", (".csv.zst", falhar))
+    processador = ProcessadorDados(arquivo_upp)
+    processador.carregar_dados(usar_cache=False)
+    salvos = processador.salvar_dados_processados("saida", formatos=["csv", "csv.zst"])
+
+    assert salvos['csv']['caminho'].exists()
+    assert "zstandard" in salvos['csv.zst']['erro']
+    assert not salvos['csv.zst']['caminho'].exists()
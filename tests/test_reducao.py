@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.reducao import paginar, reduzir_serie, totais_por_categoria
+
+
+@pytest.fixture
+def serie():
+    n = 20_000
+    return pd.DataFrame({
+        'date': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'sales': np.random.default_rng(0).normal(size=n).cumsum(),
+    })
+
+
+@pytest.mark.parametrize("metodo", ["lttb", "minmax"])
+def test_reduzir_serie_respeita_limite_e_extremos(serie, metodo):
+    """Testa que a série reduzida tem no máximo o limite de pontos e mantém as pontas"""
+    reduzida = reduzir_serie(serie.sample(frac=1, random_state=0), 'date', 'sales', limite=500, metodo=metodo)
+
+    assert len(reduzida) <= 500
+    assert reduzida['date'].is_monotonic_increasing
+    if metodo == "minmax":
+        assert reduzida['sales'].max() == serie['sales'].max()
+        assert reduzida['sales'].min() == serie['sales'].min()
+    else:
+        assert reduzida['date'].iloc[0] == serie['date'].iloc[0]
+        assert reduzida['date'].iloc[-1] == serie['date'].iloc[-1]
+
+
+def test_totais_por_categoria_agrupa_excedentes():
+    """Testa que categorias além do limite são somadas em OUTROS sem perder o total"""
+    df = pd.DataFrame({
+        'tipo': list("ABCDE") * 2,
+        'mes': ['JAN'] * 5 + ['FEV'] * 5,
+        'valor': [50, 40, 3, 2, 1, 10, 20, 1, 1, 1],
+    })
+
+    totais = totais_por_categoria(df, 'tipo', 'valor', por='mes', limite=3)
+
+    assert set(totais['tipo']) == {'A', 'B', 'OUTROS'}
+    assert totais['valor'].sum() == df['valor'].sum()
+    assert totais.set_index(['tipo', 'mes']).loc[('OUTROS', 'JAN'), 'valor'] == 6
+
+
+def test_paginar_equivale_a_ordenar_e_fatiar(serie):
+    """Testa que a página ordenada no servidor coincide com sort_values + iloc"""
+    serie.loc[5, 'sales'] = np.nan
+    pagina, total_paginas = paginar(serie, pagina=3, tamanho_pagina=50, ordenar_por='sales', ascendente=False)
+
+    assert total_paginas == 400
+    esperado = serie.sort_values('sales', ascending=False, kind='stable').iloc[100:150]
+    pd.testing.assert_frame_equal(pagina, esperado)
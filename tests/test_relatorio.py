@@ -0,0 +1,85 @@
+import json
+
+import pandas as pd
+import pytest
+
+from app.processador import ProcessadorDados
+from app.services.relatorio import carregar_spec, executar_relatorio, planejar
+
+SPEC = {
+    'nome': 'teste',
+    'agregacoes': [
+        {'nome': 'presos_tipo', 'medida': 'PRESOS/APREENDIDOS', 'grupos': ['TIPO DE SERVIÇO']},
+        {'nome': 'presos_media', 'medida': 'PRESOS/APREENDIDOS', 'grupos': ['TIPO DE SERVIÇO'], 'operacao': 'mean'},
+        {'nome': 'veiculos_tipo', 'medida': 'VEÍCULOS RECUPERADOS', 'grupos': ['TIPO DE SERVIÇO']},
+        {'nome': 'presos_mes', 'medida': 'PRESOS/APREENDIDOS', 'grupos': ['MÊS'], 'remover_zeros': False},
+    ],
+    'graficos': [
+        {'agregacao': 'presos_tipo', 'x': 'TIPO DE SERVIÇO', 'titulo': 'Presos por tipo'},
+    ],
+}
+
+
+@pytest.fixture
+def processador(tmp_path):
+    arquivo = tmp_path / "upp.xlsx"
+    pd.DataFrame({
+        'MÊS': ['JANEIRO', 'JANEIRO', 'FEVEREIRO', 'MARÇO'],
+        'TIPO DE SERVIÇO': ['GTPP I A', 'GTPP I B', 'GTPP I A', 'GTPP I B'],
+        'PRESOS/APREENDIDOS': [2, 0, 1, 4],
+        'VEÍCULOS RECUPERADOS': [1, 1, None, 2],
+    }).to_excel(arquivo, index=False)
+    processador = ProcessadorDados(arquivo)
+    processador.carregar_dados(usar_cache=False)
+    return processador
+
+
+def test_planejar_agrupa_chaves_iguais():
+    """Testa que agregações com as mesmas chaves e filtros viram uma passada"""
+    passadas = planejar(SPEC['agregacoes'])
+
+    assert passadas == {
+        (('TIPO DE SERVIÇO',), True, True): {'PRESOS/APREENDIDOS': ['sum', 'mean'], 'VEÍCULOS RECUPERADOS': ['sum']},
+        (('MÊS',), False, True): {'PRESOS/APREENDIDOS': ['sum']},
+    }
+
+
+def test_executar_relatorio_equivale_a_agregar_por_coluna(processador, tmp_path):
+    """Testa tabelas, gráficos e manifesto do relatório"""
+    spec_json = tmp_path / "spec.json"
+    spec_json.write_text(json.dumps(SPEC), encoding="utf-8")
+
+    manifesto = executar_relatorio(processador, carregar_spec(spec_json), tmp_path / "saida")
+
+    tabela = pd.read_csv(manifesto['tabelas']['presos_media']['csv'])
+    esperado = processador.agregar_por_coluna('PRESOS/APREENDIDOS', ['TIPO DE SERVIÇO'], 'mean')
+    assert tabela['PRESOS/APREENDIDOS'].tolist() == pytest.approx(esperado['PRESOS/APREENDIDOS'].tolist())
+
+    assert len(manifesto['passadas']) == 2
+    assert (tmp_path / "saida" / "manifesto.json").exists()
+    assert all(caminho.endswith(".png") for caminho in manifesto['graficos'].values())
+
+
+def test_spec_invalida(tmp_path):
+    """Testa a validação de gráficos que referenciam agregações inexistentes"""
+    spec = tmp_path / "spec.json"
+    spec.write_text(json.dumps({**SPEC, 'graficos': [{'agregacao': 'nao_existe', 'x': 'MÊS'}]}), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="inexistente"):
+        carregar_spec(spec)
+
+
+def test_executar_relatorio_sem_dataframe(processador, tmp_path):
+    """Testa o relatório nos modos Arrow e só-armazém, em que self.df é None"""
+    processador.limpar_dados()
+    leitores = [ProcessadorDados(), ProcessadorDados()]
+    assert leitores[0].carregar_arrow(processador.salvar_arrow(tmp_path / "dados.arrow"))
+    assert processador.conectar_armazem(tmp_path / "armazem.sqlite")
+    assert leitores[1].conectar_armazem(tmp_path / "armazem.sqlite", importar=False)
+
+    esperado = pd.read_csv(executar_relatorio(processador, SPEC, tmp_path / "saida")['tabelas']['presos_media']['csv'])
+    for i, leitor in enumerate(leitores):
+        manifesto = executar_relatorio(leitor, SPEC, tmp_path / f"saida_{i}")
+        assert manifesto['linhas'] == len(processador.df)
+        pd.testing.assert_frame_equal(pd.read_csv(manifesto['tabelas']['presos_media']['csv']), esperado)
+    assert ProcessadorDados().contar_linhas() == 0